@@ -0,0 +1,165 @@
+"""
+    # 事件预处理吞吐
+
+    回放合成的`GroupMessageEvent`，对比每个事件在基础插件预处理阶段的开销：
+
+    - 旧方式：各关注点独立的预处理钩子并发执行（统计×2、缓存×2、黑名单×2、故障转移），
+      每个钩子各自解析适配器、拼接标识、检查超级管理员，随后开关检查与权限检查再各算一次
+    - 新方式：`preprocess_event`管线计算一次`EventContext`，开关检查与权限检查复用上下文
+
+    旧方式按基线代码逐钩子还原，不经过NoneBot的依赖注入，两者均只计入插件自身开销。
+
+    输出 events/sec 与单事件耗时的 p50/p99。
+
+    运行：`python bench/preprocess.py [事件数]`（于项目根目录，默认20000）
+"""
+import asyncio
+import os
+import sys
+import tempfile
+from time import perf_counter
+from typing import Awaitable, Callable, List
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nonebot
+
+nonebot.init(os_data_path=tempfile.mkdtemp(),
+             superusers={"10000"},
+             log_level="WARNING")
+nonebot.load_plugin("src.plugins.os_bot_base")
+
+from nonebot import get_driver
+from nonebot.adapters.onebot import v11
+from nonebot.permission import SUPERUSER
+
+from src.plugins.os_bot_base.adapter import AdapterFactory
+from src.plugins.os_bot_base.blacklist import BlackSession
+from src.plugins.os_bot_base.cache.onebot import cache_bot_event, cache_message_event
+from src.plugins.os_bot_base.context import EventContext
+from src.plugins.os_bot_base.failover import LoadBalancingSession
+from src.plugins.os_bot_base.permission import PermManage
+from src.plugins.os_bot_base.preprocess import preprocess_event
+from src.plugins.os_bot_base.statistics import statistics_record
+from src.plugins.os_bot_base.util import get_plugin_session
+
+PERM_NAME = "bench_perm"
+
+
+def build_events(size: int) -> List[v11.GroupMessageEvent]:
+    events = []
+    for i in range(size):
+        events.append(
+            v11.GroupMessageEvent.parse_obj({
+                "time": 1700000000,
+                "self_id": 123456,
+                "post_type": "message",
+                "message_type": "group",
+                "sub_type": "normal",
+                "message_id": i,
+                "group_id": 100000 + i % 50,
+                "user_id": 200000 + i % 500,
+                "message": [{
+                    "type": "text",
+                    "data": {
+                        "text": f"hello {i}"
+                    }
+                }],
+                "raw_message": f"hello {i}",
+                "font": 0,
+                "sender": {
+                    "user_id": 200000 + i % 500,
+                    "nickname": "bench",
+                    "card": ""
+                },
+                "to_me": False
+            }))
+    return events
+
+
+async def legacy_context(bot: v11.Bot, event: v11.Event) -> EventContext:
+    adapter = AdapterFactory.get_adapter(bot)
+    return EventContext(
+        adapter=adapter,
+        bot_type=adapter.get_type(),
+        bot_id=await adapter.get_bot_id(bot, event),
+        drive_mark=await adapter.mark_drive(bot, event),
+        group_mark=await adapter.mark_group_without_drive(bot, event),
+        is_superuser=await SUPERUSER(bot, event),
+        is_group=await adapter.msg_is_multi_group(bot, event),
+        scope_id=f"{await adapter.get_group_id_from_event(bot, event)}",
+        unit_key=f"{await adapter.get_unit_id_from_event(bot, event)}",
+        group_id=event.group_id,  # type: ignore
+        user_id=event.user_id)  # type: ignore
+
+
+async def legacy(bot: v11.Bot, event: v11.GroupMessageEvent) -> None:
+
+    async def statistics_all() -> None:
+        statistics_record.add_event_count()
+
+    async def statistics_message() -> None:
+        statistics_record.add_event_message_count()
+
+    async def cache_bot() -> None:
+        cache_bot_event(bot)
+
+    async def cache_group() -> None:
+        await cache_message_event(bot, event)
+
+    async def black_eachother() -> None:
+        f"{event.user_id}" in nonebot.get_bots()
+
+    async def black_group() -> None:
+        session: BlackSession = await get_plugin_session(BlackSession)
+        event.group_id in session.ban_group_list
+        await SUPERUSER(bot, event)
+        event.user_id in session.ban_user_list
+
+    async def failover() -> None:
+        session: LoadBalancingSession = await get_plugin_session(
+            LoadBalancingSession)
+        await session.is_priority(bot, event, await legacy_context(bot, event))
+
+    await asyncio.gather(statistics_all(), statistics_message(), cache_bot(),
+                         cache_group(), black_eachother(), black_group(),
+                         failover())
+    adapter = AdapterFactory.get_adapter(bot)
+    await adapter.mark_group_without_drive(bot, event)
+    await PermManage.check_permission(PERM_NAME, bot, event)
+
+
+async def pipeline(bot: v11.Bot, event: v11.GroupMessageEvent) -> None:
+    await preprocess_event(bot, event)
+    await PermManage.check_permission(PERM_NAME, bot, event)
+
+
+async def run(name: str, handle: Callable[[v11.Bot, v11.GroupMessageEvent],
+                                          Awaitable[None]], bot: v11.Bot,
+              size: int) -> None:
+    events = build_events(size)
+    costs: List[float] = []
+    start = perf_counter()
+    for event in events:
+        begin = perf_counter()
+        await handle(bot, event)
+        costs.append(perf_counter() - begin)
+    total = perf_counter() - start
+    costs.sort()
+    print(f"{name} {size / total:.0f} events/sec "
+          f"p50 {costs[len(costs) // 2] * 1e6:.1f}us "
+          f"p99 {costs[int(len(costs) * 0.99)] * 1e6:.1f}us")
+
+
+async def main(size: int) -> None:
+    bot = v11.Bot(v11.Adapter(get_driver()), "123456")
+    PermManage.register(PERM_NAME, "基准测试")
+    print(f"事件数 {size}")
+    # 预热会话与适配器
+    await run("预热", pipeline, bot, 200)
+    await run("旧方式", legacy, bot, size)
+    await run("新方式", pipeline, bot, size)
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000))
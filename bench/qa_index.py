@@ -0,0 +1,159 @@
+"""
+    # 问答匹配索引
+
+    以10k条问答（含别名，关键词/模糊/完全模式混合）的问答库对比：
+
+    - 索引构建耗时、问答内容变更后的重建耗时（模式串集合不变，复用自动机）、
+      增加问题后的重建耗时、群组库与全局库的合并耗时（取5次运行的最短耗时）
+    - 单条消息匹配耗时：旧方式逐条`in`扫描（问题、别名）与`QAIndex.match`
+
+    匹配结果与旧方式逐条比对，不一致时报错退出。
+
+    运行：`python bench/qa_index.py [条目数] [消息数]`（于项目根目录，默认10000、2000）
+"""
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nonebot
+
+nonebot.init(os_data_path=tempfile.mkdtemp(), log_level="WARNING")
+nonebot.load_plugin("src.plugins.os_bot_base")
+nonebot.load_plugin("src.plugins.os_bot_qa")
+
+from src.plugins.os_bot_qa.config import QAIndex, QAMode, QASession, QAUnit
+
+CHARS = [chr(0x4e00 + i) for i in range(300)]
+"""字符集较小以便消息中出现问题"""
+
+
+def random_text(low: int, high: int) -> str:
+    return "".join(random.choices(CHARS, k=random.randint(low, high)))
+
+
+def build(size: int) -> QASession:
+    session = QASession(key="bench")
+    while len(session.QAList) < size:
+        queston = random_text(2, 6)
+        if queston in session.QAList:
+            continue
+        alias = [random_text(2, 6)] if random.random() < 0.2 else []
+        unit = QAUnit(queston=queston,
+                      answers=["答复"],
+                      alias=alias,
+                      mode=random.choice(
+                          (QAMode.KEY, QAMode.LIKE, QAMode.LIKE, QAMode.FULL)),
+                      hit_probability=100)
+        session.QAList[queston] = unit
+    session.touch()
+    return session
+
+
+def linear_match(session: QASession, text: str) -> List[Tuple[str, QAUnit]]:
+    """
+        旧方式：按问题、别名逐条比对
+    """
+    result: List[Tuple[str, QAUnit]] = []
+
+    def use_qa_unit(queston: str, qa_unit: QAUnit) -> bool:
+        if qa_unit.mode == QAMode.KEY:
+            return queston in text
+        if qa_unit.mode == QAMode.FULL:
+            return queston == text
+        if qa_unit.mode == QAMode.LIKE:
+            return queston in text and len(text) <= len(queston) * 25
+        return False
+
+    for queston in session.QAList:
+        qa_unit = session.QAList[queston]
+        if use_qa_unit(queston, qa_unit):
+            result.append((queston, qa_unit))
+    for queston in session._alias_index:
+        for alia_unit in session._alias_index[queston]:
+            if use_qa_unit(queston, alia_unit):
+                result.append((queston, alia_unit))
+    return result
+
+
+def timed(func, *args):
+    start = perf_counter()
+    result = func(*args)
+    return result, perf_counter() - start
+
+
+def best(func, *args, repeat: int = 5):
+    """
+        多次运行取最短耗时，排除垃圾回收等干扰
+    """
+    result, cost = timed(func, *args)
+    for _ in range(repeat - 1):
+        result, once = timed(func, *args)
+        cost = min(cost, once)
+    return result, cost
+
+
+def main(size: int, message_count: int) -> None:
+    random.seed(0)
+    session = build(size)
+    global_session = build(size // 10)
+    print(f"条目数 {size} 全局库 {size // 10} 消息数 {message_count}")
+
+    index, cost = best(lambda: QAIndex(session.index_entries()))
+    print(f"构建 {cost * 1000:.1f}ms")
+
+    next(iter(session.QAList.values())).answers.append("新答复")
+    session.touch()
+    rebuilt, cost = best(
+        lambda: QAIndex(session.index_entries(), index.automaton))
+    print(f"重建(模式串不变，复用自动机) {cost * 1000:.1f}ms "
+          f"复用 {rebuilt.automaton is index.automaton}")
+
+    session.QAList["新问题"] = QAUnit(queston="新问题",
+                                   answers=["答复"],
+                                   mode=QAMode.KEY,
+                                   hit_probability=100)
+    session.touch()
+    index, cost = best(
+        lambda: QAIndex(session.index_entries(), rebuilt.automaton))
+    print(f"重建(新增问题) {cost * 1000:.1f}ms")
+
+    global_index = QAIndex(global_session.index_entries())
+    _, cost = best(QAIndex.merge, index, global_index, None)
+    print(f"合并(群组+全局) {cost * 1000:.1f}ms")
+
+    questons = list(session.QAList)
+    messages: List[str] = []
+    for _ in range(message_count):
+        kind = random.random()
+        if kind < 0.1:
+            messages.append(random.choice(questons))
+        elif kind < 0.5:
+            messages.append(
+                random_text(0, 10) + random.choice(questons) +
+                random_text(0, 10))
+        else:
+            messages.append(random_text(5, 60))
+
+    linear_total = index_total = 0.0
+    hit = 0
+    for text in messages:
+        expect, cost = timed(linear_match, session, text)
+        linear_total += cost
+        result, cost = timed(index.match, text)
+        index_total += cost
+        if result != expect:
+            raise SystemExit(f"匹配结果不一致：{text}")
+        hit += bool(result)
+    print(f"命中消息 {hit}/{message_count}，结果一致")
+    print(f"逐条扫描 {linear_total / message_count * 1e6:.1f}us/条")
+    print(f"索引匹配 {index_total / message_count * 1e6:.1f}us/条")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10000,
+         int(sys.argv[2]) if len(sys.argv) > 2 else 2000)
@@ -0,0 +1,125 @@
+"""
+    # Session保存阻塞事件循环耗时
+
+    对比保存一个大`session`时事件循环被阻塞的时长：
+
+    - 旧方式：事件循环中以缩进格式序列化并同步写入文件
+    - 新方式：`FileStore.save`，事件循环中紧凑序列化（优先`orjson`），写入交由存储线程
+
+    另列出深拷贝快照的耗时作为参考（快照后交由存储线程序列化的方案，快照本身与序列化耗时相当）。
+
+    运行：`python bench/store_save.py [条目数]`（于项目根目录，默认100000）
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+from collections import deque
+from dataclasses import dataclass, field
+from time import perf_counter
+from typing import Any, Dict
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nonebot
+
+nonebot.init(os_data_path=tempfile.mkdtemp())
+nonebot.load_plugin("src.plugins.os_bot_base")
+
+from src.plugins.os_bot_base.config import config
+from src.plugins.os_bot_base.session import (FileStore, Session, StoreEncoder,
+                                             StoreSerializable)
+
+
+@dataclass
+class BenchUnit(StoreSerializable):
+    nick: str = field(default="")
+    count: int = field(default=0)
+    tags: list = field(default_factory=list)
+
+
+class BenchSession(Session):
+    units: Dict[int, BenchUnit]
+
+    def __init__(self, *args, key: str = "bench", **kws):
+        super().__init__(*args, key=key, **kws)
+        self.units = {}
+        self.history = deque(maxlen=1000)
+
+
+def build(size: int) -> BenchSession:
+    session = BenchSession()
+    for i in range(size):
+        session.units[i] = BenchUnit(f"unit-{i}", i, [i, str(i)])
+        session.history.append(i)
+    return session
+
+
+def snapshot(obj: Any) -> Any:
+    if isinstance(obj, StoreSerializable):
+        obj = obj._serializable()
+    if isinstance(obj, dict):
+        return {key: snapshot(val) for key, val in obj.items()}
+    if isinstance(obj, (list, tuple, deque, set)):
+        return [snapshot(val) for val in obj]
+    return obj
+
+
+async def max_loop_lag(coro) -> float:
+    """
+        运行`coro`期间事件循环的最大调度延迟(s)
+    """
+    lag = 0.0
+    running = True
+
+    async def ticker() -> None:
+        nonlocal lag
+        last = perf_counter()
+        while running:
+            await asyncio.sleep(0)
+            now = perf_counter()
+            lag = max(lag, now - last)
+            last = now
+
+    task = asyncio.create_task(ticker())
+    await asyncio.sleep(0)
+    try:
+        await coro
+    finally:
+        running = False
+        await task
+    return lag
+
+
+async def old_save(session: BenchSession, file_path: str) -> None:
+    with open(file_path, mode='w', encoding="utf-8") as fw:
+        fw.write(
+            json.dumps(session._serializable(),
+                       ensure_ascii=False,
+                       sort_keys=True,
+                       indent=2,
+                       cls=StoreEncoder))
+
+
+async def main(size: int) -> None:
+    session = build(size)
+    store = FileStore()
+    file_path = os.path.join(store.base_path, "old.json")
+    print(f"条目数 {size}")
+
+    start = perf_counter()
+    snapshot(session)
+    print(f"参考 深拷贝快照：{(perf_counter() - start) * 1000:.1f}ms")
+
+    lag = await max_loop_lag(old_save(session, file_path))
+    print(f"旧方式 最大阻塞 {lag * 1000:.1f}ms")
+
+    for use_orjson in (True, False):
+        config.os_store_use_orjson = use_orjson
+        lag = await max_loop_lag(store.save(session))
+        print(f"新方式({'orjson' if use_orjson else 'json'}) 最大阻塞 {lag * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(int(sys.argv[1]) if len(sys.argv) > 1 else 100000))
@@ -0,0 +1,142 @@
+"""
+    # 异步令牌桶唤醒与公平性
+
+    1000个协程同时等待同一个`AsyncTokenBucket`，对比：
+
+    - 旧方式：每个等待者以`asyncio.sleep(0.05)`轮询，直到取得令牌
+    - 新方式：等待者FIFO排队，仅在队首所需令牌足够时唤醒
+
+    输出事件循环调度的回调数（唤醒次数）、进程CPU时间、总耗时，
+    以及公平性：获取顺序相对入队顺序的逆序对比例、等待时间的 p50/p99/最大值。
+
+    另以随机权重（1~3个令牌）测试新方式的加权获取。
+
+    运行：`python bench/token_bucket.py [等待者数]`（于项目根目录，默认1000）
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+from time import perf_counter, process_time
+from typing import List, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import nonebot
+
+nonebot.init(os_data_path=tempfile.mkdtemp(), log_level="WARNING")
+nonebot.load_plugin("src.plugins.os_bot_base")
+
+from src.plugins.os_bot_base.util.token_bucket import AsyncTokenBucket, TokenBucket
+
+RATE = 500
+"""每秒发放令牌数"""
+CAPACITY = 50
+"""桶容量"""
+
+
+class PollingTokenBucket(TokenBucket):
+    """
+        旧实现：轮询等待
+    """
+
+    async def wait_consume(self,
+                           token_amount: int = 1,
+                           timeout: float = 0) -> bool:
+        while True:
+            if self.consume(token_amount):
+                return True
+            await asyncio.sleep(0.05)
+
+
+class CountingLoop(asyncio.SelectorEventLoop):
+    """
+        统计调度回调数的事件循环
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.callbacks = 0
+
+    def call_soon(self, *args, **kws):
+        self.callbacks += 1
+        return super().call_soon(*args, **kws)
+
+    def call_at(self, *args, **kws):
+        self.callbacks += 1
+        return super().call_at(*args, **kws)
+
+
+def inversion_ratio(order: List[int]) -> float:
+    """
+        逆序对比例（0为严格FIFO）
+    """
+    inversions = 0
+    sorted_list: List[int] = []
+    for i in reversed(order):
+        low, high = 0, len(sorted_list)
+        while low < high:
+            mid = (low + high) // 2
+            if sorted_list[mid] < i:
+                low = mid + 1
+            else:
+                high = mid
+        inversions += low
+        sorted_list.insert(low, i)
+    pairs = len(order) * (len(order) - 1) // 2
+    return inversions / pairs if pairs else 0
+
+
+async def run(bucket, size: int,
+              weights: List[int]) -> Tuple[List[int], List[float]]:
+    order: List[int] = []
+    waits: List[float] = [0.0] * size
+
+    async def waiter(i: int) -> None:
+        start = perf_counter()
+        await bucket.wait_consume(weights[i], timeout=0)
+        waits[i] = perf_counter() - start
+        order.append(i)
+
+    tasks = []
+    for i in range(size):
+        tasks.append(asyncio.create_task(waiter(i)))
+        # 让每个等待者按编号顺序入队
+        await asyncio.sleep(0)
+    await asyncio.gather(*tasks)
+    return order, waits
+
+
+def bench(name: str, bucket_type, size: int, weights: List[int]) -> None:
+    loop = CountingLoop()
+    asyncio.set_event_loop(loop)
+    try:
+        bucket = bucket_type(RATE, 1, 0, CAPACITY)
+        loop.callbacks = 0
+        cpu = process_time()
+        start = perf_counter()
+        order, waits = loop.run_until_complete(run(bucket, size, weights))
+        total = perf_counter() - start
+        cpu = process_time() - cpu
+    finally:
+        asyncio.set_event_loop(None)
+        loop.close()
+    waits.sort()
+    print(f"{name} 耗时 {total:.2f}s CPU {cpu * 1000:.0f}ms "
+          f"调度回调 {loop.callbacks} 逆序 {inversion_ratio(order):.3f} "
+          f"等待 p50 {waits[len(waits) // 2]:.2f}s "
+          f"p99 {waits[int(len(waits) * 0.99)]:.2f}s 最大 {waits[-1]:.2f}s")
+
+
+def main(size: int) -> None:
+    print(f"等待者 {size} 发放 {RATE}/s 容量 {CAPACITY}")
+    ones = [1] * size
+    bench("旧方式", PollingTokenBucket, size, ones)
+    bench("新方式", AsyncTokenBucket, size, ones)
+    weights = [random.randint(1, 3) for _ in range(size)]
+    bench("新方式(加权)", AsyncTokenBucket, size, weights)
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
@@ -35,6 +35,7 @@ from . import database
 from . import blacklist
 from . import statistics
 from . import failover
+from . import preprocess
 from . import apscheduler
 from . import backup
 from . import request
@@ -51,6 +52,8 @@ from .consts import META_ADMIN_USAGE, META_NO_MANAGE, META_AUTHOR_KEY, META_SESS
 from .database import DatabaseManage
 from .depends import ArgMatchDepend, SessionDepend, AdapterDepend
 from .util import matcher_exception_try, match_suggest, only_command, plug_is_disable, message_to_str
+from .util.async_pool import SharedProcessPool
+from .util.http_session import HttpSessionManage
 
 # 注入模型
 from . import model
@@ -65,16 +68,22 @@ async def _():
     # 初始化缓存
     OnebotCache.get_instance()
     await DatabaseManage.get_instance()._init_()
+    await SessionManage.get_instance().store._init_()
     await plugin_manage_on_startup()
 
 
 @driver.on_shutdown
 async def _():
-    from . import backup
+    await SessionManage.get_instance().flush()
+    logger.logger.info("Session已写入")
+    await OnebotCache.get_instance().save()
+    logger.logger.info("缓存已持久化")
     await DatabaseManage.get_instance()._close_()
     logger.logger.info("数据库链接已关闭")
-    backup.pool._pool.shutdown(wait=True)  # 平滑的关闭进程
-    logger.logger.info("备份进程已停止")
+    SharedProcessPool.shutdown(wait=True)  # 平滑的关闭进程
+    logger.logger.info("共享进程池已停止")
+    await HttpSessionManage.get_instance().close()
+    logger.logger.info("HTTP会话已关闭")
 
 
 from .meta import __plugin_meta__
@@ -1,7 +1,7 @@
 """
     # 定时备份
 
-    通过子进程在特定时刻（当前 4:30）进行数据备份
+    通过共享进程池在特定时刻（当前 4:30）进行数据备份
 
     将备份数据目录中的`session`目录以及`database`目录
 
@@ -12,15 +12,11 @@ from typing import Optional
 from typing_extensions import Self
 import zipfile
 from time import strftime, time
-from concurrent.futures import ProcessPoolExecutor
 from nonebot_plugin_apscheduler import scheduler
 from .config import config
 from .logger import logger
 from .exception import BaseException
-
-from ..os_bot_base.util.async_pool import AsyncPool
-
-pool = AsyncPool(ProcessPoolExecutor(max_workers=1))
+from .util.async_pool import get_process_pool
 
 
 class ZipBackup:
@@ -65,7 +61,7 @@ class ZipBackup:
             self._pool_backup_session()
 
     async def backup(self):
-        return await pool.submit(self._pool_backup)
+        return await get_process_pool().submit(self._pool_backup)
 
     async def clear_backup_file(self):
         """清理指定天数前的备份文件"""
@@ -11,7 +11,7 @@
 """
 import random
 from time import time, localtime, strftime
-from typing import Any, Dict, Union
+from typing import Any, Dict
 from typing_extensions import Self
 from dataclasses import dataclass, field
 from nonebot import on_command, get_bots
@@ -21,11 +21,11 @@ from nonebot.adapters import Bot
 from nonebot.adapters.onebot import v11
 from nonebot.params import EventMessage
 from nonebot.exception import IgnoredException, MockApiException
-from nonebot.message import event_preprocessor
 from .argmatch import ArgMatch, Field
 from .config import config
 from .session import Session, StoreSerializable
 from .logger import logger
+from .context import EventContext
 from .depends import SessionPluginDepend, ArgMatchDepend, OnebotCache, OBCacheDepend, Adapter, AdapterDepend
 from .util import matcher_exception_try, only_command, get_plugin_session
 
@@ -321,77 +321,72 @@ async def _(matcher: Matcher, cache: OnebotCache = OBCacheDepend()):
     await matcher.finish(msg)
 
 
-@event_preprocessor
-async def _(event: Union[v11.PrivateMessageEvent,
-                         v11.FriendRecallNoticeEvent]):
-    if config.os_ob_black_eachother_private:
-        if f"{event.user_id}" in get_bots():
+def black_check(event: v11.Event, context: EventContext,
+                session: BlackSession) -> None:
+    """
+        黑名单检查，由事件预处理管线调用
+
+        按 互相屏蔽、临时/匿名消息、配置封禁、动态封禁 的顺序检查，被拦截时抛出`IgnoredException`
+    """
+    if isinstance(event,
+                  (v11.PrivateMessageEvent, v11.FriendRecallNoticeEvent)):
+        if config.os_ob_black_eachother_private:
+            if f"{event.user_id}" in get_bots():
+                logger.debug(
+                    f"已禁止处理连接到此后端其它bot发送的私聊消息 - {event.user_id} [{event.self_id}]"
+                )
+                raise IgnoredException("")
+        if config.os_ob_black_tmp:
+            if getattr(event, "sub_type", "") in ("group", "other"):
+                logger.debug(f"已禁止处理临时消息 - {event.user_id} [{event.self_id}]")
+                raise IgnoredException("")
+        if context.is_superuser:
+            return
+        if event.user_id in config.os_ob_black_user_list:
             logger.debug(
-                f"已禁止处理连接到此后端其它bot发送的私聊消息 - {event.user_id} [{event.self_id}]")
+                f"已禁止私聊中当前用户{event.user_id}的任何操作(配置)[{event.self_id}]")
             raise IgnoredException("")
-
-
-@event_preprocessor
-async def _(event: Union[v11.GroupMessageEvent, v11.GroupRecallNoticeEvent,
-                         v11.PokeNotifyEvent]):
-    if config.os_ob_black_eachother_group:
-        if f"{event.user_id}" in get_bots():
+        if event.user_id in session.ban_user_list and session.ban_user_list[
+                event.user_id].is_ban():
             logger.debug(
-                f"已禁止处理连接到此后端其它bot发送的群消息 - {event.group_id} - {event.user_id} [{event.self_id}]"
-            )
+                f"已禁止私聊中当前用户{event.user_id}的任何操作(动态)[{event.self_id}]")
             raise IgnoredException("")
+        return
 
-
-@event_preprocessor
-async def _(bot: v11.Bot,
-            event: Union[v11.PrivateMessageEvent, v11.FriendRecallNoticeEvent],
-            session: BlackSession = SessionPluginDepend(BlackSession)):
-    if config.os_ob_black_tmp:
-        if getattr(event, "sub_type", "") in ("group", "other"):
-            logger.debug(f"已禁止处理临时消息 - {event.user_id} [{event.self_id}]")
+    if isinstance(event, (v11.GroupMessageEvent, v11.GroupRecallNoticeEvent,
+                          v11.PokeNotifyEvent)):
+        if config.os_ob_black_eachother_group:
+            if f"{event.user_id}" in get_bots():
+                logger.debug(
+                    f"已禁止处理连接到此后端其它bot发送的群消息 - {event.group_id} - {event.user_id} [{event.self_id}]"
+                )
+                raise IgnoredException("")
+        if config.os_ob_black_anonymous:
+            if getattr(event, "sub_type", "") == "anonymous":
+                logger.debug(
+                    f"已禁止处理匿名消息 - {event.group_id} - {event.user_id} [{event.self_id}]"
+                )
+                raise IgnoredException("")
+        if event.group_id in config.os_ob_black_group_list:
+            logger.debug(f"已禁止群组{event.group_id}的任何操作(配置)[{event.self_id}]")
             raise IgnoredException("")
-    if await SUPERUSER(bot, event):
-        return
-    if event.user_id in config.os_ob_black_user_list:
-        logger.debug(f"已禁止私聊中当前用户{event.user_id}的任何操作(配置)[{event.self_id}]")
-        raise IgnoredException("")
-    if event.user_id in session.ban_user_list and session.ban_user_list[
-            event.user_id].is_ban():
-        logger.debug(f"已禁止私聊中当前用户{event.user_id}的任何操作(动态)[{event.self_id}]")
-        raise IgnoredException("")
-
-
-@event_preprocessor
-async def _(bot: v11.Bot,
-            event: Union[v11.GroupMessageEvent, v11.GroupRecallNoticeEvent,
-                         v11.PokeNotifyEvent],
-            session: BlackSession = SessionPluginDepend(BlackSession)):
-    if config.os_ob_black_anonymous:
-        if getattr(event, "sub_type", "") == "anonymous":
+        if event.group_id in session.ban_group_list and session.ban_group_list[
+                event.group_id].is_ban():
+            logger.debug(f"已禁止群组{event.group_id}的任何操作(动态)[{event.self_id}]")
+            raise IgnoredException("")
+        if context.is_superuser:
+            return
+        if event.user_id in config.os_ob_black_user_list:
             logger.debug(
-                f"已禁止处理匿名消息 - {event.group_id} - {event.user_id} [{event.self_id}]"
+                f"已禁止群组{event.group_id}中当前用户{event.user_id}的任何操作(配置)[{event.self_id}]"
+            )
+            raise IgnoredException("")
+        if event.user_id in session.ban_user_list and session.ban_user_list[
+                event.user_id].is_ban():
+            logger.debug(
+                f"已禁止群组{event.group_id}中当前用户{event.user_id}的任何操作(动态)[{event.self_id}]"
             )
             raise IgnoredException("")
-    if event.group_id in config.os_ob_black_group_list:
-        logger.debug(f"已禁止群组{event.group_id}的任何操作(配置)[{event.self_id}]")
-        raise IgnoredException("")
-    if event.group_id in session.ban_group_list and session.ban_group_list[
-            event.group_id].is_ban():
-        logger.debug(f"已禁止群组{event.group_id}的任何操作(动态)[{event.self_id}]")
-        raise IgnoredException("")
-    if await SUPERUSER(bot, event):
-        return
-    if event.user_id in config.os_ob_black_user_list:
-        logger.debug(
-            f"已禁止群组{event.group_id}中当前用户{event.user_id}的任何操作(配置)[{event.self_id}]"
-        )
-        raise IgnoredException("")
-    if event.user_id in session.ban_user_list and session.ban_user_list[
-            event.user_id].is_ban():
-        logger.debug(
-            f"已禁止群组{event.group_id}中当前用户{event.user_id}的任何操作(动态)[{event.self_id}]"
-        )
-        raise IgnoredException("")
 
 
 @Bot.on_calling_api
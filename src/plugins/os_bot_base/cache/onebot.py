@@ -4,20 +4,19 @@
     缓存必要数据
 """
 import asyncio
-import json
+import heapq
 import os
 import random
 from time import time
 from dataclasses import dataclass, field
 from nonebot import get_driver, on_metaevent, require, on_message
 from nonebot.adapters import Bot as BaseBot
-from nonebot.adapters.onebot.v11 import Bot, GroupMessageEvent, PrivateMessageEvent
-from nonebot.message import event_preprocessor
-from typing import Any, Dict, Optional, Set, Type, TypeVar
+from nonebot.adapters.onebot.v11 import Bot, MessageEvent, GroupMessageEvent, PrivateMessageEvent
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple, Type, TypeVar, Union
 from typing_extensions import Self
 from ..config import config
 from ..logger import logger
-from ..session import StoreSerializable, StoreEncoder
+from ..session import StoreSerializable, store_dumps, store_loads, atomic_write, run_in_store_thread
 from ..exception import InfoCacheException
 
 from nonebot_plugin_apscheduler import scheduler
@@ -29,6 +28,33 @@ def _now_int() -> int:
     return int(time())
 
 
+class MemberCacheStatistics:
+    """
+        群成员缓存统计
+
+        - `hit_count` 命中次数
+        - `miss_count` 未命中次数
+        - `evict_capacity_count` 因超出单群容量淘汰的记录数
+        - `evict_idle_count` 因闲置超时淘汰的记录数
+        - `evict_budget_count` 因超出全局预算淘汰的记录数
+        - `member_count` 最近一次检查时缓存的成员记录总数
+    """
+
+    def __init__(self) -> None:
+        self.hit_count = 0
+        self.miss_count = 0
+        self.evict_capacity_count = 0
+        self.evict_idle_count = 0
+        self.evict_budget_count = 0
+        self.member_count = 0
+
+    def hit_rate(self) -> float:
+        return self.hit_count / ((self.hit_count + self.miss_count) or 1)
+
+
+member_cache_statistics = MemberCacheStatistics()
+
+
 @dataclass(repr=False)
 class BaseRecord(StoreSerializable):
     update_time: int = field(default_factory=_now_int, init=False)
@@ -99,8 +125,7 @@ class UnitRecord(BaseRecord):
         return self.name or f"{self.id}"
 
 
-@dataclass
-class GroupInfoCard(UnitRecord):
+class GroupInfoCard(StoreSerializable):
     """
         群成员信息
 
@@ -120,24 +145,67 @@ class GroupInfoCard(UnitRecord):
         - title_expire_time	int64	专属头衔过期时间戳
         - card_changeable	boolean	是否允许修改群名片
         - shut_up_timestamp	int64	禁言到期时间
-    """
-    card: Optional[str] = field(default=None, init=False)
 
-    title: Optional[str] = field(default=None, init=False)
-    level: Optional[str] = field(default=None, init=False)
-    role: Optional[str] = field(default=None, init=False)
-    area: Optional[str] = field(default=None, init=False)
+        大群成员数量庞大，使用`__slots__`存储以降低内存占用，序列化时忽略值为`None`的字段。
+    """
+    __slots__ = ("id", "name", "remark", "sex", "age", "card", "title",
+                 "level", "role", "area", "join_time", "last_sent_time",
+                 "unfriendly", "card_changeable", "shut_up_timestamp",
+                 "title_expire_time", "update_time", "create_time")
 
-    join_time: Optional[int] = field(default=None, init=False)
-    last_sent_time: Optional[int] = field(default=None, init=False)
-    unfriendly: Optional[bool] = field(default=None, init=False)
-    card_changeable: Optional[bool] = field(default=None, init=False)
-    shut_up_timestamp: Optional[int] = field(default=None, init=False)
-    title_expire_time: Optional[int] = field(default=None, init=False)
+    id: int
+    name: Optional[str]
+    remark: Optional[str]
+    sex: Optional[str]
+    age: Optional[str]
+    card: Optional[str]
+
+    title: Optional[str]
+    level: Optional[str]
+    role: Optional[str]
+    area: Optional[str]
+
+    join_time: Optional[int]
+    last_sent_time: Optional[int]
+    unfriendly: Optional[bool]
+    card_changeable: Optional[bool]
+    shut_up_timestamp: Optional[int]
+    title_expire_time: Optional[int]
+
+    update_time: int
+    create_time: int
+
+    def __init__(self, id: int) -> None:
+        for key in self.__slots__:
+            setattr(self, key, None)
+        self.id = id
+        self.update_time = _now_int()
+        self.create_time = self.update_time
 
     def get_nick(self) -> str:
         return self.card or self.name or f"{self.id}"
 
+    def merge_from_dict(self, merge_dict: Dict[str, Any]):
+        for key in self.__slots__:
+            if key in merge_dict:
+                setattr(self, key, merge_dict[key])
+
+    def _serializable(self) -> Dict[str, Any]:
+        rtn = {}
+        for key in self.__slots__:
+            val = getattr(self, key)
+            if val is not None:
+                rtn[key] = val
+        return rtn
+
+    def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
+        self.merge_from_dict(self_dict)
+        return self
+
+    @classmethod
+    def _load_from_dict(cls, self_dict: Dict[str, Any]) -> Self:
+        return cls(self_dict["id"])._init_from_dict(self_dict)
+
 
 @dataclass
 class GroupRecord(BaseRecord):
@@ -160,14 +228,35 @@ class GroupRecord(BaseRecord):
         return self.remark or self.name or f"{self.id}"
 
     def get_user_record(self, id: int) -> Optional[GroupInfoCard]:
-        if id not in self.users:
+        """
+            获取成员记录，命中时将记录移至最近使用位置
+        """
+        record = self.users.pop(id, None)
+        if not record:
+            member_cache_statistics.miss_count += 1
             return None
-        return self.users[id]
+        member_cache_statistics.hit_count += 1
+        self.users[id] = record
+        return record
 
     def _get_or_create_user_record(self, id: int) -> GroupInfoCard:
-        if id not in self.users:
-            self.users[id] = GroupInfoCard(id)
-        return self.users[id]
+        record = self.get_user_record(id)
+        if not record:
+            record = GroupInfoCard(id)
+            self.users[id] = record
+            self._evict_user_records()
+        return record
+
+    def _evict_user_records(self) -> None:
+        """
+            超出单群容量时淘汰最久未使用的成员记录
+        """
+        max_size = config.os_cache_group_member_max
+        if max_size <= 0:
+            return
+        while len(self.users) > max_size:
+            del self.users[next(iter(self.users))]
+            member_cache_statistics.evict_capacity_count += 1
 
     def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
         """
@@ -175,12 +264,11 @@ class GroupRecord(BaseRecord):
 
             如若需要自定义加载，请覆盖此方法。
         """
-        self.users = {}
-
         self.__dict__.update(self_dict)
-        for key in self.users:
-            record: Dict[str, Any] = self.users[key]  # type: ignore
-            self.users[key] = GroupInfoCard._load_from_dict(record)
+        users: Dict[str, Dict[str, Any]] = self.users or {}  # type: ignore
+        self.users = {}
+        for key in users:
+            self.users[int(key)] = GroupInfoCard._load_from_dict(users[key])
         return self
 
 
@@ -283,6 +371,15 @@ class BotRecord(BaseRecord):
 
         return self
 
+    def _serializable(self) -> Dict[str, Any]:
+        """
+            群列表与好友列表在加载时会被重置，因此不进行持久化
+        """
+        rtn = super()._serializable()
+        rtn.pop("groups", None)
+        rtn.pop("friends", None)
+        return rtn
+
 
 T_Record = TypeVar("T_Record", BotRecord, UnitRecord, GroupRecord, BaseRecord)
 
@@ -301,10 +398,15 @@ class OnebotCache:
         - 全局陌生人信息缓存（仅通过`API`与`Event`钩子更新）
         - 全局群数据缓存（仅通过`API`与`Event`钩子更新）
 
+        持久化数据按分片存储（`bots/{id}`、`groups/{id}`、`units/{id % UNIT_SHARD_COUNT}`），
+        群与陌生人分片在启动后于后台逐个加载（于存储线程中读取），持久化时仅写入发生变更的分片。
+        同步访问仅返回已加载的记录，需要完整数据时先通过`load_group_records`/`load_unit_records`加载。
+
         > 所有的数据节点均包含获取时间戳记录（仍无法保证最新），且可能因延迟导致快速变更。
     """
 
     instance: Optional[Self] = None
+    UNIT_SHARD_COUNT: int = 64
 
     def __init__(self) -> None:
         self.cache_units: Dict[int, UnitRecord] = {}
@@ -313,12 +415,26 @@ class OnebotCache:
 
         self.base_path = os.path.join(config.os_data_path, "cache", "info")
         self.file_base = os.path.join(self.base_path, "onebot")
-
-        if not os.path.isdir(self.base_path):
-            try:
-                os.makedirs(self.base_path)
-            except IOError as e:
-                raise InfoCacheException(f"目录`{self.base_path}`创建失败！", e)
+        """旧版单文件存储的路径前缀"""
+        self.shard_path = os.path.join(self.base_path, "onebot")
+
+        self._group_shards: Set[int] = set()
+        """存在于存储中但尚未加载的群分片"""
+        self._unit_shards: Set[int] = set()
+        """存在于存储中但尚未加载的陌生人分片"""
+        self._changed_groups: Set[int] = set()
+        self._changed_unit_shards: Set[int] = set()
+        self._loading: Dict[Tuple[str, int], "asyncio.Future[None]"] = {}
+        """加载中的分片"""
+        self._preload_task: Optional["asyncio.Task[None]"] = None
+
+        for kind in ("bots", "groups", "units"):
+            path = os.path.join(self.shard_path, kind)
+            if not os.path.isdir(path):
+                try:
+                    os.makedirs(path)
+                except IOError as e:
+                    raise InfoCacheException(f"目录`{path}`创建失败！", e)
 
         # 加载缓存
         self.load()
@@ -329,67 +445,216 @@ class OnebotCache:
             cls.instance = cls()
         return cls.instance
 
-    def backup_file(self, key: str):
-        if not os.path.isfile(f"{self.file_base}_{key}.json"):
+    def backup_file(self, file_path: str):
+        if not os.path.isfile(file_path):
             return
         i = 0
-        while os.path.exists(f"{self.file_base}_{key}.{i}.bak"):
+        while os.path.exists(f"{file_path}.{i}.bak"):
             i += 1
 
         try:
-            os.rename(f"{self.file_base}_{key}.json",
-                      f"{self.file_base}_{key}.{i}.bak")
+            os.rename(file_path, f"{file_path}.{i}.bak")
         except Exception as e:
-            raise InfoCacheException(
-                f"文件`{self.file_base}_{key}.json`备份失败，可能导致数据异常或丢失！", cause=e)
+            raise InfoCacheException(f"文件`{file_path}`备份失败，可能导致数据异常或丢失！",
+                                     cause=e)
 
-    def __save(self, key: str, value: Any) -> None:
-        file_path = f"{self.file_base}_{key}.json"
-        try:
-            json_str = json.dumps(value,
-                                  ensure_ascii=False,
-                                  sort_keys=True,
-                                  indent=2,
-                                  cls=StoreEncoder)
-        except Exception as e:
-            raise InfoCacheException("JSON 序列化异常", cause=e)
-        try:
-            with open(file_path, mode='w', encoding="utf-8") as fw:
-                fw.write(json_str)
-        except Exception as e:
-            logger.opt(exception=True).error(f"数据文件`{file_path}`写入异常。信息：{e}")
+    def __shard_file(self, kind: str, shard: int) -> str:
+        return os.path.join(self.shard_path, kind, f"{shard}.json")
 
-    def __read(self, key: str, Cls: Type[T_Record]) -> Dict[int, T_Record]:
-        file_path = f"{self.file_base}_{key}.json"
+    def __list_shards(self, kind: str) -> Set[int]:
+        shards: Set[int] = set()
+        for item in os.listdir(os.path.join(self.shard_path, kind)):
+            if item.endswith(".json") and item[:-len(".json")].isdigit():
+                shards.add(int(item[:-len(".json")]))
+        return shards
+
+    def __read_file(self, file_path: str) -> Any:
         if not os.path.isfile(file_path):
-            return {}
+            return None
         try:
-            with open(file_path, mode='r', encoding="utf-8") as fr:
-                json_str = fr.read()
-                data = json.loads(json_str)
-                result: Dict[int, T_Record] = {}
-                for index in data:
-                    result[int(index)] = Cls._load_from_dict(data[index])
-                return result
+            with open(file_path, mode='rb') as fr:
+                return store_loads(fr.read())
         except Exception as e:
             now_e = e
             try:
-                self.backup_file(key)
+                self.backup_file(file_path)
             except Exception as e:
                 now_e = e
             logger.opt(
                 exception=True).error(f"数据文件`{file_path}`读取异常。信息：{now_e}")
+            return None
+
+    def __read_records(self, file_path: str,
+                       Cls: Type[T_Record]) -> Dict[int, T_Record]:
+        return self.__parse_records(file_path, self.__read_file(file_path),
+                                    Cls)
+
+    def __parse_records(self, file_path: str, data: Any,
+                        Cls: Type[T_Record]) -> Dict[int, T_Record]:
+        if not data:
             return {}
+        result: Dict[int, T_Record] = {}
+        for index in data:
+            try:
+                result[int(index)] = Cls._load_from_dict(data[index])
+            except Exception as e:
+                logger.warning(f"数据文件`{file_path}`中的记录`{index}`加载失败。信息：{e}")
+        return result
+
+    async def __save(self, file_path: str, value: Any) -> None:
+        try:
+            # 序列化于事件循环中完成，存储线程仅接触序列化后的数据
+            data = store_dumps(value)
+            await run_in_store_thread(atomic_write, file_path, data)
+        except Exception as e:
+            logger.opt(exception=True).error(f"数据文件`{file_path}`写入异常。信息：{e}")
+
+    def __load_legacy(self) -> None:
+        """
+            迁移旧版单文件存储，迁移后的数据将在下次持久化时写入分片
+        """
+        for key, Cls in (("bots", BotRecord), ("groups", GroupRecord),
+                         ("units", UnitRecord)):
+            file_path = f"{self.file_base}_{key}.json"
+            if not os.path.isfile(file_path):
+                continue
+            records = self.__read_records(file_path, Cls)
+            if key == "bots":
+                self.cache_bots.update(records)  # type: ignore
+            elif key == "groups":
+                self.cache_groups.update(records)  # type: ignore
+                self._changed_groups.update(records)
+            else:
+                self.cache_units.update(records)  # type: ignore
+                for id in records:
+                    self.mark_unit_changed(id)
+            try:
+                os.replace(file_path, f"{file_path}.migrated")
+            except Exception as e:
+                logger.warning(f"旧版缓存文件`{file_path}`重命名失败。信息：{e}")
+            logger.info(f"已迁移旧版缓存文件`{file_path}`，共{len(records)}条记录")
+
+    def __apply_group_shard(self, id: int, data: Any) -> None:
+        self._group_shards.discard(id)
+        # 加载期间新建的记录较新，保留
+        if data and id not in self.cache_groups:
+            try:
+                self.cache_groups[id] = GroupRecord._load_from_dict(data)
+            except Exception as e:
+                logger.warning(f"群缓存分片`{id}`加载失败。信息：{e}")
+
+    def __apply_unit_shard(self, shard: int, data: Any) -> None:
+        self._unit_shards.discard(shard)
+        records = self.__parse_records(self.__shard_file("units", shard),
+                                       data, UnitRecord)
+        for id in records:
+            if id not in self.cache_units:
+                self.cache_units[id] = records[id]
+
+    async def __read_shard(self, kind: str, shard: int) -> None:
+        data = await run_in_store_thread(self.__read_file,
+                                         self.__shard_file(kind, shard))
+        if kind == "groups":
+            self.__apply_group_shard(shard, data)
+        else:
+            self.__apply_unit_shard(shard, data)
+
+    async def __load_shard(self, kind: str, shard: int) -> None:
+        """
+            于存储线程中读取分片，同一分片的并发加载共享同一次读取
+        """
+        key = (kind, shard)
+        loading = self._loading.get(key)
+        if not loading:
+            loading = self._loading[key] = asyncio.ensure_future(
+                self.__read_shard(kind, shard))
+            loading.add_done_callback(lambda _: self._loading.pop(key, None))
+        await asyncio.shield(loading)
+
+    async def load_group_records(self, ids: Iterable[int]) -> None:
+        """
+            加载尚未载入的群记录
+        """
+        if not self._group_shards:
+            return
+        for id in [id for id in ids if id in self._group_shards]:
+            await self.__load_shard("groups", id)
+
+    async def load_unit_records(self, ids: Iterable[int]) -> None:
+        """
+            加载尚未载入的陌生人记录所在的分片
+        """
+        if not self._unit_shards:
+            return
+        shards = {id % self.UNIT_SHARD_COUNT for id in ids} & self._unit_shards
+        for shard in shards:
+            await self.__load_shard("units", shard)
+
+    async def preload(self) -> None:
+        """
+            逐个加载全部尚未载入的分片
+        """
+        start_time = time()
+        count = len(self._unit_shards) + len(self._group_shards)
+        for shard in sorted(self._unit_shards):
+            await self.__load_shard("units", shard)
+        for id in list(self._group_shards):
+            await self.__load_shard("groups", id)
+        if count:
+            logger.debug("缓存分片预加载完成 {}个 耗时{:.2f}s", count,
+                         time() - start_time)
+
+    def start_preload(self) -> None:
+        if not self._preload_task:
+            self._preload_task = asyncio.create_task(self.preload())
+
+    def mark_group_changed(self, id: int) -> None:
+        """
+            标记群记录已变更，下次持久化时写入
+        """
+        self._changed_groups.add(id)
 
-    def save(self) -> None:
-        self.__save("bots", self.cache_bots)
-        self.__save("groups", self.cache_groups)
-        self.__save("units", self.cache_units)
+    def mark_unit_changed(self, id: int) -> None:
+        """
+            标记陌生人记录已变更，下次持久化时写入所在分片
+        """
+        self._changed_unit_shards.add(id % self.UNIT_SHARD_COUNT)
+
+    async def save(self) -> None:
+        for id in list(self.cache_bots):
+            await self.__save(self.__shard_file("bots", id),
+                              self.cache_bots[id])
+
+        changed_groups = self._changed_groups
+        self._changed_groups = set()
+        for id in changed_groups:
+            record = self.cache_groups.get(id)
+            if record:
+                await self.__save(self.__shard_file("groups", id), record)
+
+        changed_unit_shards = self._changed_unit_shards
+        self._changed_unit_shards = set()
+        if changed_unit_shards:
+            shards: Dict[int, Dict[int, UnitRecord]] = {
+                shard: {}
+                for shard in changed_unit_shards
+            }
+            for id in list(self.cache_units):
+                shard = id % self.UNIT_SHARD_COUNT
+                if shard in shards:
+                    shards[shard][id] = self.cache_units[id]
+            for shard in shards:
+                await self.__save(self.__shard_file("units", shard),
+                                  shards[shard])
 
     def load(self) -> None:
-        self.cache_bots = self.__read("bots", BotRecord)
-        self.cache_groups = self.__read("groups", GroupRecord)
-        self.cache_units = self.__read("units", UnitRecord)
+        for id in self.__list_shards("bots"):
+            data = self.__read_file(self.__shard_file("bots", id))
+            if data:
+                self.cache_bots[id] = BotRecord._load_from_dict(data)
+        self._group_shards = self.__list_shards("groups")
+        self._unit_shards = self.__list_shards("units")
+        self.__load_legacy()
 
     def get_or_create_bot_record(self, bot: Bot) -> BotRecord:
         self_id: int = int(bot.self_id)
@@ -398,14 +663,20 @@ class OnebotCache:
         return self.cache_bots[self_id]
 
     def get_or_create_group_record(self, id: int) -> GroupRecord:
-        if id not in self.cache_groups:
-            self.cache_groups[id] = GroupRecord(id)
-        return self.cache_groups[id]
+        record = self.get_group_record(id)
+        if not record:
+            record = GroupRecord(id)
+            self.cache_groups[id] = record
+            self.mark_group_changed(id)
+        return record
 
     def get_or_create_unit_record(self, id: int) -> UnitRecord:
-        if id not in self.cache_units:
-            self.cache_units[id] = UnitRecord(id)
-        return self.cache_units[id]
+        record = self.get_unit_record(id)
+        if not record:
+            record = UnitRecord(id)
+            self.cache_units[id] = record
+            self.mark_unit_changed(id)
+        return record
 
     def get_bot_record(self, id: int) -> Optional[BotRecord]:
         if id not in self.cache_bots:
@@ -413,19 +684,71 @@ class OnebotCache:
         return self.cache_bots[id]
 
     def get_group_record(self, id: int) -> Optional[GroupRecord]:
-        if id not in self.cache_groups:
-            return None
-        return self.cache_groups[id]
+        """
+            获取已加载的群记录
+        """
+        return self.cache_groups.get(id)
 
     def get_unit_record(self, id: int) -> Optional[UnitRecord]:
-        if id not in self.cache_units:
-            return None
-        return self.cache_units[id]
+        """
+            获取已加载的陌生人记录
+        """
+        return self.cache_units.get(id)
+
+    def evict_member_records(self) -> None:
+        """
+            淘汰群成员记录
+
+            先移除闲置超过`os_cache_group_member_idle_days`的记录，
+            之后若总数仍超出`os_cache_group_member_budget`则按最后活跃时间淘汰最旧的记录。
+
+            `Bot`群记录与全局群记录可能共享同一成员表，按成员表去重统计。
+        """
+        member_maps: Dict[int, Tuple[int, Dict[int, GroupInfoCard]]] = {}
+        for group in self.cache_groups.values():
+            member_maps[id(group.users)] = (group.id, group.users)
+        for bot_record in self.cache_bots.values():
+            for group in bot_record.groups.values():
+                member_maps.setdefault(id(group.users), (group.id, group.users))
+
+        idle_seconds = config.os_cache_group_member_idle_days * 86400
+        if idle_seconds > 0:
+            expire_time = _now_int() - idle_seconds
+            for group_id, users in member_maps.values():
+                expired = [
+                    user_id for user_id in list(users)
+                    if users[user_id].update_time < expire_time
+                ]
+                for user_id in expired:
+                    del users[user_id]
+                if expired:
+                    member_cache_statistics.evict_idle_count += len(expired)
+                    self.mark_group_changed(group_id)
+
+        total = sum(len(users) for _, users in member_maps.values())
+        budget = config.os_cache_group_member_budget
+        if budget > 0 and total > budget:
+            candidates = heapq.nsmallest(
+                total - budget,
+                ((users[user_id].update_time, group_id, user_id)
+                 for group_id, users in member_maps.values()
+                 for user_id in list(users)))
+            maps_by_group: Dict[int, List[Dict[int, GroupInfoCard]]] = {}
+            for group_id, users in member_maps.values():
+                maps_by_group.setdefault(group_id, []).append(users)
+            for _, group_id, user_id in candidates:
+                for users in maps_by_group[group_id]:
+                    if users.pop(user_id, None):
+                        member_cache_statistics.evict_budget_count += 1
+                self.mark_group_changed(group_id)
+            total = sum(len(users) for _, users in member_maps.values())
+        member_cache_statistics.member_count = total
 
     def get_group_nick(self, id: int) -> str:
-        if id not in self.cache_groups:
+        record = self.get_group_record(id)
+        if not record:
             return f"{id}"
-        return self.cache_groups[id].get_nick()
+        return record.get_nick()
 
     def get_unit_nick(self, id: int, group_id: Optional[int] = None) -> str:
         if group_id:
@@ -436,12 +759,13 @@ class OnebotCache:
                     nick = record.get_nick()
                     if nick != f"{id}":
                         return nick
-        if id not in self.cache_units:
+        record = self.get_unit_record(id)
+        if not record:
             return f"{id}"
-        return self.cache_units[id].get_nick()
+        return record.get_nick()
 
 
-def __merge_unit_info_to_global(unit: UnitRecord):
+def __merge_unit_info_to_global(unit: Union[UnitRecord, GroupInfoCard]):
     """
         合并单元信息至全局
     """
@@ -457,10 +781,20 @@ def __merge_unit_info_to_global(unit: UnitRecord):
         record.sex = unit.sex
     if unit.age:
         record.age = unit.age
+    OnebotCache.get_instance().mark_unit_changed(unit.id)
     # if unit.remark and unit.remark != f"{unit.id}":
     #     record.remark = unit.remark
 
 
+async def __load_group_merge_records(group: GroupRecord):
+    """
+        加载合并组信息所需的全局记录（群记录及成员的陌生人记录）
+    """
+    cache = OnebotCache.get_instance()
+    await cache.load_group_records((group.id, ))
+    await cache.load_unit_records(list(group.users))
+
+
 def __merge_group_info_to_global(group: GroupRecord):
     """
         合并组信息至全局缓存
@@ -487,6 +821,7 @@ def __merge_group_info_to_global(group: GroupRecord):
         record.users = group.users
         for id in record.users:
             __merge_unit_info_to_global(record.users[id])
+    OnebotCache.get_instance().mark_group_changed(group.id)
 
 
 def _conversion_to_card_info(user_card: GroupInfoCard, data: Dict[str, Any]):
@@ -526,6 +861,11 @@ def _conversion_to_card_info(user_card: GroupInfoCard, data: Dict[str, Any]):
     user_card.update_time = _now_int()
 
 
+@driver.on_startup
+async def _():
+    OnebotCache.get_instance().start_preload()
+
+
 @driver.on_bot_connect
 async def _(bot: Bot):
     if not isinstance(bot, Bot):
@@ -589,10 +929,9 @@ async def _(bot: Bot):
         logger.info(f"Bot断开连接 {bot.self_id} - 未处于缓存中")
 
 
-@event_preprocessor
-async def _(bot: Bot):
+def cache_bot_event(bot: BaseBot) -> None:
     """
-        这个钩子函数会在 Event 上报到 NoneBot2 时运行
+        记录`Bot`活跃（由事件预处理管线对每个事件调用）
     """
     if not isinstance(bot, Bot):
         return
@@ -614,8 +953,17 @@ async def _(bot: Bot):
         logger.debug(f"元事件来自未处于缓存中的来源 - {bot.self_id}")
 
 
-@event_preprocessor
-async def _(bot: Bot, event: GroupMessageEvent):
+async def cache_message_event(bot: Bot, event: MessageEvent) -> None:
+    """
+        通过消息事件更新缓存（由事件预处理管线调用）
+    """
+    if isinstance(event, GroupMessageEvent):
+        await _cache_group_message(bot, event)
+    elif isinstance(event, PrivateMessageEvent):
+        await _cache_private_message(bot, event)
+
+
+async def _cache_group_message(bot: Bot, event: GroupMessageEvent) -> None:
     if event.sub_type != "normal":
         logger.debug(
             f"不支持缓存的群消息 {bot.self_id}-{event.sub_type}-{event.user_id}:{event.message_id}"
@@ -633,11 +981,12 @@ async def _(bot: Bot, event: GroupMessageEvent):
         return
     user_record = group_record._get_or_create_user_record(event.user_id)
     _conversion_to_card_info(user_record, event.sender)  # type: ignore
+    await __load_group_merge_records(group_record)
     __merge_group_info_to_global(group_record)
 
 
-@event_preprocessor
-async def _(bot: Bot, event: PrivateMessageEvent):
+async def _cache_private_message(bot: Bot,
+                                 event: PrivateMessageEvent) -> None:
     if not event.sub_type == "friend":
         logger.debug(
             f"不支持缓存的私聊类消息 {bot.self_id}-{event.sub_type}-{event.user_id}:{event.message_id}"
@@ -656,6 +1005,7 @@ async def _(bot: Bot, event: PrivateMessageEvent):
     if "age" in sender:
         friend.age = sender["age"]
     friend.update_time = _now_int()
+    await OnebotCache.get_instance().load_unit_records((friend.id, ))
     __merge_unit_info_to_global(friend)
 
 
@@ -700,6 +1050,8 @@ async def _(bot: BaseBot, exception: Optional[Exception], api: str,
             # 忽视被mock的api
             return
         if api == "get_friend_list":
+            await OnebotCache.get_instance().load_unit_records(
+                int(entity["user_id"]) for entity in result)
             friends: Dict[int, UnitRecord] = {}
             for entity in result:
                 id = int(entity["user_id"])
@@ -711,6 +1063,8 @@ async def _(bot: BaseBot, exception: Optional[Exception], api: str,
             bot_record.friends = friends
 
         if api == "get_group_list":
+            await OnebotCache.get_instance().load_group_records(
+                int(entity["group_id"]) for entity in result)
             groups: Dict[int, GroupRecord] = {}
             for entity in result:
                 id = int(entity["group_id"])
@@ -730,6 +1084,8 @@ async def _(bot: BaseBot, exception: Optional[Exception], api: str,
             bot_record.groups = groups
 
         if api in ("get_stranger_info", "get_group_member_info"):
+            await OnebotCache.get_instance().load_unit_records(
+                (int(result["user_id"]), ))
             unit = OnebotCache.get_instance().get_or_create_unit_record(
                 int(result["user_id"]))
             if "nickname" in result and result["nickname"]:
@@ -737,6 +1093,7 @@ async def _(bot: BaseBot, exception: Optional[Exception], api: str,
             unit.sex = result["sex"]
             unit.age = result["age"]
             unit.update_time = _now_int()
+            OnebotCache.get_instance().mark_unit_changed(unit.id)
 
         if api == "get_group_info":
             bot_group = bot_record.get_or_create_group_record(
@@ -752,6 +1109,7 @@ async def _(bot: BaseBot, exception: Optional[Exception], api: str,
                 bot_group.group_level = result["group_level"]
 
             bot_group.update_time = _now_int()
+            await __load_group_merge_records(bot_group)
             __merge_group_info_to_global(bot_group)
 
         if api == "get_group_member_info":
@@ -761,6 +1119,7 @@ async def _(bot: BaseBot, exception: Optional[Exception], api: str,
             user_record = bot_group._get_or_create_user_record(
                 int(result["user_id"]))
             _conversion_to_card_info(user_record, result)
+            await __load_group_merge_records(bot_group)
             __merge_group_info_to_global(bot_group)
 
         if api == "get_group_member_list":
@@ -770,6 +1129,7 @@ async def _(bot: BaseBot, exception: Optional[Exception], api: str,
                 user_record = bot_group._get_or_create_user_record(
                     int(res_data["user_id"]))
                 _conversion_to_card_info(user_record, data)
+            await __load_group_merge_records(bot_group)
             __merge_group_info_to_global(bot_group)
 
         if api == "get_login_info":
@@ -785,7 +1145,8 @@ async def _(bot: BaseBot, exception: Optional[Exception], api: str,
 
 @scheduler.scheduled_job("interval", minutes=10, name="OB缓存_持久化")
 async def sessions_check_and_recycling():
-    OnebotCache.get_instance().save()
+    OnebotCache.get_instance().evict_member_records()
+    await OnebotCache.get_instance().save()
 
 
 @scheduler.scheduled_job("interval", minutes=60, name="OB缓存_连接信息更新")
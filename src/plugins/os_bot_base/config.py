@@ -18,8 +18,15 @@ class Config(BaseSettings):
         - `os_data_path` 基础数据路径
         - `os_log_file_debug` 保存调试日志到文件
         - `os_database` 数据库地址，默认使用sqlite3，规范为sql数据库规范。
-        - `os_session_save_model` session存储方式 支持：file(本地json)、database(使用db服务)
+        - `os_session_save_model` session存储方式 支持：file(本地json)、database(使用db服务，首次启动时自动迁移本地json)
         - `os_session_timeout` session超时时间（分钟），超过此时间未被调用将自动回收，小于1时视为关闭，默认30。
+        - `os_session_write_behind` session延迟写入，保存时仅标记，由后台任务合并写入，默认启用。
+        - `os_session_flush_interval` session延迟写入间隔（秒），默认10。
+        - `os_store_json_indent` 存储JSON时使用缩进格式（调试用），默认关闭以紧凑格式存储。
+        - `os_store_use_orjson` 已安装`orjson`时使用其进行序列化，默认启用。
+        - `os_cache_group_member_max` 单群最多缓存的成员记录数，超出时淘汰最久未使用的记录，小于1时不限制，默认2000。
+        - `os_cache_group_member_idle_days` 成员记录闲置超过此天数后淘汰，小于1时不限制，默认30。
+        - `os_cache_group_member_budget` 全局成员记录总数上限（内存预算），超出时淘汰最久未活跃的记录，小于1时不限制，默认200000。
         - `os_ob_black_eachother_private` 连接到此后端的bot私聊消息互相屏蔽
         - `os_ob_black_eachother_group` 连接到此后端的bot群消息互相屏蔽
         - `os_ob_black_user_list` onebot协议用户黑名单列表
@@ -37,6 +44,12 @@ class Config(BaseSettings):
         - `os_backup_session_enable` 启用session备份
         - `os_backup_database_enable` 启用database备份
         - `os_no_command_prefix` 无指令前缀支持
+        - `os_process_pool_workers` 共享进程池（压缩备份等CPU密集任务）的进程数，默认1。
+        - `os_process_pool_queue` 共享进程池最大排队任务数，超出时提交方等待，小于1时不限制，默认16。
+        - `os_http_limit` 共享HTTP会话的最大连接数（每个配置档），默认100。
+        - `os_http_limit_per_host` 共享HTTP会话的单主机最大连接数，默认8。
+        - `os_http_dns_ttl` DNS解析结果缓存时间（秒），默认300。
+        - `os_http_keepalive` 空闲连接保持时间（秒），默认30。
     """
     superusers: List[Union[int, str]] = Field(default=[])
 
@@ -46,6 +59,13 @@ class Config(BaseSettings):
     os_database: str = Field(default="")
     os_session_save_model: DriveEnum = DriveEnum.file
     os_session_timeout: int = Field(default=30)
+    os_session_write_behind: bool = Field(default=True)
+    os_session_flush_interval: int = Field(default=10)
+    os_store_json_indent: bool = Field(default=False)
+    os_store_use_orjson: bool = Field(default=True)
+    os_cache_group_member_max: int = Field(default=2000)
+    os_cache_group_member_idle_days: int = Field(default=30)
+    os_cache_group_member_budget: int = Field(default=200000)
     os_ob_black_eachother_private: bool = Field(default=False)
     os_ob_black_eachother_group: bool = Field(default=True)
     os_ob_black_anonymous: bool = Field(default=True)
@@ -67,6 +87,12 @@ class Config(BaseSettings):
     os_backup_session_enable: bool = Field(default=True)
     os_backup_database_enable: bool = Field(default=True)
     os_no_command_prefix: bool = Field(default=False)
+    os_process_pool_workers: int = Field(default=1)
+    os_process_pool_queue: int = Field(default=16)
+    os_http_limit: int = Field(default=100)
+    os_http_limit_per_host: int = Field(default=8)
+    os_http_dns_ttl: int = Field(default=300)
+    os_http_keepalive: float = Field(default=30)
 
     class Config:
         extra = "ignore"
@@ -18,5 +18,8 @@ BASE_PLUGIN_NAME: str = "OSBot核心"
 # state 里占用的键
 STATE_STATISTICE_DEAL: str = "os_bot_statistics_deal"
 
+# event 上附加的属性
+EVENT_CONTEXT_KEY: str = "os_bot_event_context"
+
 # log
 LOGGER_LEVEL_MAP: str = "os_bot_levels"
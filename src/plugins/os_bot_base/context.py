@@ -0,0 +1,85 @@
+"""
+    # 事件上下文
+
+    在事件预处理时计算一次事件的标识、超级管理员判定等常用数据，并附加在事件上供后续处理复用。
+"""
+from dataclasses import dataclass
+from typing import Optional
+from nonebot.adapters import Bot, Event
+from nonebot.permission import SUPERUSER
+from .adapter import AdapterFactory, Adapter
+from .consts import EVENT_CONTEXT_KEY
+from .exception import AdapterException
+
+
+@dataclass(frozen=True)
+class EventContext:
+    """
+        事件上下文（只读）
+
+        - `adapter` 适配器
+        - `bot_type` 驱动类型
+        - `bot_id` 驱动ID
+        - `drive_mark` 驱动标识（`mark_drive`）
+        - `group_mark` 不含驱动的组标识（`mark_group_without_drive`），不支持的事件为空字符串
+        - `is_superuser` 是否为超级管理员
+        - `is_group` 是否来自多人群组（`msg_is_multi_group`）
+        - `scope_id` 组ID（`get_group_id_from_event`），不支持的事件为空字符串
+        - `unit_key` 个体ID（`get_unit_id_from_event`），不支持的事件为空字符串
+        - `group_id` 群号（如果有）
+        - `user_id` 用户ID（如果有）
+    """
+    adapter: Adapter
+    bot_type: str
+    bot_id: str
+    drive_mark: str
+    group_mark: str
+    is_superuser: bool
+    is_group: bool
+    scope_id: str
+    unit_key: str
+    group_id: Optional[int]
+    user_id: Optional[int]
+
+
+def peek_event_context(event: Event) -> Optional[EventContext]:
+    """
+        获取已附加在事件上的上下文，未经预处理的事件返回`None`
+    """
+    return getattr(event, EVENT_CONTEXT_KEY, None)
+
+
+async def get_event_context(bot: Bot, event: Event) -> EventContext:
+    """
+        获取事件上下文，同一事件仅计算一次
+    """
+    context = peek_event_context(event)
+    if context:
+        return context
+    adapter = AdapterFactory.get_adapter(bot)
+    try:
+        group_mark = await adapter.mark_group_without_drive(bot, event)
+    except AdapterException:
+        group_mark = ""
+    try:
+        scope_id = f"{await adapter.get_group_id_from_event(bot, event)}"
+    except AdapterException:
+        scope_id = ""
+    try:
+        unit_key = f"{await adapter.get_unit_id_from_event(bot, event)}"
+    except ValueError:
+        unit_key = ""
+    context = EventContext(adapter=adapter,
+                           bot_type=adapter.get_type(),
+                           bot_id=await adapter.get_bot_id(bot, event),
+                           drive_mark=await adapter.mark_drive(bot, event),
+                           group_mark=group_mark,
+                           is_superuser=await SUPERUSER(bot, event),
+                           is_group=await adapter.msg_is_multi_group(
+                               bot, event),
+                           scope_id=scope_id,
+                           unit_key=unit_key,
+                           group_id=getattr(event, "group_id", None),
+                           user_id=getattr(event, "user_id", None))
+    setattr(event, EVENT_CONTEXT_KEY, context)
+    return context
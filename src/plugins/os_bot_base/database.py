@@ -3,13 +3,14 @@
 
     `tortoise`数据库统一初始化中心
 """
-from typing import Any, Dict, Optional, Set, Type
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Type
 import os
 from typing_extensions import Self
 from tortoise import Tortoise
 from tortoise.models import Model
 from .exception import BaseException
 from .config import config
+from .logger import logger
 
 
 class DatabaseManage:
@@ -21,6 +22,8 @@ class DatabaseManage:
     def __init__(self) -> None:
         self.base_path: str = os.path.join(config.os_data_path, "database")
         self.models: Set[str] = set()
+        self.close_hooks: List[Callable[[], Awaitable[Any]]] = []
+        """关闭连接前执行的钩子（用于写入缓冲中的数据）"""
         self.db_url: str = f"sqlite://{os.path.join(self.base_path, 'data.sqlite3')}"
         if config.os_database:
             self.db_url = config.os_database
@@ -56,7 +59,18 @@ class DatabaseManage:
         await Tortoise.init(**self.__kws)
         await Tortoise.generate_schemas(safe=True)
 
+    def add_close_hook(self, hook: Callable[[], Awaitable[Any]]) -> None:
+        """
+            添加关闭连接前执行的钩子
+        """
+        self.close_hooks.append(hook)
+
     async def _close_(self) -> None:
+        for hook in self.close_hooks:
+            try:
+                await hook()
+            except Exception:
+                logger.opt(exception=True).error("数据库关闭钩子执行失败")
         await Tortoise.close_connections()
 
     @classmethod
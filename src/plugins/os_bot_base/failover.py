@@ -17,20 +17,21 @@ from typing_extensions import Self
 from dataclasses import dataclass, field
 from nonebot import on_command, get_bots, Bot
 from nonebot.permission import SUPERUSER
-from nonebot.typing import T_State
 from nonebot.matcher import Matcher
 from nonebot.adapters.onebot import v11
 from nonebot.adapters.onebot.v11.permission import GROUP_ADMIN, GROUP_OWNER
-from nonebot.message import event_preprocessor
 from nonebot.exception import IgnoredException
 from nonebot.rule import to_me
 from .argmatch import ArgMatch, Field
 from .logger import logger
 from .depends import SessionPluginDepend, AdapterDepend, Adapter
 from .session import Session, StoreSerializable
-from .adapter import AdapterFactory, V11Adapter
+from .adapter import V11Adapter
+from .context import EventContext
 from .util import matcher_exception_try, only_command
 
+_to_me = to_me()
+
 
 @dataclass
 class PriorityUnit(StoreSerializable):
@@ -79,19 +80,18 @@ class LoadBalancingSession(Session):
 
         return self
 
-    async def is_priority(self, bot: Bot,
-                          event: v11.Event) -> bool:
+    async def is_priority(self, bot: Bot, event: v11.Event,
+                          context: EventContext) -> bool:
         """
             判断指定`bot`及`event`所对应的群聊是否是属于优先响应对象
         """
         session: LoadBalancingSession = self
-        adapter = AdapterFactory.get_adapter(bot)
-        drive_mask = await adapter.mark_drive(bot, event)
-        bot_type = adapter.get_type()
-        bot_id = await adapter.get_bot_id(bot, event)
-        group_mask = await adapter.mark_group_without_drive(bot, event)
+        drive_mask = context.drive_mark
+        bot_type = context.bot_type
+        bot_id = context.bot_id
+        group_mask = context.group_mark
         priority = session.priority_map.get(group_mask)
-        if await to_me()(bot, event, {}):
+        if await _to_me(bot, event, {}):
             """
                 指定对象的事件不处理
             """
@@ -129,23 +129,22 @@ class LoadBalancingSession(Session):
         return True
 
 
-@event_preprocessor
-async def _(
-    bot: Bot,
-    event: v11.Event,
-    state: T_State,
-    adapter: Adapter = AdapterDepend(),
-    session: LoadBalancingSession = SessionPluginDepend(LoadBalancingSession)):
-    if not isinstance(event, v11.GroupMessageEvent) and not isinstance(event, v11.NoticeEvent):
+async def failover_check(bot: Bot, event: v11.Event, context: EventContext,
+                         session: LoadBalancingSession) -> None:
+    """
+        故障转移检查，由事件预处理管线调用
+
+        非优先响应对象时抛出`IgnoredException`
+    """
+    if not isinstance(event, v11.GroupMessageEvent) and not isinstance(
+            event, v11.NoticeEvent):
         """仅处理通知及群消息事件的优先响应"""
         return
     try:
-        adapter = AdapterFactory.get_adapter(bot)
-        drive_mask = await adapter.mark_drive(bot, event)
-        group_mask = await adapter.mark_group_without_drive(bot, event)
-        if not await session.is_priority(bot, event):
+        if not await session.is_priority(bot, event, context):
             raise IgnoredException(
-                f"因故障转移自动设置 {drive_mask}-{group_mask} 的响应被禁止了")
+                f"因故障转移自动设置 {context.drive_mark}-{context.group_mark} 的响应被禁止了"
+            )
     except IgnoredException as e:
         logger.debug(e.reason)
         raise e
@@ -11,10 +11,11 @@
     - 禁用权限 权限名
     - 权限操作 [驱动] 组标识 组ID 对象ID 权限名 [授权时间]
 """
+import heapq
 import math
 import random
 from time import time, localtime, strftime
-from typing import Any, Dict, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 from typing_extensions import Self
 from dataclasses import dataclass, field
 from nonebot import on_command
@@ -31,6 +32,7 @@ from .argmatch import ArgMatch, Field, PageArgMatch
 from .session import Session, StoreSerializable
 from .logger import logger
 from .depends import ArgMatchDepend, Adapter, AdapterDepend, AdapterFactory
+from .context import peek_event_context
 from .util import matcher_exception_try, get_plugin_session, seconds_to_dhms
 from .exception import PermissionError
 
@@ -126,6 +128,102 @@ class PermissionSession(Session):
         return self
 
 
+class PermIndex:
+    """
+        权限索引
+
+        以`(权限名, 组标识, 对象标识)`为键索引授权数据（非群成员权限的对象标识为空字符串）。
+
+        授权过期由时间轮处理，检查时无需逐个比较过期时间。
+    """
+
+    def __init__(self) -> None:
+        self.units: Dict[Tuple[str, str, str], PermUnit] = {}
+        self.group_keys: Dict[str, Set[Tuple[str, str, str]]] = {}
+        """组标识->该组的索引键"""
+        self.wheel: Dict[int, Set[Tuple[str, str, str]]] = {}
+        """过期时间（秒）->到期的索引键"""
+        self.wheel_ticks: List[int] = []
+        self.built: bool = False
+
+        self.hit_count: int = 0
+        self.miss_count: int = 0
+        self.build_count: int = 0
+
+    def hit_rate(self) -> float:
+        return self.hit_count / ((self.hit_count + self.miss_count) or 1)
+
+    def clear(self) -> None:
+        """
+            清空索引，下次检查时重建
+        """
+        self.units = {}
+        self.group_keys = {}
+        self.wheel = {}
+        self.wheel_ticks = []
+        self.built = False
+
+    def build(self, session: PermissionSession) -> None:
+        self.clear()
+        for mark_group, perms in session.premissions.items():
+            for name, unit in perms.items():
+                self.put((name, mark_group, ""), unit)
+        for mark_group, mark_units in session.premissions_group_member.items():
+            for mark_unit, perms in mark_units.items():
+                for name, unit in perms.items():
+                    self.put((name, mark_group, mark_unit), unit)
+        self.built = True
+        self.build_count += 1
+
+    def put(self, key: Tuple[str, str, str], unit: PermUnit) -> None:
+        self.remove(key)
+        if not unit.is_valid():
+            return
+        self.units[key] = unit
+        self.group_keys.setdefault(key[1], set()).add(key)
+        if unit.expire_time > 0:
+            tick = int(unit.expire_time)
+            if tick not in self.wheel:
+                self.wheel[tick] = set()
+                heapq.heappush(self.wheel_ticks, tick)
+            self.wheel[tick].add(key)
+
+    def remove(self, key: Tuple[str, str, str]) -> None:
+        if self.units.pop(key, None) is None:
+            return
+        keys = self.group_keys.get(key[1])
+        if keys:
+            keys.discard(key)
+            if not keys:
+                del self.group_keys[key[1]]
+
+    def remove_group(self, mark_group: str) -> None:
+        for key in list(self.group_keys.get(mark_group, ())):
+            self.remove(key)
+
+    def advance(self) -> None:
+        """
+            推进时间轮，移除已过期的授权
+        """
+        now = int(time())
+        while self.wheel_ticks and self.wheel_ticks[0] <= now:
+            tick = heapq.heappop(self.wheel_ticks)
+            for key in self.wheel.pop(tick, ()):
+                unit = self.units.get(key)
+                if unit and unit.expire_time > 0 and int(
+                        unit.expire_time) <= now:
+                    self.remove(key)
+
+    def get(self, key: Tuple[str, str, str]) -> Optional[PermUnit]:
+        self.advance()
+        unit = self.units.get(key)
+        if unit:
+            self.hit_count += 1
+        else:
+            self.miss_count += 1
+        return unit
+
+
 @dataclass
 class PermMeta:
     """
@@ -154,6 +252,15 @@ class PermManage:
         注意，在使用权限管理前需要注册权限，该过程建议在启动完成前完成。
     """
     PERMISSIONS: Dict[str, PermMeta] = {}
+    INDEX: PermIndex = PermIndex()
+
+    @classmethod
+    async def get_index(cls) -> PermIndex:
+        if not cls.INDEX.built:
+            session: PermissionSession = await get_plugin_session(
+                PermissionSession)
+            cls.INDEX.build(session)
+        return cls.INDEX
 
     @classmethod
     def register(cls,
@@ -191,19 +298,14 @@ class PermManage:
             raise PermissionError(f"权限`{name}`未注册")
         meta = cls.PERMISSIONS[name]
 
-        session: PermissionSession = await get_plugin_session(PermissionSession
-                                                              )
+        index = await cls.get_index()
 
         mark_group = f"{adapter_type}-{'G' if is_group else 'P'}-{group_id}"
-        mark_unit = unit_id
+        mark_unit = unit_id if meta.for_group_member else ""
 
-        if meta.for_group_member:
-            unit = session.premissions_group_member.get(mark_group, {}).get(
-                mark_unit, {}).get(name, None)
-        else:
-            unit = session.premissions.get(mark_group, {}).get(name, None)
+        unit = index.get((name, mark_group, mark_unit))
 
-        if not unit or not unit.is_valid():
+        if not unit:
             return meta.auth
 
         return unit.is_auth()
@@ -225,12 +327,19 @@ class PermManage:
             raise PermissionError(f"权限`{name}`未注册")
         meta = cls.PERMISSIONS[name]
 
+        context = peek_event_context(event)
+        if context and context.scope_id:
+            # 复用预处理时计算的事件上下文
+            if not ignore_super and not meta.ignore_super and context.is_superuser:
+                return True
+            return await cls.check_permission_from_mark(
+                name, context.bot_type, context.scope_id, context.unit_key,
+                context.is_group)
+
         if not ignore_super and not meta.ignore_super and await SUPERUSER(
                 bot, event):
             return True
 
-        session: PermissionSession = await get_plugin_session(PermissionSession
-                                                              )
         adapter = AdapterFactory.get_adapter(bot)
         is_group = await adapter.msg_is_multi_group(bot, event)
         group_id = f"{await adapter.get_group_id_from_event(bot, event)}"
@@ -299,6 +408,11 @@ class PermManage:
                     session.premissions[mark_group] = {}
                 session.premissions[mark_group][name] = unit
 
+        if cls.INDEX.built:
+            cls.INDEX.put(
+                (name, mark_group,
+                 mark_unit if meta.for_group_member else ""), unit)
+
         return unit
 
     @classmethod
@@ -312,6 +426,7 @@ class PermManage:
                 del session.premissions_group_member[mark_group]
             if mark_group in session.premissions:
                 del session.premissions[mark_group]
+        cls.INDEX.remove_group(mark_group)
 
     @classmethod
     async def reset_perm_all(cls, name: str):
@@ -330,6 +445,7 @@ class PermManage:
             for mark_groups in session.premissions.values():
                 if name in mark_groups:
                     del mark_groups[name]
+        cls.INDEX.clear()
 
     @classmethod
     async def is_register(cls, name: str) -> bool:
@@ -8,7 +8,7 @@
 import math
 import random
 import textwrap
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 from functools import partial
 from nonebot.rule import CommandRule
 from nonebot.consts import PREFIX_KEY, CMD_START_KEY
@@ -19,8 +19,6 @@ from nonebot.matcher import Matcher
 from nonebot.permission import SUPERUSER
 from nonebot import get_driver, get_loaded_plugins, on_command
 from nonebot.params import CommandArg, T_State, EventMessage
-from cacheout import LRUCache
-from cacheout.memoization import lru_memoize
 from tortoise.expressions import Q
 
 from .util.rule import only_command
@@ -30,6 +28,7 @@ from .consts import META_NO_MANAGE, META_ADMIN_USAGE, META_AUTHOR_KEY, META_DEFA
 from .depends import AdapterDepend, ArgMatchDepend
 from .exception import MatcherErrorFinsh
 from .adapter import AdapterFactory, Adapter
+from .context import peek_event_context
 from .argmatch import ArgMatch, Field, PageArgMatch
 from .logger import logger
 from .config import config
@@ -103,34 +102,98 @@ async def plugin_manage_on_startup():
             cache_plugin_keys.append(plugModel.name)
 
             await plugModel.save()
+        await plug_switch_table.load()
     except Exception as e:
         logger.opt(exception=True).debug(f"执行插件管理-插件开关启动初始化时异常")
         raise e
 
 
-@lru_memoize(maxsize=128)
-async def _get_plug_model(name: str):
-    return await PluginModel.get_or_none(name=name)
-
+class PluginSwitchTable:
+    """
+        插件开关表
 
-@lru_memoize(maxsize=1024)
-async def _get_plug_switch_model(name: str, group_mark: str):
-    return await PluginSwitchModel.get_or_none(**{
-        "name": name,
-        "group_mark": group_mark
-    })
+        启动时将`os_plugin`及`os_plugin_switch`全量载入内存，此后的检查不再访问数据库。
 
+        开关变更时先写入数据库再同步更新本表（写穿），仅更新受影响的条目。
 
-def plug_model_cache_clear():
+        组设置以`(插件名, 组标识)`为键，不存在的键即为“未设置组开关”，无需再次查询。
     """
-        清除插件管理的模型缓存
 
-        此插件已通过内存lrc_cache进行了简单缓存，故出现状态变更后需要刷新缓存。
-    """
-    cache: LRUCache = _get_plug_model.cache
-    cache.clear()
-    cache: LRUCache = _get_plug_switch_model.cache
-    cache.clear()
+    def __init__(self) -> None:
+        self.plugins: Dict[str, PluginModel] = {}
+        self.switchs: Dict[Tuple[str, str], bool] = {}
+        self.group_keys: Dict[str, Set[str]] = {}
+        """组标识->设置过开关的插件名"""
+        self.loaded: bool = False
+
+    async def load(self) -> None:
+        """
+            从数据库全量载入
+        """
+        plugins: Dict[str, PluginModel] = {}
+        switchs: Dict[Tuple[str, str], bool] = {}
+        group_keys: Dict[str, Set[str]] = {}
+        for plugModel in await PluginModel.all():
+            plugins[plugModel.name] = plugModel
+        for switchModel in await PluginSwitchModel.all():
+            switchs[(switchModel.name,
+                     switchModel.group_mark)] = bool(switchModel.switch)
+            group_keys.setdefault(switchModel.group_mark,
+                                  set()).add(switchModel.name)
+        self.plugins = plugins
+        self.switchs = switchs
+        self.group_keys = group_keys
+        self.loaded = True
+        logger.debug(f"插件开关表已载入 插件 {len(plugins)} 项 组设置 {len(switchs)} 项")
+
+    async def ensure_loaded(self) -> None:
+        if not self.loaded:
+            await self.load()
+
+    def get_plugin(self, name: str) -> Optional[PluginModel]:
+        return self.plugins.get(name)
+
+    def get_switch(self, name: str, group_mark: str) -> Optional[bool]:
+        """
+            获取组设置，未设置时返回`None`
+        """
+        return self.switchs.get((name, group_mark))
+
+    def put_plugin(self, plugModel: PluginModel) -> None:
+        self.plugins[plugModel.name] = plugModel
+
+    def put_switch(self, name: str, group_mark: str, switch: Optional[bool]) -> None:
+        self.switchs[(name, group_mark)] = bool(switch)
+        self.group_keys.setdefault(group_mark, set()).add(name)
+
+    def remove_switch(self, name: str, group_mark: str) -> None:
+        self.switchs.pop((name, group_mark), None)
+        names = self.group_keys.get(group_mark)
+        if names is not None:
+            names.discard(name)
+            if not names:
+                del self.group_keys[group_mark]
+
+    def remove_group(self, group_mark: str) -> None:
+        for name in self.group_keys.pop(group_mark, set()):
+            self.switchs.pop((name, group_mark), None)
+
+    def is_disable(self, name: str, group_mark: str) -> bool:
+        """
+            检查插件在指定组是否被禁用，未记录的插件视为未禁用
+        """
+        plugModel = self.plugins.get(name)
+        if not plugModel:
+            return False
+        if not plugModel.load or not plugModel.switch:
+            return True
+        switch = self.switchs.get((name, group_mark))
+        if switch is not None:
+            return not switch
+        return not plugModel.default_switch
+
+
+plug_switch_table = PluginSwitchTable()
 
 
 @run_preprocessor
@@ -167,7 +230,8 @@ async def _(bot: Bot, event: Event, matcher: Matcher, state: T_State):
         return
     try:
         adapter = AdapterFactory.get_adapter(bot)
-        plugModel = await _get_plug_model(plugin.name)
+        await plug_switch_table.ensure_loaded()
+        plugModel = plug_switch_table.get_plugin(plugin.name)
         if not plugModel:
             logger.debug(f"开关预处理 `{bot.self_id}` `{plugin.name}` 插件缺失主记录")
             return
@@ -175,20 +239,24 @@ async def _(bot: Bot, event: Event, matcher: Matcher, state: T_State):
             logger.warning(
                 f"开关预处理 `{bot.self_id}` `{plugin.name}` 插件缺失未加载，但仍然在处理消息。")
             raise IgnoredException(f"插件管理器已限制`{plugin.name}`(插件主记录)!")
-        group_mark = await adapter.mark_group_without_drive(bot, event)
-        plugSwitchModel = await _get_plug_switch_model(plugin.name, group_mark)
-        if plugModel and not plugModel.switch:
+        context = peek_event_context(event)
+        if context and context.group_mark:
+            group_mark = context.group_mark
+        else:
+            group_mark = await adapter.mark_group_without_drive(bot, event)
+        switch = plug_switch_table.get_switch(plugin.name, group_mark)
+        if not plugModel.switch:
             raise IgnoredException(f"插件管理器已禁用`{plugin.name}`(插件全局)!")
 
-        if plugSwitchModel:
-            if plugSwitchModel.switch:
+        if switch is not None:
+            if switch:
                 logger.debug(
                     f"插件管理器已放行`{plugin.name}`(组设置)! group={group_mark}")
                 return
             else:
                 raise IgnoredException(
                     f"插件管理器已限制`{plugin.name}`(组设置)! group={group_mark}")
-        if plugModel and not plugModel.default_switch:
+        if not plugModel.default_switch:
             raise IgnoredException(
                 f"插件管理器已限制`{plugin.name}`(插件默认值)! group={group_mark}")
 
@@ -293,7 +361,8 @@ async def _(matcher: Matcher,
             f"`{group_nick}`的`{pluginModel.display_name}`的状态没有变化哦")
     switchModel.switch = arg.switch
     await switchModel.save()
-    plug_model_cache_clear()
+    plug_switch_table.put_switch(switchModel.name, switchModel.group_mark,
+                                switchModel.switch)
     if not switchModel.switch:
         await matcher.finish(
             f"已经关掉`{group_nick}`的`{pluginModel.display_name}`了~")
@@ -316,7 +385,7 @@ async def _(matcher: Matcher, bot: Bot,
         await matcher.finish(f"{pluginModel.display_name}关得不能再关啦")
     pluginModel.switch = False
     await pluginModel.save()
-    plug_model_cache_clear()
+    plug_switch_table.put_plugin(pluginModel)
     await matcher.finish(f"{pluginModel.display_name} >完全禁止<")
 
 
@@ -335,7 +404,7 @@ async def _(matcher: Matcher, bot: Bot,
         await matcher.finish(f"{pluginModel.display_name}开过啦")
     pluginModel.switch = True
     await pluginModel.save()
-    plug_model_cache_clear()
+    plug_switch_table.put_plugin(pluginModel)
     await matcher.finish(f"{pluginModel.display_name} >已开启<")
 
 
@@ -354,7 +423,7 @@ async def _(matcher: Matcher, bot: Bot,
         await matcher.finish(f"{pluginModel.display_name}默认就是关闭的哦！")
     pluginModel.default_switch = False
     await pluginModel.save()
-    plug_model_cache_clear()
+    plug_switch_table.put_plugin(pluginModel)
     await matcher.finish(f"{pluginModel.display_name} >默认禁止<")
 
 
@@ -372,7 +441,7 @@ async def _(matcher: Matcher, bot: Bot,
         await matcher.finish(f"{pluginModel.display_name}默认就是打开的哦！")
     pluginModel.default_switch = True
     await pluginModel.save()
-    plug_model_cache_clear()
+    plug_switch_table.put_plugin(pluginModel)
     await matcher.finish(f"{pluginModel.display_name} >默认启用<")
 
 
@@ -398,7 +467,8 @@ async def _(matcher: Matcher,
         await matcher.finish(f"{pluginModel.display_name}不能再关了…")
     switchModel.switch = False
     await switchModel.save()
-    plug_model_cache_clear()
+    plug_switch_table.put_switch(switchModel.name, switchModel.group_mark,
+                                switchModel.switch)
     await matcher.finish(f"{pluginModel.display_name} >关闭<")
 
 
@@ -426,7 +496,8 @@ async def _(matcher: Matcher,
         await matcher.finish(f"{pluginModel.display_name}已经开了哦")
     switchModel.switch = True
     await switchModel.save()
-    plug_model_cache_clear()
+    plug_switch_table.put_switch(switchModel.name, switchModel.group_mark,
+                                switchModel.switch)
     await matcher.finish(f"{pluginModel.display_name} >启动<")
 
 
@@ -493,7 +564,8 @@ async def _(matcher: Matcher,
         switchs.append(switchModel)
 
     await PluginSwitchModel.bulk_create(switchs)
-    plug_model_cache_clear()
+    for key in plug_settings:
+        plug_switch_table.put_switch(key, mark, plug_settings[key])
 
     await matcher.finish("已完成~" +
                          (f"\n启用：{'、'.join(enable)}" if enable else "") +
@@ -554,7 +626,7 @@ async def _(matcher: Matcher,
     if msg == "确认重置":
         mark = await adapter.mark_group_without_drive(bot, event)
         await PluginSwitchModel.filter(**{"group_mark": mark}).delete()
-        plug_model_cache_clear()
+        plug_switch_table.remove_group(mark)
         await matcher.finish("已重置当前群或私聊的所有插件状态")
     finish_msgs = ["未确认操作", "操作已取消"]
     await matcher.finish(finish_msgs[random.randint(0, len(finish_msgs) - 1)])
@@ -577,7 +649,7 @@ async def _(matcher: Matcher,
     if not switchModel:
         await matcher.finish("并没有设置过插件开关")
     await switchModel.delete()
-    plug_model_cache_clear()
+    plug_switch_table.remove_switch(pluginModel.name, mark)
     await matcher.finish("已重置")
 
 
@@ -617,15 +689,11 @@ async def _(matcher: Matcher,
     try:
         adapter = AdapterFactory.get_adapter(bot)
         group_mark = await adapter.mark_group_without_drive(bot, event)
-        plugSwitchModel = await PluginSwitchModel.get_or_none(
-            **{
-                "name": pluginModel.name,
-                "group_mark": group_mark
-            })
+        switch = plug_switch_table.get_switch(pluginModel.name, group_mark)
         status_msgs = ["绝赞运转中>>", "running...", "诸事顺利", "万事大吉"]
         status = status_msgs[random.randint(0, len(status_msgs) - 1)]
-        if plugSwitchModel:
-            if plugSwitchModel.switch is False:
+        if switch is not None:
+            if switch is False:
                 status = "关掉了呢，关掉了。"
             else:
                 if not pluginModel.default_switch:
@@ -733,15 +801,10 @@ async def _(matcher: Matcher,
     try:
         adapter = AdapterFactory.get_adapter(bot)
         group_mark = await adapter.mark_group_without_drive(bot, event)
-        plugSwitchModel = await PluginSwitchModel.get_or_none(
-            **{
-                "name": pluginModel.name,
-                "group_mark": group_mark
-            })
+        switch = plug_switch_table.get_switch(pluginModel.name, group_mark)
         status = "绝赞运转中>>"
-        if plugSwitchModel:
-            if plugSwitchModel.switch is False:
-                status = "关掉了呢，关掉了。"
+        if switch is False:
+            status = "关掉了呢，关掉了。"
         if pluginModel.switch is False:
             status = "啊……完全关掉了。"
     except Exception as e:
@@ -0,0 +1,49 @@
+"""
+    # 事件预处理管线
+
+    合并基础插件的事件预处理，每个事件仅计算一次上下文（`EventContext`）。
+
+    按固定顺序执行，任一检查拦截时立即结束：
+
+    1. 统计（全部事件）
+    2. 缓存更新（`Bot`活跃记录、消息事件的群成员/好友记录），先于拦截检查执行，被屏蔽的消息同样更新缓存，异常不影响后续检查
+    3. 黑名单（互相屏蔽、临时/匿名消息、配置封禁、动态封禁）
+    4. 故障转移（优先响应）
+
+    上下文附加在事件上，`plugin_manage`的开关检查与`PermManage.check_permission`直接复用。
+"""
+from nonebot.adapters import Bot, Event
+from nonebot.adapters.onebot import v11
+from nonebot.message import event_preprocessor
+from .context import get_event_context
+from .statistics import statistics_event
+from .cache.onebot import cache_bot_event, cache_message_event
+from .blacklist import BlackSession, black_check
+from .failover import LoadBalancingSession, failover_check
+from .util import get_plugin_session
+from .logger import logger
+
+
+@event_preprocessor
+async def preprocess_event(bot: Bot, event: Event):
+    statistics_event(event)
+
+    if not isinstance(bot, v11.Bot):
+        return
+    cache_bot_event(bot)
+    if not isinstance(event, (v11.MessageEvent, v11.NoticeEvent)):
+        return
+    context = await get_event_context(bot, event)
+    if isinstance(event, v11.MessageEvent):
+        try:
+            await cache_message_event(bot, event)
+        except Exception:
+            logger.opt(exception=True).error("消息事件缓存更新异常")
+
+    black_session: BlackSession = await get_plugin_session(BlackSession)
+    black_check(event, context, black_session)
+
+    if isinstance(event, (v11.GroupMessageEvent, v11.NoticeEvent)):
+        balance_session: LoadBalancingSession = await get_plugin_session(
+            LoadBalancingSession)
+        await failover_check(bot, event, context, balance_session)
@@ -8,24 +8,40 @@
     同时支持从驱动粒度到组再到指定对象的作用域粒度。
 """
 
+import asyncio
 from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 import json
 import os
 from time import time
-from typing import Any, Dict, List, Optional, Tuple, Type
+from typing import Any, Dict, List, Optional, Tuple, Type, Union
 from typing_extensions import Self
-from tortoise.exceptions import DoesNotExist
+from tortoise.transactions import in_transaction
 from nonebot_plugin_apscheduler import scheduler
 from .config import config
 from .exception import StoreException
 from .model.session import SessionModel
 from .logger import logger
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+store_executor = ThreadPoolExecutor(max_workers=1,
+                                    thread_name_prefix="os_store")
+"""
+    存储线程
+
+    文件读写均在此线程中进行，单线程保证同一文件的写入顺序；序列化于事件循环中完成，避免与数据修改并发
+"""
+
 
 class StoreSerializable:
     """
         此类型用于支持Session自定义对象的Json的序列化与反序列化
     """
+    __slots__ = ()
 
     def _serializable(self) -> Dict[str, Any]:
         """
@@ -87,6 +103,75 @@ class StoreEncoder(json.JSONEncoder):
             return super(StoreEncoder, self).default(obj)
 
 
+def _orjson_default(obj):
+    if isinstance(obj, StoreSerializable):
+        return obj._serializable()
+    if isinstance(obj, (deque, set)):
+        return list(obj)
+    raise TypeError
+
+
+def store_dumps(obj: Any) -> bytes:
+    """
+        序列化存储数据为`UTF-8`编码的JSON
+
+        默认输出紧凑格式，`os_store_json_indent`开启时输出缩进格式（便于调试）。
+
+        安装了`orjson`且未开启缩进时优先使用`orjson`。
+    """
+    if orjson and config.os_store_use_orjson and not config.os_store_json_indent:
+        try:
+            return orjson.dumps(obj,
+                                default=_orjson_default,
+                                option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            # 超出`orjson`支持范围的数据（如大整数）回退至标准库
+            pass
+    if config.os_store_json_indent:
+        json_str = json.dumps(obj,
+                              ensure_ascii=False,
+                              sort_keys=True,
+                              indent=2,
+                              cls=StoreEncoder)
+    else:
+        json_str = json.dumps(obj,
+                              ensure_ascii=False,
+                              separators=(",", ":"),
+                              cls=StoreEncoder)
+    return json_str.encode("utf-8")
+
+
+def store_loads(data: bytes) -> Any:
+    """
+        反序列化`store_dumps`生成的数据
+    """
+    if orjson and config.os_store_use_orjson:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def atomic_write(file_path: str, data: bytes) -> None:
+    """
+        原子化写入文件
+
+        先写入临时文件，再通过`os.replace`替换目标文件，写入中断不会破坏原文件。
+    """
+    tmp_path = f"{file_path}.tmp"
+    with open(tmp_path, mode='wb') as fw:
+        fw.write(data)
+        fw.flush()
+        os.fsync(fw.fileno())
+    os.replace(tmp_path, file_path)
+
+
+async def run_in_store_thread(fn, *args) -> Any:
+    """
+        在存储线程中运行`fn`
+    """
+    return await asyncio.get_event_loop().run_in_executor(
+        store_executor, fn, *args)
+
+
 class Session(StoreSerializable):
     """Session
 
@@ -166,21 +251,33 @@ class BaseStore:
     """
 
     def to_json(self, session: Session) -> str:
+        return self.dumps(session._serializable()).decode("utf-8")
+
+    def dumps(self, data: Dict[str, Any]) -> bytes:
         try:
-            return json.dumps(session._serializable(),
-                              ensure_ascii=False,
-                              sort_keys=True,
-                              indent=2,
-                              cls=StoreEncoder)
+            return store_dumps(data)
         except Exception as e:
             raise StoreException("Store JSON 序列化异常", cause=e)
 
-    def load_json(self, json_str: str) -> Dict[str, Any]:
+    async def async_dumps(self, session: Session) -> bytes:
+        """
+            序列化`session`
+
+            序列化于事件循环中完成，期间不会被并发修改；仅写入交由存储线程
+        """
+        return self.dumps(session._serializable())
+
+    def load_json(self, json_str: Union[str, bytes]) -> Dict[str, Any]:
         try:
-            return json.loads(json_str)
+            return store_loads(json_str)  # type: ignore
         except Exception as e:
             raise StoreException("Store JSON 反序列化异常", cause=e)
 
+    async def _init_(self) -> None:
+        """
+            启动初始化，在数据库初始化完成后调用
+        """
+
     async def read(self,
                    key: str,
                    SessionType: Type[Session] = Session) -> Session:
@@ -189,6 +286,22 @@ class BaseStore:
     async def save(self, session: Session):
         raise NotImplementedError("need implemented save function!")
 
+    async def save_all(self, sessions: List[Session]) -> List[Session]:
+        """
+            批量保存`session`
+
+            返回保存失败的`session`
+        """
+        failed_sessions: List[Session] = []
+        for session in sessions:
+            try:
+                await self.save(session)
+            except Exception as e:
+                logger.opt(exception=True).error("`Session` {} 写入失败 {}",
+                                                 session.key, e)
+                failed_sessions.append(session)
+        return failed_sessions
+
 
 class FileStore(BaseStore):
     """
@@ -279,12 +392,10 @@ class FileStore(BaseStore):
         if not os.path.isfile(file_path):
             return SessionType(key=key)
         try:
-            with open(file_path, mode='r', encoding=self.encoding) as fr:
-                json_str = fr.read()
-                data = self.load_json(json_str)
-                session = SessionType._load_from_dict(data)
-                session._key = key
-                return session
+            data = await run_in_store_thread(self._read_file, file_path)
+            session = SessionType._load_from_dict(data)
+            session._key = key
+            return session
         except Exception as e:
             now_e = e
             try:
@@ -293,59 +404,173 @@ class FileStore(BaseStore):
                 now_e = e
             raise StoreException(f"数据文件`{file_path}`读取异常。", cause=now_e)
 
-    async def save(self, session: Session):
-        save_addpath, save_filename = self.deal_key_to_savepath_and_filename(
-            session.key)
-        file_path = os.path.join(save_addpath, save_filename + ".json")
+    def _read_file(self, file_path: str) -> Dict[str, Any]:
+        with open(file_path, mode='rb') as fr:
+            return self.load_json(fr.read())
 
+    def _save_file(self, save_addpath: str, file_path: str,
+                   data: bytes) -> None:
         if not os.path.isdir(save_addpath):
             try:
                 os.makedirs(save_addpath)
             except IOError as e:
                 raise StoreException(f"目录 {save_addpath} 创建失败！", e)
-
         try:
-            with open(file_path, mode='w', encoding=self.encoding) as fw:
-                fw.write(self.to_json(session))
+            atomic_write(file_path, data)
         except Exception as e:
             raise StoreException(f"数据文件`{file_path}`写入异常", cause=e)
 
+    async def save(self, session: Session):
+        save_addpath, save_filename = self.deal_key_to_savepath_and_filename(
+            session.key)
+        file_path = os.path.join(save_addpath, save_filename + ".json")
+        data = await self.async_dumps(session)
+        await run_in_store_thread(self._save_file, save_addpath, file_path,
+                                  data)
+
 
 class DatabaseStore(BaseStore):
     """
         数据库存储
+
+        保存时使用批量`upsert`，同一批次的`session`在单个事务中写入。
+
+        首次启动时会自动从文件存储目录迁移数据（仅执行一次）。
     """
+    BATCH_SIZE: int = 200
+    MIGRATED_MARK: str = ".database_migrated"
 
     def __init__(self) -> None:
         super().__init__()
+        self.file_base_path: str = os.path.join(config.os_data_path,
+                                                "session")
+
+    @staticmethod
+    def deal_key(key: str) -> str:
+        """
+            规范化`key`，与文件存储保持一致（忽略`src.plugins.`前缀）
+        """
+        if key.startswith("src.plugins."):
+            return key[len("src.plugins."):]
+        return key
+
+    async def _init_(self) -> None:
+        await self.migrate_from_file()
 
     async def read(self,
                    key: str,
                    SessionType: Type[Session] = Session) -> Session:
         try:
-            try:
-                model = await SessionModel.get(**{"key": key})
-            except DoesNotExist as e:
-                return SessionType(key=key)
-
+            model = await SessionModel.get_or_none(key=self.deal_key(key))
             if not model:
-                raise Exception(f"未知异常，数据模型`{key}`获取失败")
-            json_str = model.json
-            data = self.load_json(json_str)
-            return SessionType._load_from_dict(data)
+                return SessionType(key=key)
+            data = self.load_json(model.json)
+            session = SessionType._load_from_dict(data)
+            session._key = key
+            return session
         except Exception as e:
             raise StoreException(f"数据库读取`{key}` Session 失败", cause=e)
 
+    async def __upsert(self,
+                       rows: Dict[str, str],
+                       ignore_conflicts: bool = False) -> None:
+        """
+            批量写入，`rows`为`key`到数据段的映射
+        """
+        models = [
+            SessionModel(key=key, json=rows[key]) for key in rows
+        ]
+        async with in_transaction() as connection:
+            if ignore_conflicts:
+                await SessionModel.bulk_create(models,
+                                               batch_size=self.BATCH_SIZE,
+                                               ignore_conflicts=True,
+                                               using_db=connection)
+            else:
+                await SessionModel.bulk_create(
+                    models,
+                    batch_size=self.BATCH_SIZE,
+                    on_conflict=["key"],
+                    update_fields=["json", "change_time"],
+                    using_db=connection)
+
     async def save(self, session: Session):
         key: str = session.key
         try:
-            model, _ = await SessionModel.get_or_create({"key": key},
-                                                        **{"key": key})
-            model.json = self.to_json(session)
-            await model.save()
+            data = await self.async_dumps(session)
+            await self.__upsert({self.deal_key(key): data.decode("utf-8")})
         except Exception as e:
             raise StoreException(f"数据库保存`{key}` Session 失败", cause=e)
 
+    async def save_all(self, sessions: List[Session]) -> List[Session]:
+        if not sessions:
+            return []
+        try:
+            rows: Dict[str, str] = {}
+            for session in sessions:
+                data = await self.async_dumps(session)
+                rows[self.deal_key(session.key)] = data.decode("utf-8")
+            await self.__upsert(rows)
+        except Exception as e:
+            logger.opt(exception=True).error("数据库批量保存 {} 个 Session 失败 {}",
+                                             len(sessions), e)
+            return sessions
+        return []
+
+    @staticmethod
+    def file_path_to_key(dirs: List[str], filename: str) -> str:
+        """
+            由文件存储的相对路径还原`key`（`FileStore.deal_key_to_savepath_and_filename`的逆操作）
+        """
+        if not dirs:
+            return filename
+        if len(dirs) > 1 and dirs[-1].startswith("ob11"):
+            return f"{'.'.join(dirs[:-1])}_{dirs[-1]}_{filename}"
+        return f"{'.'.join(dirs)}_{filename}"
+
+    def _collect_file_sessions(self) -> Dict[str, str]:
+        """
+            于存储线程中运行，收集文件存储中的全部`session`
+        """
+        rows: Dict[str, str] = {}
+        for root, _, files in os.walk(self.file_base_path):
+            rel_path = os.path.relpath(root, self.file_base_path)
+            dirs = [] if rel_path == "." else rel_path.split(os.sep)
+            for item in files:
+                if not item.endswith(".json"):
+                    continue
+                file_path = os.path.join(root, item)
+                key = self.deal_key(
+                    self.file_path_to_key(dirs, item[:-len(".json")]))
+                try:
+                    with open(file_path, mode='rb') as fr:
+                        data = self.load_json(fr.read())
+                    rows[key] = store_dumps(data).decode("utf-8")
+                except Exception as e:
+                    logger.warning("迁移`Session`文件`{}`失败，已跳过 {}", file_path, e)
+        return rows
+
+    async def migrate_from_file(self) -> int:
+        """
+            从文件存储迁移`session`至数据库
+
+            仅在未迁移过时执行，数据库中已存在的`key`不会被覆盖，返回迁移的数量。
+        """
+        mark_path = os.path.join(self.file_base_path, self.MIGRATED_MARK)
+        if not os.path.isdir(self.file_base_path) or os.path.isfile(
+                mark_path):
+            return 0
+        rows = await run_in_store_thread(self._collect_file_sessions)
+        if rows:
+            try:
+                await self.__upsert(rows, ignore_conflicts=True)
+            except Exception as e:
+                raise StoreException("文件存储迁移至数据库失败", cause=e)
+        await run_in_store_thread(atomic_write, mark_path,
+                                  str(len(rows)).encode("utf-8"))
+        logger.info("已从文件存储迁移 {} 个`Session`至数据库", len(rows))
+        return len(rows)
+
 
 class SessionManage:
     """
@@ -353,11 +578,16 @@ class SessionManage:
 
         维护Session的完整生命周期
     """
-    __STORE_MAP: Dict[str, Type[BaseStore]] = {"file": FileStore}
+    __STORE_MAP: Dict[str, Type[BaseStore]] = {
+        "file": FileStore,
+        "database": DatabaseStore
+    }
     session_manage: Optional["SessionManage"] = None
 
     def __init__(self) -> None:
         self.__sessions: Dict[str, Session] = {}
+        self.__dirty_sessions: Dict[str, Session] = {}
+        """待写入的`session`（延迟写入模式）"""
 
         self.store: BaseStore = self.__STORE_MAP[
             config.os_session_save_model]()
@@ -368,10 +598,20 @@ class SessionManage:
         if self.timeout < 60:
             self.timeout = -1
 
+        self.write_behind: bool = config.os_session_write_behind
+        self.write_count: int = 0
+        """实际写入存储的次数"""
+        self.write_avoid_count: int = 0
+        """因合并写入而避免的写入次数"""
+
     @property
     def sessions(self):
         return self.__sessions
 
+    @property
+    def dirty_sessions(self):
+        return self.__dirty_sessions
+
     async def _hook_session_activity(self, key: str):
         self.timeout_map[key] = time()
 
@@ -381,7 +621,8 @@ class SessionManage:
         """
         for key in session_keys:
             session = self.sessions[key]
-            await session.save()
+            self.dirty_sessions.pop(key, None)
+            await self._write(session)
             del self.sessions[key]
             del self.timeout_map[key]
 
@@ -439,11 +680,41 @@ class SessionManage:
                                  ) or await self.generate_session(
                                      key, plug_scope, SessionType)
 
+    async def _write(self, session: Session) -> None:
+        """
+            立即写入`session`至存储
+        """
+        await self.store.save(session)
+        self.write_count += 1
+
     async def save(self, session: Session) -> None:
         """
             保存`session`（持久化至存储）
+
+            延迟写入模式下仅标记为脏，由定时任务`flush`统一写入
         """
-        await self.store.save(session)
+        if not self.write_behind:
+            await self._write(session)
+            return
+        if session.key in self.dirty_sessions:
+            self.write_avoid_count += 1
+        self.dirty_sessions[session.key] = session
+
+    async def flush(self) -> None:
+        """
+            将所有待写入的`session`写入存储
+
+            写入失败的`session`将保留至下次写入
+        """
+        if not self.dirty_sessions:
+            return
+        dirty_sessions = self.__dirty_sessions
+        self.__dirty_sessions = {}
+        failed_sessions = await self.store.save_all(
+            list(dirty_sessions.values()))
+        self.write_count += len(dirty_sessions) - len(failed_sessions)
+        for session in failed_sessions:
+            self.__dirty_sessions.setdefault(session.key, session)
 
     async def reset_session(self,
                             key: str,
@@ -472,3 +743,10 @@ async def sessions_check_and_recycling():
     logger.debug("执行`Session`回收，当前：{}", len(sm.sessions))
     await SessionManage.get_instance()._sessions_check_and_recycling()
     logger.debug("`Session`回收完毕，当前：{}", len(sm.sessions))
+
+
+@scheduler.scheduled_job("interval",
+                         seconds=max(config.os_session_flush_interval, 1),
+                         name="Session延迟写入")
+async def sessions_flush():
+    await SessionManage.get_instance().flush()
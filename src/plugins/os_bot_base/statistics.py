@@ -17,7 +17,7 @@ from typing_extensions import Self
 from dataclasses import dataclass, field
 from collections import deque
 from nonebot import get_driver, get_bots, on_command
-from nonebot.message import run_preprocessor, run_postprocessor, event_preprocessor, event_postprocessor
+from nonebot.message import run_preprocessor, run_postprocessor, event_postprocessor
 from nonebot.adapters.onebot import v11, v12
 from nonebot.adapters import Event, Bot
 from nonebot.matcher import Matcher
@@ -26,10 +26,12 @@ from nonebot_plugin_apscheduler import scheduler
 from .config import config
 from .consts import STATE_STATISTICE_DEAL
 from .logger import logger
-from .util import seconds_to_dhms, matcher_exception_try, only_command
+from .util import seconds_to_dhms, matcher_exception_try, only_command, AsyncPool, HttpSessionManage
 from .notice import UrgentNotice
-from .session import Session, StoreSerializable
+from .session import Session, StoreSerializable, SessionManage
 from .depends import get_plugin_session
+from .cache.onebot import member_cache_statistics
+from .permission import PermManage
 
 driver = get_driver()
 
@@ -163,6 +165,7 @@ statistics_record = StatisticsRecord.get_instance()
 
 
 def get_statistics_info():
+    sm = SessionManage.get_instance()
     return (
         f"已启动：{seconds_to_dhms(int(statistics_record.run_seconds()))}\n"
         f"活跃Bot计数:{len(get_bots())}\n"
@@ -172,7 +175,22 @@ def get_statistics_info():
         f"事件计数(消息/总数)：{statistics_record.event_message_count}/{statistics_record.event_count}\n"
         f"Api请求 错误数/总计数 (错误率):{statistics_record.api_call_error_count}/{statistics_record.api_call_count} "
         f"({(statistics_record.api_call_error_count/(statistics_record.api_call_count or 1))*100:.5f}%)\n"
-        f"Bot断开计数:{statistics_record.bot_disconnect_count}")
+        f"Bot断开计数:{statistics_record.bot_disconnect_count}\n"
+        f"Session 写入/合并/待写入:{sm.write_count}/{sm.write_avoid_count}/{len(sm.dirty_sessions)}\n"
+        f"群成员缓存 命中/未命中 (命中率):{member_cache_statistics.hit_count}/{member_cache_statistics.miss_count} "
+        f"({member_cache_statistics.hit_rate()*100:.2f}%)\n"
+        f"群成员缓存 淘汰(容量/闲置/预算):{member_cache_statistics.evict_capacity_count}/"
+        f"{member_cache_statistics.evict_idle_count}/{member_cache_statistics.evict_budget_count} "
+        f"记录数:{member_cache_statistics.member_count}\n"
+        f"权限索引 命中/未命中 (命中率):{PermManage.INDEX.hit_count}/{PermManage.INDEX.miss_count} "
+        f"({PermManage.INDEX.hit_rate()*100:.2f}%) 重建:{PermManage.INDEX.build_count}\n"
+        f"{HttpSessionManage.get_instance().status()}" +
+        "".join(
+            f"\n{pool.name} 完成/错误/取消:{pool.statistics.complete_count}/"
+            f"{pool.statistics.error_count}/{pool.statistics.cancel_count} "
+            f"队列(当前/峰值):{pool.statistics.queue_length}/{pool.statistics.queue_length_max} "
+            f"平均耗时(运行/排队):{pool.statistics.avg_run_ms():.1f}ms/{pool.statistics.avg_wait_ms():.1f}ms"
+            for pool in AsyncPool.POOLS))
 
 
 statistics_info = on_command(
@@ -405,21 +423,14 @@ async def handle_api_result(bot: Bot, exception: Optional[Exception], api: str,
                                       exception_str=exception_str))
 
 
-@event_preprocessor
-async def _(_: Event):
+def statistics_event(event: Event) -> None:
     """
-        Event 上报到 NoneBot2 时运行
+        记录事件（由事件预处理管线对每个事件调用）
     """
     statistics_record.add_event_count()
-
-
-@event_preprocessor
-async def _(event: Union[v11.MessageEvent, v12.MessageEvent]):
-    """
-        Event 上报到 NoneBot2 时运行
-    """
-    statistics_record.add_event_message_count()
-    setattr(event, "statistics_deal_time", time())
+    if isinstance(event, (v11.MessageEvent, v12.MessageEvent)):
+        statistics_record.add_event_message_count()
+        setattr(event, "statistics_deal_time", time())
 
 
 @run_preprocessor
@@ -1,63 +1,152 @@
+"""
+    # 线程池/进程池的异步封装
+
+    通过`asyncio.wrap_future`桥接池的`Future`，不进行轮询。
+
+    - 等待方被取消时，尚未开始执行的任务会同时被取消
+    - 可限制排队深度，超出时`submit`等待空位（背压）
+    - 记录队列长度、运行耗时、排队耗时等统计数据
+
+    CPU密集的任务（如压缩备份）可通过`get_process_pool()`获取共享进程池执行。
+"""
 import asyncio
-from asyncio.futures import Future
-from concurrent.futures import ProcessPoolExecutor
-from concurrent.futures import ThreadPoolExecutor
-from concurrent.futures import Future as ThreadFuture
-from typing import Awaitable, Callable, Tuple, Union
+from time import time
+from dataclasses import dataclass
+from concurrent.futures import Executor, ProcessPoolExecutor
+from typing import Any, Callable, List, Optional, Tuple
+from ..config import config
+
+
+def _timed_call(fn: Callable, args: tuple, kws: dict) -> Tuple[Any, float, float]:
+    """
+        在池中执行并记录起止时间（需可被序列化，以便用于进程池）
+    """
+    start_time = time()
+    result = fn(*args, **kws)
+    return result, start_time, time()
+
+
+@dataclass
+class PoolStatistics:
+    """
+        池统计数据
+    """
+    submit_count: int = 0
+    complete_count: int = 0
+    error_count: int = 0
+    cancel_count: int = 0
+    queue_length: int = 0
+    """已提交但未完成的任务数"""
+    queue_length_max: int = 0
+    run_time_total: float = 0
+    wait_time_total: float = 0
+
+    def avg_run_ms(self) -> float:
+        return self.run_time_total * 1000 / (self.complete_count or 1)
+
+    def avg_wait_ms(self) -> float:
+        return self.wait_time_total * 1000 / (self.complete_count or 1)
 
 
 class AsyncPool:
     """
         线程池或进程池的异步封装
+
+        - `pool` 线程池或进程池
+        - `max_queue` 最大排队深度，小于1时不限制
+        - `name` 池名称，用于统计输出
     """
+    POOLS: List["AsyncPool"] = []
 
-    def __init__(self, pool: Union[ProcessPoolExecutor,
-                                   ThreadPoolExecutor]) -> None:
+    def __init__(self,
+                 pool: Executor,
+                 max_queue: int = 0,
+                 name: str = "") -> None:
         self._pool = pool
+        self.max_queue = max_queue
+        self.name = name or pool.__class__.__name__
+        self.statistics = PoolStatistics()
+        self._slots: Optional[asyncio.Semaphore] = None
+        AsyncPool.POOLS.append(self)
 
-    def _pkg_callback(self) -> Tuple[Awaitable, Callable]:
-        loop = asyncio.get_event_loop()
-        waiter: Future = loop.create_future()
+    def _get_slots(self) -> Optional[asyncio.Semaphore]:
+        if self.max_queue < 1:
+            return None
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_queue)
+        return self._slots
 
-        def poolrun(thread_future: ThreadFuture):
+    async def submit(self, fn, *args, **kws) -> Any:
+        """
+            提交任务并等待结果
+        """
+        slots = self._get_slots()
+        if slots:
+            await slots.acquire()
+        statistics = self.statistics
+        submit_time = time()
+        statistics.submit_count += 1
+        statistics.queue_length += 1
+        statistics.queue_length_max = max(statistics.queue_length_max,
+                                          statistics.queue_length)
+        try:
+            result, start_time, end_time = await asyncio.wrap_future(
+                self._pool.submit(_timed_call, fn, args, kws))
+        except asyncio.CancelledError:
+            statistics.cancel_count += 1
+            raise
+        except BaseException:
+            statistics.error_count += 1
+            raise
+        else:
+            statistics.complete_count += 1
+            statistics.run_time_total += end_time - start_time
+            statistics.wait_time_total += max(start_time - submit_time, 0)
+            return result
+        finally:
+            statistics.queue_length -= 1
+            if slots:
+                slots.release()
 
-            async def setRes(waiter: Future, thread_future: ThreadFuture):
-                exp = thread_future.exception()
-                if exp:
-                    waiter.set_exception(
-                        thread_future.exception())  # type: ignore
-                    return
-                waiter.set_result(thread_future.result())
+    def shutdown(self, wait: bool = True) -> None:
+        self._pool.shutdown(wait=wait)
 
-            asyncio.run_coroutine_threadsafe(setRes(waiter, thread_future),
-                                             loop)
 
-        return waiter, poolrun
+class AsyncPoolSimple(AsyncPool):
+    """
+        线程池或进程池的简单异步封装
 
-    def submit(self, fn, *args, **kws) -> Awaitable:
-        thread_future = self._pool.submit(fn, *args, **kws)
-        waiter, call_back = self._pkg_callback()
-        thread_future.add_done_callback(call_back)
-        return waiter
+        已与`AsyncPool`合并，保留以兼容旧代码。
+    """
 
 
-class AsyncPoolSimple:
+class SharedProcessPool:
     """
-        线程池或进程池的简单异步封装
+        共享进程池
+
+        首次使用时创建，进程数由`os_process_pool_workers`配置。
     """
+    instance: Optional[AsyncPool] = None
 
-    def __init__(self, pool: Union[ProcessPoolExecutor,
-                                   ThreadPoolExecutor]) -> None:
-        self._pool = pool
+    @classmethod
+    def get_instance(cls) -> AsyncPool:
+        if not cls.instance:
+            cls.instance = AsyncPool(ProcessPoolExecutor(
+                max_workers=max(config.os_process_pool_workers, 1)),
+                                     max_queue=config.os_process_pool_queue,
+                                     name="共享进程池")
+        return cls.instance
+
+    @classmethod
+    def shutdown(cls, wait: bool = True) -> None:
+        if cls.instance:
+            cls.instance.shutdown(wait=wait)
+            AsyncPool.POOLS.remove(cls.instance)
+            cls.instance = None
 
-    async def _wait(self, thread_future: ThreadFuture):
-        while not thread_future.done():
-            await asyncio.sleep(0.05)
-        e = thread_future.exception()
-        if e:
-            raise e
-        return thread_future.result()
-
-    def submit(self, fn, *args, **kws) -> Future:
-        f = self._pool.submit(fn, *args, **kws)
-        return self._wait(f)  # type: ignore
+
+def get_process_pool() -> AsyncPool:
+    """
+        获取共享进程池
+    """
+    return SharedProcessPool.get_instance()
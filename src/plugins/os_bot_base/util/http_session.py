@@ -0,0 +1,190 @@
+"""
+    # 共享HTTP会话
+
+    按配置档（profile）复用`aiohttp.ClientSession`，避免每次请求重新进行DNS解析及TCP/TLS握手。
+
+    - 每个配置档可指定代理及默认超时，未指定代理的请求使用配置档的代理
+    - 连接池限制总连接数及单主机连接数，并缓存DNS解析结果
+    - 记录请求数、新建/复用连接数、DNS缓存命中等统计数据
+    - 在驱动关闭时统一关闭
+
+    ```python
+    async with http_request("get", url, timeout=aiohttp.ClientTimeout(total=10)) as resp:
+        ...
+    ```
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Type
+from typing_extensions import Self
+import aiohttp
+from yarl import URL
+from ..config import config
+
+DEFAULT_PROFILE = "default"
+
+
+@dataclass
+class HttpProfile:
+    """
+        会话配置档
+
+        - `proxy` 代理地址，为空时直连
+        - `timeout` 默认超时时间(s)
+    """
+    proxy: Optional[str] = None
+    timeout: float = 60
+
+
+@dataclass
+class HttpStatistics:
+    """
+        HTTP统计数据
+    """
+    request_count: int = 0
+    error_count: int = 0
+    connection_create_count: int = 0
+    connection_reuse_count: int = 0
+    dns_cache_hit_count: int = 0
+    dns_cache_miss_count: int = 0
+
+    def reuse_rate(self) -> float:
+        total = self.connection_create_count + self.connection_reuse_count
+        return self.connection_reuse_count / (total or 1)
+
+
+def _proxy_request_class(proxy: str) -> Type[aiohttp.ClientRequest]:
+    """
+        生成默认使用指定代理的请求类（兼容无法传递代理参数的第三方库）
+    """
+    proxy_url = URL(proxy)
+
+    class ProfileClientRequest(aiohttp.ClientRequest):
+
+        def __init__(self, *args, proxy=None, **kws):
+            super().__init__(*args, proxy=proxy or proxy_url, **kws)
+
+    return ProfileClientRequest
+
+
+class HttpSessionManage:
+    """
+        共享HTTP会话管理器
+    """
+    instance: Optional[Self] = None
+
+    def __init__(self) -> None:
+        self.profiles: Dict[str, HttpProfile] = {
+            DEFAULT_PROFILE: HttpProfile()
+        }
+        self.sessions: Dict[str, aiohttp.ClientSession] = {}
+        self._retired: List[aiohttp.ClientSession] = []
+        self.statistics = HttpStatistics()
+        self.trace_config = self._trace_config()
+
+    def register_profile(self,
+                         name: str,
+                         proxy: Optional[str] = None,
+                         timeout: float = 60) -> None:
+        """
+            注册配置档，已创建的同名会话将在下次获取时重建
+        """
+        self.profiles[name] = HttpProfile(proxy=proxy or None, timeout=timeout)
+        session = self.sessions.pop(name, None)
+        if session:
+            # 进行中的请求不受影响，关闭时统一释放
+            self._retired.append(session)
+
+    def _trace_config(self) -> aiohttp.TraceConfig:
+        statistics = self.statistics
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(*_: Any) -> None:
+            statistics.request_count += 1
+
+        async def on_request_exception(*_: Any) -> None:
+            statistics.error_count += 1
+
+        async def on_connection_create_end(*_: Any) -> None:
+            statistics.connection_create_count += 1
+
+        async def on_connection_reuseconn(*_: Any) -> None:
+            statistics.connection_reuse_count += 1
+
+        async def on_dns_cache_hit(*_: Any) -> None:
+            statistics.dns_cache_hit_count += 1
+
+        async def on_dns_cache_miss(*_: Any) -> None:
+            statistics.dns_cache_miss_count += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_request_exception.append(on_request_exception)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    def get_session(self, profile: str = DEFAULT_PROFILE) -> aiohttp.ClientSession:
+        """
+            获取配置档对应的会话（需在事件循环中调用）
+        """
+        session = self.sessions.get(profile)
+        if session and not session.closed:
+            return session
+        http_profile = self.profiles.get(profile) or self.profiles[
+            DEFAULT_PROFILE]
+        connector = aiohttp.TCPConnector(
+            limit=config.os_http_limit,
+            limit_per_host=config.os_http_limit_per_host,
+            ttl_dns_cache=config.os_http_dns_ttl,
+            keepalive_timeout=config.os_http_keepalive)
+        kws: Dict[str, Any] = {}
+        if http_profile.proxy:
+            kws["request_class"] = _proxy_request_class(http_profile.proxy)
+        session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=http_profile.timeout),
+            trace_configs=[self.trace_config],
+            **kws)
+        self.sessions[profile] = session
+        return session
+
+    async def close(self) -> None:
+        sessions = list(self.sessions.values()) + self._retired
+        self.sessions.clear()
+        self._retired.clear()
+        for session in sessions:
+            if not session.closed:
+                await session.close()
+
+    def status(self) -> str:
+        statistics = self.statistics
+        return (
+            f"HTTP 请求/异常:{statistics.request_count}/{statistics.error_count} "
+            f"连接 新建/复用:{statistics.connection_create_count}/{statistics.connection_reuse_count} "
+            f"({statistics.reuse_rate()*100:.2f}%) "
+            f"DNS缓存 命中/未命中:{statistics.dns_cache_hit_count}/{statistics.dns_cache_miss_count}"
+        )
+
+    @classmethod
+    def get_instance(cls) -> Self:
+        if not cls.instance:
+            cls.instance = cls()
+        return cls.instance
+
+
+def http_session(profile: str = DEFAULT_PROFILE) -> aiohttp.ClientSession:
+    """
+        获取共享会话
+    """
+    return HttpSessionManage.get_instance().get_session(profile)
+
+
+def http_request(method: str,
+                 url: Any,
+                 profile: str = DEFAULT_PROFILE,
+                 **kws: Any):
+    """
+        使用共享会话发起请求，用法同`aiohttp.request`
+    """
+    return http_session(profile).request(method, url, **kws)
@@ -19,25 +19,10 @@ async def plug_is_disable(name: str, group_mark: str) -> bool:
         - `name` 插件标识名
         - `group_mark` 需要判断的组标识(一般通过`adapter.mark_group_without_drive(bot, event)`获取)
     """
-    from ..plugin_manage import _get_plug_model, _get_plug_switch_model
+    from ..plugin_manage import plug_switch_table
     try:
-        plugModel = await _get_plug_model(name)
-        if not plugModel:
-            return False
-        if not plugModel.load:
-            return True
-        plugSwitchModel = await _get_plug_switch_model(name, group_mark)
-        if plugModel and not plugModel.switch:
-            return True
-
-        if plugSwitchModel:
-            if plugSwitchModel.switch:
-                return False
-            else:
-                return True
-        if plugModel and not plugModel.default_switch:
-            return True
-        return False
+        await plug_switch_table.ensure_loaded()
+        return plug_switch_table.is_disable(name, group_mark)
     except Exception as e:
         logger.opt(exception=True).debug(f"在检查{name} - {group_mark}是否被禁用时异常。")
         raise e
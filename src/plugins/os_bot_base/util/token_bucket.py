@@ -3,6 +3,8 @@
 """
 import time
 import asyncio
+from collections import deque
+from typing import Deque, Optional, Tuple
 from ..exception import BaseException
 
 
@@ -72,6 +74,16 @@ class TokenBucket(object):
 
         self._cumulative_time = cumulative_time
 
+    @property
+    def num(self) -> float:
+        """令牌发放数量"""
+        return self._num
+
+    @property
+    def issuetime(self) -> float:
+        """发放周期(s)"""
+        return self._issuetime
+
     # token_amount是发送数据需要的令牌数
     def _consume(self, token_amount: int = 1, take_token: bool = True) -> bool:
         now_time = time.time()
@@ -90,6 +102,21 @@ class TokenBucket(object):
                 self._current_amount -= token_amount
         return True
 
+    def _time_until(self, token_amount: float = 1) -> float:
+        """
+            距离令牌余量足够还需要的时间(s)，余量充足时返回0
+        """
+        self._consume(0, take_token=False)
+        if token_amount <= self._current_amount:
+            return 0
+        return (token_amount - self._current_amount) / self._rate
+
+    def estimate_wait(self, token_amount: float = 1) -> float:
+        """
+            估算获取令牌需要等待的时间(s)
+        """
+        return self._time_until(token_amount)
+
     def canConsume(self, token_amount: int = 1) -> bool:
         """
             判断令牌余量是否充足
@@ -110,6 +137,10 @@ class TokenBucket(object):
 class AsyncTokenBucket(TokenBucket):
     r"""
         令牌桶算法的异步实现
+
+        等待令牌的协程按先来后到排队，仅在队首所需令牌恰好足够时唤醒，不进行轮询。
+
+        队列非空时`consume`不会越过排队者直接获取令牌。
     """
 
     def __init__(self,
@@ -121,18 +152,73 @@ class AsyncTokenBucket(TokenBucket):
                  cumulative_delay: int = 0):
         super().__init__(num, issuetime, initval, capacity, cumulative_time,
                          cumulative_delay)
+        self._waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+        self._wake_handle: Optional[asyncio.TimerHandle] = None
 
     async def consume(self, token_amount: int = 1) -> bool:
+        if self._waiters:
+            return False
         return super().consume(token_amount=token_amount)
 
     async def canConsume(self, token_amount: int = 1) -> bool:
         return super().canConsume(token_amount=token_amount)
 
+    def estimate_wait(self, token_amount: float = 1) -> float:
+        """
+            估算获取令牌需要等待的时间(s)（含排队中的请求）
+        """
+        queued = sum(amount for amount, _ in self._waiters)
+        return self._time_until(queued + token_amount)
+
+    def _wake(self) -> None:
+        """
+            按顺序唤醒令牌足够的等待者，并为新的队首安排下一次唤醒
+        """
+        self._wake_handle = None
+        while self._waiters:
+            token_amount, future = self._waiters[0]
+            if future.done():
+                self._waiters.popleft()
+                continue
+            if not super().consume(token_amount):
+                delay = self._time_until(token_amount)
+                self._wake_handle = future.get_loop().call_later(
+                    max(delay, 0.001), self._wake)
+                return
+            self._waiters.popleft()
+            future.set_result(True)
+
+    def _reschedule(self) -> None:
+        if self._wake_handle:
+            self._wake_handle.cancel()
+        self._wake()
+
     async def _wait_consume(self, token_amount: int = 1) -> bool:
-        while True:
-            if super().consume(token_amount):
-                return True
-            await asyncio.sleep(0.05)
+        if token_amount > self._capacity:
+            return False
+        if not self._waiters and super().consume(token_amount):
+            return True
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append((token_amount, future))
+        if len(self._waiters) == 1:
+            self._reschedule()
+        try:
+            return await future
+        except asyncio.CancelledError:
+            refunded = future.done() and not future.cancelled()
+            if refunded:
+                # 已分配令牌但等待者被取消，归还令牌
+                self._current_amount = min(
+                    self._current_amount + token_amount, self._capacity)
+            is_head = bool(self._waiters) and self._waiters[0][1] is future
+            try:
+                self._waiters.remove((token_amount, future))
+            except ValueError:
+                pass
+            if self._waiters and (is_head or refunded
+                                  or self._wake_handle is None):
+                self._reschedule()
+            raise
 
     async def wait_consume(self,
                            token_amount: int = 1,
@@ -140,7 +226,7 @@ class AsyncTokenBucket(TokenBucket):
         """
             等待令牌成功获取
 
-            超时返回False
+            超时返回False，所需令牌超过桶容量时直接返回False
 
             token_amount: int 需要的令牌数量
 
@@ -151,5 +237,5 @@ class AsyncTokenBucket(TokenBucket):
         try:
             return await asyncio.wait_for(self._wait_consume(token_amount),
                                           timeout=timeout)
-        except TimeoutError:
+        except asyncio.TimeoutError:
             return False
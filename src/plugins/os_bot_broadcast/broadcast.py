@@ -1,4 +1,3 @@
-import asyncio
 import math
 import random
 from time import time
@@ -15,12 +14,12 @@ from nonebot.adapters.onebot.v11.permission import PRIVATE_FRIEND, GROUP_ADMIN,
 from dataclasses import dataclass, field
 
 from .logger import logger
+from .engine import BroadcastEngine, BroadcastRun, BroadcastTarget
 
 from ..os_bot_base.depends import SessionPluginDepend, ArgMatchDepend, AdapterDepend, Adapter, OBCacheDepend, OnebotCache
 from ..os_bot_base.session import Session, StoreSerializable
-from ..os_bot_base.util import matcher_exception_try, plug_is_disable, only_command, inhibiting_exception
+from ..os_bot_base.util import matcher_exception_try, only_command
 from ..os_bot_base.argmatch import ArgMatch, Field
-from ..os_bot_base.notice import BotSend, UrgentNotice
 from ..os_bot_base.cache.onebot import BotRecord
 
 
@@ -160,45 +159,36 @@ async def _(matcher: Matcher,
         session.history.append(
             f"{umark} 向频道 {state['channel']} 广播 内容：{state['msg']}")
 
-    @inhibiting_exception()
-    async def send():
-        success_count = 0
-        failure_count = 0
-        msg = v11.Message(f"来自广播的讯息 | 频道 {state['channel']}\n"
-                          if not state["is_short"] else "") + state["msg"]
-        for channelKey in session.channels[state["channel"]]:
-            channelUnit = session.channels[state["channel"]][channelKey]
-            mark = f"{adapter.get_type()}-global-{channelUnit.group_type}-{channelUnit.unit_id}"
-            if await plug_is_disable("os_bot_broadcast", mark):
-                logger.info("因组 {} 的广播插件被关闭，广播推送取消。", mark)
-                UrgentNotice.add_notice(f"{mark}的广播操作因插件被关闭取消！")
-                continue
-
-            if channelUnit.group_type == "group":
-                send_params = {"group_id": channelUnit.unit_id}
-            else:
-                send_params = {"user_id": channelUnit.unit_id}
-            success = await BotSend.send_msg(
-                channelUnit.drive_type, send_params, msg,
-                f"{channelUnit.bot_id}" if channelUnit.bot_id else None)
-            if not success:
-                failure_count += 1
-                notice_msg = f"向`{state['channel']}`的{channelKey}广播讯息失败"
-                logger.warning(notice_msg)
-                UrgentNotice.add_notice(notice_msg)
-            else:
-                success_count += 1
-            if success:
-                await asyncio.sleep(random.randint(1000, 5000) / 1000)
-        await bot.send(
-            event, f"对`{state['channel']}`的广播完成~" +
-            (f"成功{success_count} 失败{failure_count}"
-             if failure_count != 0 else f"共发送{success_count}条讯息"))
-
-    asyncio.gather(send())
+    broadcast_msg = v11.Message(f"来自广播的讯息 | 频道 {state['channel']}\n"
+                                if not state["is_short"] else "") + state["msg"]
+    run = BroadcastRun(
+        channel=state["channel"],
+        message=str(broadcast_msg),
+        drive_type=adapter.get_type(),
+        operator_id=event.user_id,
+        operator_bot_id=int(bot.self_id),
+        targets={
+            key: BroadcastTarget(unit.drive_type, unit.group_type,
+                                 unit.unit_id, unit.bot_id)
+            for key, unit in session.channels[state["channel"]].items()
+        })
+    await BroadcastEngine.get_instance().start(run)
     await matcher.finish(f"正在向`{state['channel']}`广播讯息~")
 
 
+broadcast_status = on_command("广播进度",
+                              block=True,
+                              aliases={"广播状态"},
+                              rule=only_command(),
+                              permission=SUPERUSER)
+
+
+@broadcast_status.handle()
+@matcher_exception_try()
+async def _(matcher: Matcher, event: v11.PrivateMessageEvent):
+    await matcher.finish(await BroadcastEngine.get_instance().status())
+
+
 channel_create = on_command("创建广播频道", block=True, permission=SUPERUSER)
 
 
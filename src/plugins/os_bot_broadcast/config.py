@@ -1,4 +1,4 @@
-from pydantic import BaseSettings
+from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from nonebot.plugin import PluginMetadata
 
@@ -10,6 +10,18 @@ class Config(BaseSettings):
     """
         工具插件
     """
+    broadcast_bot_interval: float = Field(default=3)
+    """同一Bot两次发送的平均间隔(s)，各Bot独立计算"""
+    broadcast_bot_burst: int = Field(default=3)
+    """同一Bot可连续发送的消息数（令牌桶容量）"""
+    broadcast_jitter: float = Field(default=1)
+    """每次发送后附加的随机等待上限(s)"""
+    broadcast_progress_interval: int = Field(default=60)
+    """向发起者报告广播进度的间隔(s)，0为不报告"""
+    broadcast_resume_delay: int = Field(default=15)
+    """Bot连接后等待多久继续未完成的广播(s)，等待其它Bot连接及缓存刷新"""
+    broadcast_history_size: int = Field(default=20)
+    """保留的已完成广播记录数"""
 
     class Config:
         extra = "ignore"
@@ -39,6 +51,7 @@ __plugin_meta__ = PluginMetadata(
 
             特殊指令`同步群列表至频道 [频道名]`及`同步好友列表至频道 [频道名]`用于创建包含完整群与好友列表的广播频道
             注：可将`广播`指令的`广播`替换为`无感广播`来屏蔽标题
+            广播由各Bot并发发送，通过`广播进度`查看进行中的广播，重启后将继续发送未完成的广播
         """,  # 管理员可以获取的帮助
         META_SESSION_KEY: UtilSession,
     },
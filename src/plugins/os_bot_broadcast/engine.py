@@ -0,0 +1,366 @@
+"""
+    # 广播投递引擎
+
+    按实际负责投递的Bot拆分广播对象，各Bot的队列并发执行，发送节奏由各Bot独立的令牌桶控制。
+
+    - 每个对象的投递结果记录在`BroadcastRunSession`中，进程重启后在Bot连接时继续未完成的广播
+    - 按`broadcast_progress_interval`向发起者报告进度，可通过`广播进度`指令查看
+"""
+import asyncio
+import random
+from time import time
+from typing import Any, Dict, List, Optional, Tuple
+from typing_extensions import Self
+from dataclasses import dataclass, field
+from nonebot import get_bots, get_driver
+from nonebot.adapters.onebot import v11
+
+from .config import config
+from .logger import logger
+
+from ..os_bot_base import DatabaseManage, SessionManage
+from ..os_bot_base.session import Session, StoreSerializable
+from ..os_bot_base.util import plug_is_disable, get_plugin_session, AsyncTokenBucket
+from ..os_bot_base.notice import BotSend, UrgentNotice
+from ..os_bot_base.cache import OnebotCache
+
+driver = get_driver()
+
+TARGET_PENDING = "pending"
+TARGET_SUCCESS = "success"
+TARGET_FAILURE = "failure"
+TARGET_SKIP = "skip"
+"""插件被关闭而跳过"""
+
+
+@dataclass
+class BroadcastTarget(StoreSerializable):
+    """
+        广播对象及其投递结果
+
+        - `bot_id` 优先使用的Bot（来自频道成员）
+        - `status` 投递状态
+        - `finish_time` 投递完成时间
+    """
+    drive_type: str = field(default="")
+    group_type: str = field(default="")
+    unit_id: int = field(default=0)
+    bot_id: int = field(default=0)
+    status: str = field(default=TARGET_PENDING)
+    finish_time: int = field(default=0)
+
+    @property
+    def mark(self) -> str:
+        return f"{self.drive_type}-global-{self.group_type}-{self.unit_id}"
+
+    def send_params(self) -> Dict[str, Any]:
+        if self.group_type == "group":
+            return {"group_id": self.unit_id}
+        return {"user_id": self.unit_id}
+
+
+@dataclass
+class BroadcastRun(StoreSerializable):
+    """
+        一次广播
+
+        - `message` 待发送的消息（含标题，CQ码）
+        - `operator_id` 发起者，用于报告进度
+        - `targets` 频道成员标识->广播对象
+    """
+    run_id: str = field(default="")
+    channel: str = field(default="")
+    message: str = field(default="")
+    drive_type: str = field(default="")
+    operator_id: int = field(default=0)
+    operator_bot_id: int = field(default=0)
+    targets: Dict[str, BroadcastTarget] = field(default_factory=dict)
+    create_time: int = field(default_factory=(lambda: int(time())))
+    finish_time: int = field(default=0)
+
+    def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
+        self.__dict__.update(self_dict)
+        self.targets = {
+            key: BroadcastTarget._load_from_dict(item)  # type: ignore
+            for key, item in self.targets.items()
+        }
+        return self
+
+    @property
+    def finished(self) -> bool:
+        return self.finish_time != 0
+
+    def count(self, status: str) -> int:
+        return sum(1 for target in self.targets.values()
+                   if target.status == status)
+
+    def progress(self) -> str:
+        total = len(self.targets)
+        done = total - self.count(TARGET_PENDING)
+        msg = f"{done}/{total} 成功{self.count(TARGET_SUCCESS)} 失败{self.count(TARGET_FAILURE)}"
+        skip_count = self.count(TARGET_SKIP)
+        if skip_count:
+            msg += f" 跳过{skip_count}"
+        return msg
+
+
+class BroadcastRunSession(Session):
+    runs: Dict[str, BroadcastRun]
+    """广播记录（按发起顺序）"""
+
+    def __init__(self, *args, key: str = "default", **kws):
+        super().__init__(*args, key=key, **kws)
+        self.runs = {}
+
+    def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
+        self.__dict__.update(self_dict)
+        self.runs = {
+            key: BroadcastRun._load_from_dict(item)  # type: ignore
+            for key, item in self.runs.items()
+        }
+        return self
+
+    def prune(self) -> None:
+        """
+            仅保留最近`broadcast_history_size`条已完成的记录
+        """
+        finished = [key for key, run in self.runs.items() if run.finished]
+        for key in finished[:max(
+                len(finished) - max(config.broadcast_history_size, 0), 0)]:
+            del self.runs[key]
+
+
+class BroadcastEngine:
+    """
+        广播投递引擎
+    """
+    instance: Optional[Self] = None
+
+    def __init__(self) -> None:
+        self.session: Optional[BroadcastRunSession] = None
+        self.buckets: Dict[str, AsyncTokenBucket] = {}
+        """Bot->令牌桶，同一Bot的多个广播共享发送节奏"""
+        self.tasks: Dict[str, "asyncio.Task[None]"] = {}
+        self.queues: Dict[str, Dict[str, int]] = {}
+        """广播->Bot->待发送数"""
+        self.resume_task: Optional["asyncio.Task[None]"] = None
+
+    async def get_session(self) -> BroadcastRunSession:
+        if not self.session:
+            self.session = await get_plugin_session(BroadcastRunSession)
+            # 常驻内存，避免进行中的广播记录被回收
+            await self.session._lock()
+        return self.session
+
+    def get_bucket(self, bot_id: str) -> AsyncTokenBucket:
+        bucket = self.buckets.get(bot_id)
+        if not bucket:
+            burst = max(config.broadcast_bot_burst, 1)
+            bucket = self.buckets[bot_id] = AsyncTokenBucket(
+                1,
+                max(config.broadcast_bot_interval, 0.001),
+                initval=burst,
+                capacity=burst)
+        return bucket
+
+    def resolve_bot(self, target: BroadcastTarget) -> str:
+        """
+            选择负责投递的Bot（优先使用频道成员记录的Bot），无可用Bot时返回空字符串
+        """
+        bots = get_bots()
+        cache = OnebotCache.get_instance()
+        bot_ids = [str(target.bot_id)] if target.bot_id else []
+        bot_ids += [bot_id for bot_id in bots if bot_id not in bot_ids]
+        for bot_id in bot_ids:
+            if not isinstance(bots.get(bot_id), v11.Bot):
+                continue
+            record = cache.get_bot_record(int(bot_id))
+            if not record:
+                continue
+            if target.group_type == "group":
+                if record.get_group_record(target.unit_id):
+                    return bot_id
+            elif record.get_friend_record(target.unit_id):
+                return bot_id
+        return ""
+
+    async def report(self, run: BroadcastRun, msg: str) -> None:
+        await BotSend.send_msg(
+            run.drive_type, {"user_id": run.operator_id}, msg,
+            f"{run.operator_bot_id}" if run.operator_bot_id else None)
+
+    async def _record(self, run: BroadcastRun, target: BroadcastTarget,
+                      status: str) -> None:
+        target.status = status
+        target.finish_time = int(time())
+        assert self.session
+        await self.session.save()
+
+    async def _deliver_one(self, run: BroadcastRun, bot_id: str, key: str,
+                           target: BroadcastTarget,
+                           message: v11.Message) -> bool:
+        if await plug_is_disable("os_bot_broadcast", target.mark):
+            logger.info("因组 {} 的广播插件被关闭，广播推送取消。", target.mark)
+            UrgentNotice.add_notice(f"{target.mark}的广播操作因插件被关闭取消！")
+            await self._record(run, target, TARGET_SKIP)
+            return False
+        await self.get_bucket(bot_id).wait_consume(1, timeout=0)
+        success = await BotSend.send_msg(target.drive_type,
+                                         target.send_params(), message, bot_id
+                                         or None)
+        if not success:
+            notice_msg = f"向`{run.channel}`的{key}广播讯息失败"
+            logger.warning(notice_msg)
+            UrgentNotice.add_notice(notice_msg)
+        await self._record(run, target,
+                           TARGET_SUCCESS if success else TARGET_FAILURE)
+        return True
+
+    async def _deliver(self, run: BroadcastRun, bot_id: str,
+                       items: List[Tuple[str, BroadcastTarget]]) -> None:
+        """
+            按顺序投递单个Bot负责的对象
+        """
+        message = v11.Message(run.message)
+        queue = self.queues[run.run_id]
+        for key, target in items:
+            queue[bot_id] -= 1
+            try:
+                sent = await self._deliver_one(run, bot_id, key, target,
+                                               message)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.opt(exception=True).warning("向`{}`的{}广播讯息时异常",
+                                                   run.channel, key)
+                await self._record(run, target, TARGET_FAILURE)
+                continue
+            if sent and config.broadcast_jitter > 0:
+                await asyncio.sleep(random.uniform(0,
+                                                   config.broadcast_jitter))
+
+    async def _progress(self, run: BroadcastRun) -> None:
+        while True:
+            await asyncio.sleep(config.broadcast_progress_interval)
+            await self.report(run,
+                              f"`{run.channel}`的广播进度 {run.progress()}")
+
+    async def _execute(self, run: BroadcastRun) -> None:
+        queues: Dict[str, List[Tuple[str, BroadcastTarget]]] = {}
+        for key, target in run.targets.items():
+            if target.status == TARGET_PENDING:
+                queues.setdefault(self.resolve_bot(target),
+                                  []).append((key, target))
+        self.queues[run.run_id] = {
+            bot_id: len(items)
+            for bot_id, items in queues.items()
+        }
+        logger.info("开始向频道`{}`广播 待发送{}个对象 使用{}个Bot", run.channel,
+                    sum(len(items) for items in queues.values()), len(queues))
+        progress = None
+        if config.broadcast_progress_interval > 0:
+            progress = asyncio.create_task(self._progress(run))
+        try:
+            await asyncio.gather(*(self._deliver(run, bot_id, items)
+                                   for bot_id, items in queues.items()))
+        finally:
+            if progress:
+                progress.cancel()
+            self.queues.pop(run.run_id, None)
+        run.finish_time = int(time())
+        session = await self.get_session()
+        session.prune()
+        await session.save()
+        failure_count = run.count(TARGET_FAILURE)
+        success_count = run.count(TARGET_SUCCESS)
+        await self.report(
+            run, f"对`{run.channel}`的广播完成~" +
+            (f"成功{success_count} 失败{failure_count}"
+             if failure_count != 0 else f"共发送{success_count}条讯息"))
+
+    def _launch(self, run: BroadcastRun) -> None:
+        if run.run_id in self.tasks:
+            return
+
+        async def execute() -> None:
+            try:
+                await self._execute(run)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.opt(exception=True).error("频道`{}`的广播异常终止",
+                                                 run.channel)
+            finally:
+                self.tasks.pop(run.run_id, None)
+
+        self.tasks[run.run_id] = asyncio.create_task(execute())
+
+    async def start(self, run: BroadcastRun) -> None:
+        """
+            记录并开始一次广播
+        """
+        session = await self.get_session()
+        run.run_id = f"{run.create_time}-{random.randint(1000, 9999)}"
+        session.runs[run.run_id] = run
+        await session.save()
+        self._launch(run)
+
+    async def resume(self) -> None:
+        """
+            继续因进程重启中断的广播
+        """
+        await asyncio.sleep(config.broadcast_resume_delay)
+        session = await self.get_session()
+        for run in list(session.runs.values()):
+            if run.finished or run.run_id in self.tasks:
+                continue
+            pending_count = run.count(TARGET_PENDING)
+            logger.info("继续频道`{}`未完成的广播 剩余{}个对象", run.channel,
+                        pending_count)
+            await self.report(
+                run, f"`{run.channel}`的广播因重启中断，继续发送剩余{pending_count}个对象")
+            self._launch(run)
+
+    async def stop(self) -> None:
+        """
+            停止进行中的广播并写入投递记录
+        """
+        tasks = list(self.tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        if self.session:
+            await SessionManage.get_instance().flush()
+
+    async def status(self) -> str:
+        session = await self.get_session()
+        lines = []
+        for run in session.runs.values():
+            if run.finished:
+                continue
+            queue = self.queues.get(run.run_id, {})
+            bots = "、".join(f"{bot_id or '无可用Bot'}({count})"
+                            for bot_id, count in queue.items() if count)
+            lines.append(f"`{run.channel}` {run.progress()}" +
+                         (f" 待发送 {bots}" if bots else ""))
+        return "\n".join(lines) or "暂无进行中的广播"
+
+    @classmethod
+    def get_instance(cls) -> Self:
+        if not cls.instance:
+            cls.instance = cls()
+        return cls.instance
+
+
+# 会话在数据库关闭前写入，需先停止广播
+DatabaseManage.get_instance().add_close_hook(
+    BroadcastEngine.get_instance().stop)
+
+
+@driver.on_bot_connect
+async def _():
+    engine = BroadcastEngine.get_instance()
+    # 仅在首个Bot连接时执行一次
+    if not engine.resume_task:
+        engine.resume_task = asyncio.create_task(engine.resume())
@@ -13,7 +13,7 @@ from .logger import logger
 from .config import GroupNoticeSession
 
 from ..os_bot_base.depends import SessionDepend, AdapterDepend, Adapter
-from ..os_bot_base.util import matcher_exception_try, only_command
+from ..os_bot_base.util import matcher_exception_try, only_command, http_request
 from ..os_bot_base.exception import MatcherErrorFinsh
 
 notice_enable = on_command("启用群聊提醒",
@@ -92,9 +92,9 @@ async def download_to_base64(url: str,
     maxsize = maxsize_kb * 1024
     timeout = 15
     try:
-        req = aiohttp.request("get",
-                              url,
-                              timeout=aiohttp.ClientTimeout(total=10))
+        req = http_request("get",
+                           url,
+                           timeout=aiohttp.ClientTimeout(total=10))
         async with req as resp:
             code = resp.status
             if code != 200:
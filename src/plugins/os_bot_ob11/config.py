@@ -11,6 +11,11 @@ class Config(BaseSettings):
         工具插件
     """
     withdraw_max_size: int = Field(default=100)
+    """每个会话保留的可撤回消息数"""
+    withdraw_max_conversations: int = Field(default=1000)
+    """保留可撤回消息的会话数，超出时淘汰最久未发送消息的会话"""
+    withdraw_persist: bool = Field(default=False)
+    """是否持久化可撤回消息（重启后仍可撤回）"""
 
     class Config:
         extra = "ignore"
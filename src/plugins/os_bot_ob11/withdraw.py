@@ -9,6 +9,7 @@
     为了防止玩坏，增加权限限制
 """
 from typing import Any, Dict, List, Tuple, Optional, Union
+from typing_extensions import Self
 
 from nonebot.plugin import PluginMetadata
 from nonebot.adapters import Bot as BaseBot
@@ -35,12 +36,16 @@ from nonebot.adapters.onebot.v12 import (
 
 from .config import Config
 
+from ..os_bot_base import Session
+from ..os_bot_base.session import StoreSerializable
+from ..os_bot_base.depends import get_plugin_session
 from ..os_bot_base.permission import PermManage, perm_check_permission
 from ..os_bot_base.util import matcher_exception_try
 
 PermManage.register("撤回", "允许群成员使用撤回功能", auth=False, only_super_oprate=True)
 
-withdraw_config = Config.parse_obj(get_driver().config.dict())
+driver = get_driver()
+withdraw_config = Config.parse_obj(driver.config.dict())
 
 # __plugin_meta__ = PluginMetadata(
 #     name="撤回",
@@ -55,10 +60,131 @@ withdraw_config = Config.parse_obj(get_driver().config.dict())
 #     },
 # )
 
-msg_ids: Dict[str, List[str]] = {}
 max_size = withdraw_config.withdraw_max_size
 
 
+class MessageIdRing(StoreSerializable):
+    """
+        单个会话的可撤回消息ID（定长环形缓冲区）
+
+        追加及按倒数序号查询均为O(1)，移除时仅移动其后的消息
+    """
+    __slots__ = ("_items", "_head", "_size")
+
+    def __init__(self, capacity: int = 100) -> None:
+        self._items: List[Optional[str]] = [None] * max(capacity, 1)
+        self._head = 0
+        """下一条消息的写入位置"""
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def append(self, msg_id: str) -> None:
+        capacity = len(self._items)
+        self._items[self._head] = msg_id
+        self._head = (self._head + 1) % capacity
+        self._size = min(self._size + 1, capacity)
+
+    def last(self, num: int) -> Optional[str]:
+        """
+            倒数第`num`条消息（从0开始）
+        """
+        if not 0 <= num < self._size:
+            return None
+        return self._items[(self._head - 1 - num) % len(self._items)]
+
+    def remove(self, msg_id: str) -> bool:
+        capacity = len(self._items)
+        for num in range(self._size):
+            if self.last(num) != msg_id:
+                continue
+            # 较新的消息依次前移填补空位
+            for i in range(num, 0, -1):
+                self._items[(self._head - 1 - i) %
+                            capacity] = self.last(i - 1)
+            self._head = (self._head - 1) % capacity
+            self._items[self._head] = None
+            self._size -= 1
+            return True
+        return False
+
+    def to_list(self) -> List[str]:
+        """
+            由旧到新的消息ID
+        """
+        return [
+            self.last(num) for num in range(self._size - 1, -1, -1)
+        ]  # type: ignore
+
+    def _serializable(self) -> Dict[str, Any]:
+        return {"ids": self.to_list()}
+
+    def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
+        for msg_id in self_dict.get("ids", []):
+            self.append(msg_id)
+        return self
+
+
+class WithdrawSession(Session):
+    """
+        可撤回消息存储
+
+        会话按最近发送顺序排列，超出`withdraw_max_conversations`时淘汰最久未发送消息的会话
+    """
+
+    rings: Dict[str, MessageIdRing]
+    """会话->可撤回消息ID"""
+
+    def __init__(self, *args, key: str = "default", **kws):
+        super().__init__(*args, key=key, **kws)
+        self.rings = {}
+
+    def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
+        self.__dict__.update(self_dict)
+        load_map: Dict[str, Dict[str, Any]] = self.rings  # type: ignore
+        self.rings = {}
+        for key in load_map:
+            self.rings[key] = MessageIdRing(max_size)._init_from_dict(
+                load_map[key])
+        return self
+
+    def get(self, key: str) -> Optional[MessageIdRing]:
+        return self.rings.get(key)
+
+    async def append(self, key: str, msg_id: str) -> None:
+        ring = self.rings.pop(key, None) or MessageIdRing(max_size)
+        ring.append(msg_id)
+        self.rings[key] = ring
+        while len(self.rings) > max(
+                withdraw_config.withdraw_max_conversations, 1):
+            del self.rings[next(iter(self.rings))]
+        await self.mark_dirty()
+
+    async def remove(self, key: str, msg_id: str) -> None:
+        ring = self.rings.get(key)
+        if ring and ring.remove(msg_id):
+            await self.mark_dirty()
+
+    async def mark_dirty(self) -> None:
+        if self._session_manage:
+            # 延迟写入模式下仅标记，由定时任务统一写入
+            await self.save()
+
+
+store = WithdrawSession()
+"""未开启持久化时仅保存在内存中"""
+
+
+@driver.on_startup
+async def _():
+    global store
+    if not withdraw_config.withdraw_persist:
+        return
+    store = await get_plugin_session(WithdrawSession)
+    await store._lock()
+
+
 def get_key(bot: BaseBot, msg_type: str, id: str, sub_id: str = ""):
     key = f"{bot.self_id}_{msg_type}_{id}"
     if sub_id:
@@ -83,11 +209,7 @@ async def save_msg_id_v11(bot: BaseBot, e: Optional[Exception], api: str,
         key = get_key(bot, msg_type, id)
         msg_id = str(result["message_id"])
 
-        if key not in msg_ids:
-            msg_ids[key] = []
-        msg_ids[key].append(msg_id)
-        if len(msg_ids) > max_size:
-            msg_ids[key].pop(0)
+        await store.append(key, msg_id)
     except Exception:
         pass
 
@@ -113,11 +235,7 @@ async def save_msg_id_v12(bot: BaseBot, e: Optional[Exception], api: str,
         key = get_key(bot, msg_type, id, sub_id)
         msg_id = result["message_id"]
 
-        if key not in msg_ids:
-            msg_ids[key] = []
-        msg_ids[key].append(msg_id)
-        if len(msg_ids) > max_size:
-            msg_ids[key].pop(0)
+        await store.append(key, msg_id)
     except Exception:
         pass
 
@@ -125,11 +243,8 @@ async def save_msg_id_v12(bot: BaseBot, e: Optional[Exception], api: str,
 V12Bot.on_called_api(save_msg_id_v12)
 
 
-def remove_msg_id(key: str, msg_id: str):
-    print(msg_ids)
-    if key in msg_ids and msg_id in msg_ids[key]:
-        msg_ids[key].remove(msg_id)
-    print(msg_ids)
+async def remove_msg_id(key: str, msg_id: str):
+    await store.remove(key, msg_id)
 
 
 # 命令前缀为空则需要to_me，否则不需要
@@ -182,23 +297,28 @@ async def _(
         msg_id = str(event.reply.message_id)
         try:
             await delete_message(msg_id)
-            remove_msg_id(key, msg_id)
+            await remove_msg_id(key, msg_id)
             return
         except Exception:
             await withdraw.finish("撤回失败，可能已超时")
 
+    ring = store.get(key)
+    if not ring:
+        return
+    ring_size = len(ring)
+
     def extract_num(text: str) -> Tuple[int, int]:
         if not text:
             return 0, 1
 
-        if text.isdigit() and 0 <= int(text) < len(msg_ids[key]):
+        if text.isdigit() and 0 <= int(text) < ring_size:
             return int(text), int(text) + 1
 
         nums = text.split("-")[:2]
         nums = [n.strip() for n in nums]
         if len(nums) == 2 and nums[0].isdigit() and nums[1].isdigit():
             start_num = int(nums[0])
-            end_num = min(int(nums[1]), len(msg_ids[key]))
+            end_num = min(int(nums[1]), ring_size)
             if end_num > start_num:
                 return start_num, end_num
         return 0, 1
@@ -207,11 +327,13 @@ async def _(
     start_num, end_num = extract_num(text)
 
     res = ""
-    message_ids = [msg_ids[key][-num - 1] for num in range(start_num, end_num)]
+    message_ids = [ring.last(num) for num in range(start_num, end_num)]
     for message_id in message_ids:
+        if message_id is None:
+            continue
         try:
             await delete_message(message_id)
-            msg_ids[key].remove(message_id)
+            await store.remove(key, message_id)
         except Exception:
             if not res:
                 res = "撤回失败，可能已超时"
@@ -226,20 +348,19 @@ withdraw_notice = on_notice()
 
 
 @withdraw_notice.handle()
-def _(bot: V11Bot, event: GroupRecallNoticeEvent):
+async def _(bot: V11Bot, event: GroupRecallNoticeEvent):
     if str(event.user_id) != bot.self_id:
         return
     msg_id = str(event.message_id)
     id = str(event.group_id)
     key = get_key(bot, "group", id)
-    remove_msg_id(key, msg_id)
+    await remove_msg_id(key, msg_id)
 
 
 @withdraw_notice.handle()
-def _(bot: V12Bot, event: Union[GroupMessageDeleteEvent,
+async def _(bot: V12Bot, event: Union[GroupMessageDeleteEvent,
                                 ChannelMessageDeleteEvent]):
     msg_id = event.message_id
-    print(msg_id)
     if isinstance(event, GroupMessageDeleteEvent):
         msg_type = "group"
         id = event.group_id
@@ -249,4 +370,4 @@ def _(bot: V12Bot, event: Union[GroupMessageDeleteEvent,
         id = event.guild_id
         sub_id = event.channel_id
     key = get_key(bot, msg_type, id, sub_id)
-    remove_msg_id(key, msg_id)
+    await remove_msg_id(key, msg_id)
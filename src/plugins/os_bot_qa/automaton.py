@@ -0,0 +1,82 @@
+"""
+    # 多模式匹配自动机
+
+    Aho-Corasick 自动机，一次扫描找出文本中出现的全部模式串，耗时与模式串数量无关。
+"""
+from collections import deque
+from typing import Dict, FrozenSet, Iterable, List, Set
+
+
+class AhoCorasick:
+    """
+        Aho-Corasick 自动机
+
+        - `patterns` 模式串（空串及重复项将被忽略）
+    """
+
+    def __init__(self, patterns: Iterable[str]) -> None:
+        self.patterns: List[str] = []
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[int] = [-1]
+        """以该节点结尾的模式串下标，-1为无"""
+        self._output_link: List[int] = [0]
+        """失败链上最近的带输出节点，0为无"""
+        for pattern in patterns:
+            self._add(pattern)
+        self.pattern_set: FrozenSet[str] = frozenset(self.patterns)
+        self._build()
+
+    def _add(self, pattern: str) -> None:
+        if not pattern:
+            return
+        goto = self._goto
+        node = 0
+        for char in pattern:
+            child = goto[node].get(char)
+            if child is None:
+                child = len(goto)
+                goto.append({})
+                self._fail.append(0)
+                self._output.append(-1)
+                self._output_link.append(0)
+                goto[node][char] = child
+            node = child
+        if self._output[node] == -1:
+            self._output[node] = len(self.patterns)
+            self.patterns.append(pattern)
+
+    def _build(self) -> None:
+        goto, fail, output, output_link = self._goto, self._fail, self._output, self._output_link
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in goto[node].items():
+                queue.append(child)
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                target = goto[state].get(char, 0)
+                fail[child] = target if target != child else 0
+                target = fail[child]
+                output_link[child] = target if output[target] != -1 else output_link[target]
+
+    def find(self, text: str) -> Set[str]:
+        """
+            返回文本中出现的全部模式串
+        """
+        goto, fail, output, output_link = self._goto, self._fail, self._output, self._output_link
+        found: Set[int] = set()
+        node = 0
+        for char in text:
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+            state = node if output[node] != -1 else output_link[node]
+            while state:
+                found.add(output[state])
+                state = output_link[state]
+        return {self.patterns[i] for i in found}
+
+    def __len__(self) -> int:
+        return len(self.patterns)
@@ -1,19 +1,23 @@
+from itertools import count
 from time import time
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional, Tuple
 from typing_extensions import Self
-from pydantic import BaseSettings
+from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from nonebot.plugin import PluginMetadata
 from dataclasses import dataclass, field
 
 from ..os_bot_base.session import Session, StoreSerializable
 from ..os_bot_base.consts import META_AUTHOR_KEY, META_ADMIN_USAGE, META_SESSION_KEY, META_PLUGIN_ALIAS, META_DEFAULT_SWITCH
+from .automaton import AhoCorasick
 
 
 class Config(BaseSettings):
     """
         工具插件
     """
+    qa_merged_index_size: int = Field(default=128)
+    """缓存的群组与全局合并索引数量"""
 
     class Config:
         extra = "ignore"
@@ -54,11 +58,72 @@ class QAUnit(StoreSerializable):
     create_time: int = field(default_factory=(lambda: int(time())), init=False)
 
 
+class QAIndex:
+    """
+        问答匹配索引
+
+        按原有优先级（问题、别名）排列全部条目，关键词与模糊模式通过自动机一次扫描匹配，完全匹配模式使用哈希查找。
+
+        - `entries` 按优先级排列的(匹配文本, 问答)
+        - `automaton` 可复用的自动机，模式串集合不变时不重新构建
+    """
+
+    def __init__(self,
+                 entries: List[Tuple[str, QAUnit]],
+                 automaton: Optional[AhoCorasick] = None) -> None:
+        self.entries = entries
+        self._contains: Dict[str, List[int]] = {}
+        """匹配文本->条目位置（关键词、模糊）"""
+        self._full: Dict[str, List[int]] = {}
+        """匹配文本->条目位置（完全）"""
+        for i, (queston, unit) in enumerate(entries):
+            if unit.mode in (QAMode.KEY, QAMode.LIKE):
+                self._contains.setdefault(queston, []).append(i)
+            elif unit.mode == QAMode.FULL:
+                self._full.setdefault(queston, []).append(i)
+            else:
+                from .logger import logger
+                logger.warning("未知的问答模式：{}", unit)
+        if automaton is None or automaton.pattern_set != self._contains.keys():
+            automaton = AhoCorasick(self._contains)
+        self.automaton = automaton
+
+    @classmethod
+    def merge(cls,
+              first: "QAIndex",
+              second: "QAIndex",
+              previous: Optional["QAIndex"] = None) -> "QAIndex":
+        """
+            合并两个索引，`first`中的条目优先
+        """
+        return cls(first.entries + second.entries,
+                   previous.automaton if previous else None)
+
+    def match(self, text: str) -> List[Tuple[str, QAUnit]]:
+        """
+            按优先级返回可被`text`触发的全部(匹配文本, 问答)
+        """
+        positions: List[int] = list(self._full.get(text, ()))
+        for queston in self.automaton.find(text):
+            for i in self._contains[queston]:
+                unit = self.entries[i][1]
+                if unit.mode == QAMode.LIKE and len(text) > len(queston) * 25:
+                    continue
+                positions.append(i)
+        positions.sort()
+        return [self.entries[i] for i in positions]
+
+
+_version_counter = count(1)
+"""问答库版本号（进程内唯一）"""
+
+
 class QASession(Session):
 
     QAList: Dict[str, QAUnit]
     _alias_index: Dict[str, List[QAUnit]]
     _alias_index_generate_time: float
+    _version: int
 
     global_enable: bool = True
 
@@ -67,6 +132,7 @@ class QASession(Session):
         self.QAList = {}
         self._alias_index = {}
         self._alias_index_generate_time = 0
+        self._version = next(_version_counter)
 
     def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
         self.__dict__.update(self_dict)
@@ -78,14 +144,24 @@ class QASession(Session):
             unit = QAUnit._load_from_dict(tmp_list[key])
             self.QAList[unit.queston] = unit
 
-        self.generate_index()
+        self.touch()
 
         return self
 
     async def save(self):
-        self.generate_index()
+        self.touch()
         return await super().save()
 
+    def touch(self) -> None:
+        """
+            标记问答库已变更，索引将在下次使用时重建
+        """
+        self._version = next(_version_counter)
+
+    @property
+    def version(self) -> int:
+        return self._version
+
     def generate_index(self):
         self._alias_index = {}
         self._alias_index_generate_time = time()
@@ -96,6 +172,17 @@ class QASession(Session):
                     self._alias_index[alia] = []
                 self._alias_index[alia].append(unit)
 
+    def index_entries(self) -> List[Tuple[str, QAUnit]]:
+        """
+            按优先级（问题、别名）生成索引条目
+        """
+        self.generate_index()
+        entries: List[Tuple[str, QAUnit]] = list(self.QAList.items())
+        for alia in self._alias_index:
+            for unit in self._alias_index[alia]:
+                entries.append((alia, unit))
+        return entries
+
 
 __plugin_meta__ = PluginMetadata(
     name="问答",
@@ -0,0 +1,136 @@
+"""
+    # 问答索引管理
+
+    - 每个问答库按版本号缓存编译后的索引，版本变化后在下次使用时于后台线程重建
+    - 群组问答库与全局问答库的合并索引按群组缓存，任一方变化时重建，回复消息只需一次查询
+    - 同一版本的并发请求共享同一次构建
+"""
+import asyncio
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from time import time
+from typing import Optional, Tuple
+from typing_extensions import Self
+from cacheout import LRUCache
+from ..os_bot_base.util import AsyncPool
+from .config import QAIndex, QASession, config
+from .logger import logger
+
+
+class LibraryIndexState:
+    """
+        单个问答库的索引状态
+    """
+
+    def __init__(self) -> None:
+        self.version = 0
+        self.index: Optional[QAIndex] = None
+        self.building_version = 0
+        self.building: Optional["asyncio.Future[QAIndex]"] = None
+
+
+class QAIndexManage:
+    """
+        问答索引管理器
+    """
+    instance: Optional[Self] = None
+
+    def __init__(self) -> None:
+        self.pool = AsyncPool(ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="os_qa_index"),
+                              name="问答索引")
+        self._libraries: "weakref.WeakKeyDictionary[QASession, LibraryIndexState]" = weakref.WeakKeyDictionary(
+        )
+        """问答库->索引状态（`Session`被回收后自动释放）"""
+        self._merged = LRUCache(maxsize=max(config.qa_merged_index_size, 1))
+        """(群组库, 全局库)->(群组索引, 全局索引, 合并索引)"""
+        self.build_count = 0
+        self.merge_count = 0
+
+    async def _build(self, session: QASession,
+                     previous: Optional[QAIndex]) -> QAIndex:
+        # 条目快照在事件循环中生成，避免与修改操作并发
+        entries = session.index_entries()
+        start_time = time()
+        index = await self.pool.submit(
+            QAIndex, entries, previous.automaton if previous else None)
+        self.build_count += 1
+        logger.debug("问答库索引已重建 {} 条目{} 耗时{:.3f}s", session.key,
+                     len(entries),
+                     time() - start_time)
+        return index
+
+    async def library(self, session: QASession) -> QAIndex:
+        """
+            获取问答库的索引
+        """
+        state = self._libraries.get(session)
+        if state is None:
+            state = self._libraries[session] = LibraryIndexState()
+        if state.index and state.version == session.version:
+            return state.index
+        if not state.building or state.building_version != session.version:
+            state.building_version = session.version
+            state.building = asyncio.ensure_future(
+                self._build(session, state.index))
+        building, version = state.building, state.building_version
+        try:
+            index = await asyncio.shield(building)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            if state.building is building:
+                state.building = None
+            raise
+        if version > state.version:
+            state.version, state.index = version, index
+        if state.building is building:
+            state.building = None
+        return index
+
+    async def _merge(self, group_index: QAIndex, global_index: QAIndex,
+                     previous: Optional[QAIndex]) -> QAIndex:
+        index = await self.pool.submit(QAIndex.merge, group_index,
+                                       global_index, previous)
+        self.merge_count += 1
+        return index
+
+    async def merged(
+            self, group: Optional[QASession],
+            global_: Optional[QASession]) -> Optional[QAIndex]:
+        """
+            获取群组与全局合并后的索引（群组条目优先）
+
+            任一方为`None`时返回另一方的索引
+        """
+        if group is None or global_ is None:
+            session = group or global_
+            return await self.library(session) if session else None
+        group_index = await self.library(group)
+        global_index = await self.library(global_)
+        key: Tuple[str, str] = (group.key, global_.key)
+        cached = self._merged.get(key)
+        if cached and cached[0] is group_index and cached[1] is global_index:
+            return await asyncio.shield(cached[2])
+        previous = None
+        if cached and cached[2].done() and not cached[2].cancelled(
+        ) and not cached[2].exception():
+            previous = cached[2].result()
+        building = asyncio.ensure_future(
+            self._merge(group_index, global_index, previous))
+        self._merged.set(key, (group_index, global_index, building))
+        try:
+            return await asyncio.shield(building)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            cached = self._merged.get(key)
+            if cached and cached[2] is building:
+                self._merged.delete(key)
+            raise
+
+    @classmethod
+    def get_instance(cls) -> Self:
+        if not cls.instance:
+            cls.instance = cls()
+        return cls.instance
@@ -14,10 +14,11 @@ from nonebot.adapters.onebot.v11.permission import GROUP_ADMIN, GROUP_OWNER, PRI
 from nonebot.params import CommandArg, EventMessage, RawCommand, T_State
 from .logger import logger
 from .config import QAMode, QASession, QAUnit
+from .index import QAIndexManage
 
 from ..os_bot_base.depends import SessionDepend, ArgMatchDepend, AdapterDepend, Adapter, SessionPluginDepend
 from ..os_bot_base.argmatch import PageArgMatch
-from ..os_bot_base.util import matcher_exception_try, only_command
+from ..os_bot_base.util import matcher_exception_try, only_command, http_request
 from ..os_bot_base.permission import PermManage, perm_check_permission
 from ..os_bot_base.exception import MatcherErrorFinsh
 
@@ -41,9 +42,9 @@ async def download_to_base64(url: str,
     maxsize = maxsize_kb * 1024
     timeout = 15
     try:
-        req = aiohttp.request("get",
-                              url,
-                              timeout=aiohttp.ClientTimeout(total=10))
+        req = http_request("get",
+                           url,
+                           timeout=aiohttp.ClientTimeout(total=10))
         async with req as resp:
             code = resp.status
             if code != 200:
@@ -818,47 +819,15 @@ async def _(matcher: Matcher,
     msg_str = str(msg).strip()
     qa_keys = set()
 
-    def use_qa_unit(queston, qa_unit: QAUnit) -> bool:
-        if qa_unit.mode == QAMode.KEY:
-            if queston in msg_str:
-                return True
-        elif qa_unit.mode == QAMode.FULL:
-            if queston == msg_str:
-                return True
-        elif qa_unit.mode == QAMode.LIKE:
-            if queston in msg_str and len(msg_str) <= len(queston) * 25:
-                return True
-        else:
-            logger.warning("未知的问答模式：{}", qa_unit)
-        return False
-
-    async def select_answers(queston, qa_unit: QAUnit):
-        if not use_qa_unit(queston, qa_unit):
-            return
-        qa_keys.add(qa_unit.queston)
-
     async def find_qa():
-        if g_session.QAList:
-            for queston in g_session.QAList:
-                qa_unit = g_session.QAList[queston]
-                await select_answers(queston, qa_unit)
-
-            for queston in g_session._alias_index:
-                alia_units = g_session._alias_index[queston]
-                for alia_unit in alia_units:
-                    await select_answers(queston, alia_unit)
-
-        if not g_session.global_enable or not p_session.global_enable or not p_session.QAList:
+        use_global = g_session.global_enable and p_session.global_enable and p_session.QAList
+        index = await QAIndexManage.get_instance().merged(
+            g_session if g_session.QAList else None,
+            p_session if use_global else None)
+        if not index:
             return
-
-        for queston in p_session.QAList:
-            qa_unit = p_session.QAList[queston]
-            await select_answers(queston, qa_unit)
-
-        for queston in p_session._alias_index:
-            alia_units = p_session._alias_index[queston]
-            for alia_unit in alia_units:
-                await select_answers(queston, alia_unit)
+        for _, qa_unit in index.match(msg_str):
+            qa_keys.add(qa_unit.queston)
 
     await find_qa()
     if not qa_keys:
@@ -881,23 +850,7 @@ async def _(matcher: Matcher,
         return
     msg_str = str(msg).strip()
 
-    def use_qa_unit(queston, qa_unit: QAUnit) -> bool:
-        if qa_unit.mode == QAMode.KEY:
-            if queston in msg_str:
-                return True
-        elif qa_unit.mode == QAMode.FULL:
-            if queston == msg_str:
-                return True
-        elif qa_unit.mode == QAMode.LIKE:
-            if queston in msg_str and len(msg_str) <= len(queston) * 25:
-                return True
-        else:
-            logger.warning("未知的问答模式：{}", qa_unit)
-        return False
-
-    async def select_answers(queston, qa_unit: QAUnit):
-        if not use_qa_unit(queston, qa_unit):
-            return
+    async def select_answers(qa_unit: QAUnit):
         if len(qa_unit.answers) == 0:
             return
         if qa_unit.hit_probability != 100:
@@ -911,27 +864,15 @@ async def _(matcher: Matcher,
         matcher.stop_propagation()
         await matcher.finish(v11.Message(qa_unit.answers[rand_i]))
 
-    if g_session.QAList:
-        for queston in g_session.QAList:
-            qa_unit = g_session.QAList[queston]
-            await select_answers(queston, qa_unit)
-
-        for queston in g_session._alias_index:
-            alia_units = g_session._alias_index[queston]
-            for alia_unit in alia_units:
-                await select_answers(queston, alia_unit)
-
-    if not g_session.global_enable or not p_session.global_enable or not p_session.QAList:
+    use_global = g_session.global_enable and p_session.global_enable and p_session.QAList
+    index = await QAIndexManage.get_instance().merged(
+        g_session if g_session.QAList else None,
+        p_session if use_global else None)
+    if not index:
         return
 
-    for queston in p_session.QAList:
-        qa_unit = p_session.QAList[queston]
-        await select_answers(queston, qa_unit)
-
-    for queston in p_session._alias_index:
-        alia_units = p_session._alias_index[queston]
-        for alia_unit in alia_units:
-            await select_answers(queston, alia_unit)
+    for _, qa_unit in index.match(msg_str):
+        await select_answers(qa_unit)
 
 
 qa_enable_global = on_command("启用全局问答库",
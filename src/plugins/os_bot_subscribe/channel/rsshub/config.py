@@ -12,6 +12,12 @@ class Config(BaseSettings):
     """订阅超时时间"""
     os_subscribe_rsshub_urls: List[str] = Field(default_factory=list)
     """订阅链接，默认使用列表中的第一个作为测试源"""
+    os_subscribe_rsshub_mirror_concurrency: int = Field(default=2)
+    """每个订阅链接同时进行的最大请求数"""
+    os_subscribe_rsshub_error_cooldown: int = Field(default=60)
+    """订阅链接连续失败后暂停使用的时间(秒)"""
+    os_subscribe_rsshub_seen_size: int = Field(default=200)
+    """每个订阅持久记录的已推送条目数（用于去重）"""
 
     class Config:
         extra = "ignore"
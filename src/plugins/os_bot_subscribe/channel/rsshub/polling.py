@@ -1,26 +1,26 @@
 import asyncio
 import random
-from time import localtime, strftime, time
-from typing import Any, Dict, List, Optional, Union
+from time import time
+from typing import Any, Dict, Iterable, List, Optional, Set, Union
 from typing_extensions import Self
 from nonebot import get_driver
 from nonebot.adapters.onebot import v11
 from nonebot_plugin_apscheduler import scheduler
 from cacheout import Cache
 from cacheout.memoization import memoize
-from itertools import cycle
+from functools import partial
 
 from .subchannel import RsshubChannel, RsshubChannelSession, SubscribeInfoData
 
-from ...utils.rss import RssChannelData
-from ...utils.rss.exception import RssRequestIgnore
+from ...utils.rss import RssChannelData, RssSeenIndex
+from ...utils.rss.exception import RssRequestIgnore, RssNotModified
 from ..factory import channel_factory
 from ...model import SubscribeModel
 from ...logger import logger
 from ...exception import BaseException
 from .config import config
 
-from ....os_bot_base.util import seconds_to_dhms, inhibiting_exception
+from ....os_bot_base.util import inhibiting_exception
 from ....os_bot_base.depends import get_plugin_session
 from ....os_bot_base import Session
 
@@ -33,6 +33,8 @@ class RsshubPollSession(Session):
     """频道启用状态 channel_id->enable"""
     subscribe_update_timestamps: Dict[str, int]
     """订阅更新时间戳 channel_id_subscribe->timestamps"""
+    seen_indexes: Dict[str, RssSeenIndex]
+    """已推送条目索引 channel_id_subscribe->RssSeenIndex"""
     _channel_data: Dict[str, RssChannelData]
     """频道缓存数据 channel_id_subscribe->RssChannelData"""
 
@@ -40,12 +42,42 @@ class RsshubPollSession(Session):
         super().__init__(*args, key=key, **kws)
         self.channel_enables = {}
         self.subscribe_update_timestamps = {}
+        self.seen_indexes = {}
         self._channel_data = {}
 
     def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
         self.__dict__.update(self_dict)
+        load_map: Dict[str, Dict[str, Any]] = self.seen_indexes  # type: ignore
+        self.seen_indexes = {}
+        for key in load_map:
+            self.seen_indexes[key] = RssSeenIndex(
+                config.os_subscribe_rsshub_seen_size)._init_from_dict(
+                    load_map[key])
         return self
 
+    def get_seen_index(self, cache_key: str) -> Optional[RssSeenIndex]:
+        return self.seen_indexes.get(cache_key)
+
+    def create_seen_index(self, cache_key: str) -> RssSeenIndex:
+        index = RssSeenIndex(config.os_subscribe_rsshub_seen_size)
+        self.seen_indexes[cache_key] = index
+        return index
+
+    def prune_seen_indexes(self, channel: RsshubChannel,
+                           listeners: Iterable[str]) -> int:
+        """
+            移除已取消订阅的已推送条目索引
+        """
+        prefix = f"{channel.channel_id}_"
+        keep = {f"{prefix}{listener}" for listener in listeners}
+        keys = [
+            key for key in self.seen_indexes
+            if key.startswith(prefix) and key not in keep
+        ]
+        for key in keys:
+            del self.seen_indexes[key]
+        return len(keys)
+
     def enable_channel(self, channel: RsshubChannel):
         self.channel_enables[channel.channel_id] = True
 
@@ -99,19 +131,133 @@ def rsshub_subscribe_invalid_subtype_cache(channel_subtype: str):
     _model_get_listeners_map.cache.delete(key)
 
 
+class RsshubMirror:
+    """
+        Rsshub订阅源地址状态
+
+        记录平滑后的延迟及错误率，连续失败时暂停使用一段时间
+    """
+    __slots__ = ("url", "inflight", "latency", "error_rate",
+                 "consecutive_errors", "cooldown_until", "request_count",
+                 "error_count", "next_times")
+
+    def __init__(self, url: str) -> None:
+        self.url = url
+        self.inflight = 0
+        self.latency: float = 1
+        """平滑延迟(s)"""
+        self.error_rate: float = 0
+        """平滑错误率"""
+        self.consecutive_errors = 0
+        self.cooldown_until: float = 0
+        self.request_count = 0
+        self.error_count = 0
+        self.next_times: Dict[str, float] = {}
+        """频道ID->此地址下一次可请求该频道的时间"""
+
+    def record(self, latency: float, success: bool) -> None:
+        self.request_count += 1
+        self.latency = self.latency * 0.8 + latency * 0.2
+        self.error_rate = self.error_rate * 0.8 + (0 if success else 0.2)
+        if success:
+            self.consecutive_errors = 0
+            return
+        self.error_count += 1
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= 3:
+            self.cooldown_until = time(
+            ) + config.os_subscribe_rsshub_error_cooldown
+
+    def score(self) -> float:
+        """预计耗时评分，越小越好"""
+        return self.latency / max(1 - self.error_rate, 0.05)
+
+
+class RsshubMirrorPool:
+    """
+        Rsshub订阅源地址调度
+
+        - 每个地址的并发请求数受`os_subscribe_rsshub_mirror_concurrency`限制
+        - 每个地址对同一频道的请求间隔遵循频道的`poll_interval`
+        - 优先选择评分更好（更快、更稳定）的地址，暂停中的地址仅在没有其它可用地址时使用
+    """
+
+    def __init__(self, urls: List[str]) -> None:
+        self.mirrors = [RsshubMirror(url) for url in urls]
+        self._released = asyncio.Event()
+
+    def _available(self, channel: RsshubChannel,
+                   now: float) -> Optional[RsshubMirror]:
+        limit = max(config.os_subscribe_rsshub_mirror_concurrency, 1)
+        candidates = [
+            mirror for mirror in self.mirrors if mirror.inflight < limit
+            and mirror.next_times.get(channel.channel_id, 0) <= now
+        ]
+        if not candidates:
+            return None
+        healthy = [
+            mirror for mirror in candidates if mirror.cooldown_until <= now
+        ]
+        if not healthy and any(mirror.cooldown_until <= now
+                               for mirror in self.mirrors):
+            # 仍有健康的地址，等待其空闲
+            return None
+        return min(healthy or candidates, key=lambda mirror: mirror.score())
+
+    async def acquire(self, channel: RsshubChannel) -> RsshubMirror:
+        """
+            等待并占用一个可用地址
+        """
+        while True:
+            now = time()
+            mirror = self._available(channel, now)
+            if mirror:
+                mirror.inflight += 1
+                mirror.next_times[channel.channel_id] = now + random.randint(
+                    *channel.poll_interval) / 1000
+                return mirror
+            wait = min(
+                (max(mirror.next_times.get(channel.channel_id, 0), mirror.
+                     cooldown_until) - now for mirror in self.mirrors),
+                default=1)
+            self._released.clear()
+            try:
+                await asyncio.wait_for(self._released.wait(),
+                                       timeout=min(max(wait, 0.05), 5))
+            except asyncio.TimeoutError:
+                pass
+
+    def release(self, mirror: RsshubMirror, latency: float,
+                success: bool) -> None:
+        mirror.inflight -= 1
+        mirror.record(latency, success)
+        self._released.set()
+
+    def status(self) -> str:
+        return "\n".join(
+            f"{mirror.url}{'(暂停)' if mirror.cooldown_until > time() else ''} "
+            f"请求/失败:{mirror.request_count}/{mirror.error_count} "
+            f"延迟:{mirror.latency:.2f}s 错误率:{mirror.error_rate*100:.0f}% 并发:{mirror.inflight}"
+            for mirror in self.mirrors)
+
+
+mirror_pool: Optional[RsshubMirrorPool] = None
+
+
 """
     RSShub轮询方式
 
-    每个频道单独轮询，按照频道设计的轮询间隔进行
+    每个频道单独调度，每个订阅拥有独立的下次更新时间，请求并发分发到各订阅源地址
 
-    更新逻辑，基于RSS发布时间及更新时间戳
+    订阅的更新周期为 订阅数 * 频道请求间隔 / 地址数（不小于频道请求间隔），与逐个轮询时的总请求速率一致
 
-    rss发布时间更新且
+    更新逻辑，基于RSS发布时间及更新时间戳
 """
 
 
 @driver.on_startup
 async def _():
+    global mirror_pool
     if not config.os_subscribe_rsshub_enable:
         logger.info("Rsshub订阅已关闭")
         return
@@ -127,105 +273,161 @@ async def _():
     session: RsshubPollSession = await get_plugin_session(RsshubPollSession
                                                           )  # type: ignore
     await session._lock()
+    mirror_pool = RsshubMirrorPool(urls)
+    pool = mirror_pool
+
+    async def poll_listener(channel: RsshubChannel,
+                            channel_session: RsshubChannelSession,
+                            mirror: RsshubMirror, listener: str,
+                            subscribes: List[SubscribeModel]) -> None:
+        RssCls = channel.rss_cls
+        start_time = time()
+        success = False
+        try:
+            rss = RssCls(mirror.url,
+                         channel.subscribe_to_rsshub_path(
+                             listener, channel_session),
+                         source_type=channel.channel_type,
+                         source_subtype=channel.channel_subtype)
+
+            logger.debug("{}-{} Rsshub轮询请求 {}", channel.channel_type,
+                         channel.channel_subtype, rss.url)
+
+            cache_key = f"{channel.channel_id}_{listener}"
+
+            # 读取（已有缓存时使用条件请求，内容未变化则跳过解析）
+            channel_data = await rss.read(
+                conditional=cache_key in session._channel_data)
+            success = True
+
+            # 获取更新
+            subscribe_last_update_timestamp = session.subscribe_update_timestamps.get(
+                cache_key, 0)
+
+            last_data = session._channel_data.get(cache_key)
+            seen_index = None
+            if channel.seen_dedupe:
+                seen_index = session.get_seen_index(cache_key)
+                if not seen_index:
+                    # 首次订阅，仅记录现有条目
+                    seen_index = session.create_seen_index(cache_key)
+                    last_data = None
+                elif not last_data:
+                    # 重启后内存中没有上次数据，使用持久化的索引判断更新
+                    last_data = RssChannelData(updated=seen_index.updated)
+
+            if last_data:
+                # 更新推送
+                if channel_data.updated < last_data.updated:
+                    """发布时间小于上一次获取时间时拒绝使用此次更新信息"""
+                    return
+                await channel.polling_update(
+                    subscribes,
+                    last_data,
+                    channel_data,
+                    subscribe_last_update_timestamp,
+                    session.subscribe_update_timestamps.get(cache_key, 0),
+                    seen_index=seen_index)
+
+            session.subscribe_update_timestamps[cache_key] = int(time() *
+                                                                 1000)
+            if seen_index and seen_index.observe(channel_data):
+                await session.save()
+
+            # 缓存结果
+            session._channel_data[cache_key] = channel_data
+
+            # 缓存用于快速查询的内容
+            info = SubscribeInfoData(title=channel_data.title_full,
+                                     des=channel_data.des_full)
+            channel_session.set_subscribe_info(channel, listener, info)
+            await channel_session.save()
+        except RssNotModified:
+            success = True
+            session.subscribe_update_timestamps[cache_key] = int(time() *
+                                                                 1000)
+        except RssRequestIgnore as e:
+            success = True
+            logger.info("{}-{} 轮询请求可忽略异常: {}", channel.channel_type,
+                        channel.channel_subtype, type(e), str(e))
+        except BaseException as e:
+            logger.warning("{}-{} 轮询请求失败:{} - {}", channel.channel_type,
+                           channel.channel_subtype, type(e), str(e))
+        except Exception as e:
+            logger.opt(exception=True).error("轮询中发生意外的报错")
+        finally:
+            pool.release(mirror, time() - start_time, success)
 
     @inhibiting_exception()
     async def pool_loop(channel: RsshubChannel):
         logger.debug("Rsshub轮询启动 {} 的总订阅数 {}", channel.name,
                      len(await _model_get_listeners(channel.channel_subtype)))
-        RssCls = channel.rss_cls
 
-        url_cycle = cycle(urls)
         channel_session: RsshubChannelSession = await channel.get_session(
         )  # type: ignore
         await channel_session._lock()
 
+        due_times: Dict[str, float] = {}
+        """订阅->下次更新时间"""
+        running: Set[str] = set()
+        tasks: Set[asyncio.Task] = set()
+
+        def feed_period(listener_count: int) -> float:
+            interval = sum(channel.poll_interval) / 2 / 1000
+            return max(listener_count * interval / len(urls), interval)
+
+        def on_done(listener: str, listener_count: int,
+                    task: asyncio.Task) -> None:
+            tasks.discard(task)
+            running.discard(listener)
+            if listener in due_times:
+                due_times[listener] = time() + feed_period(listener_count)
+
         while True:
-            start_time = time()
+            if not session.is_enable_channel(channel):
+                await asyncio.sleep(15)
+                continue
 
             listeners = await _model_get_listeners(channel.channel_subtype)
             listener_maps = await _model_get_listeners_map(
                 channel.channel_subtype)
 
-            if len(listeners) > 5:
-                logger.debug("Rsshub轮询开始 {} - {}", channel.name, len(listeners))
-
+            now = time()
+            for listener in list(due_times):
+                if listener not in listener_maps:
+                    del due_times[listener]
+            if session.prune_seen_indexes(channel, listener_maps):
+                await session.save()
             for listener in listeners:
-                if not session.is_enable_channel(channel):
-                    await asyncio.sleep(15)
-                    continue
-                if not listener_maps.get(listener, None):
-                    logger.warning("{} - {} 订阅 {} 未绑定推送，跳过更新",channel.name,  channel.channel_id,
-                                   listener)
-                    continue
-                try:
-                    now_url = next(url_cycle)
-
-                    rss = RssCls(now_url,
-                                 channel.subscribe_to_rsshub_path(
-                                     listener, channel_session),
-                                 source_type=channel.channel_type,
-                                 source_subtype=channel.channel_subtype)
-
-                    logger.debug("{}-{} Rsshub轮询请求 {}", channel.channel_type,
-                                 channel.channel_subtype, rss.url)
-
-                    # 读取
-                    channel_data = await rss.read()
-                    cache_key = f"{channel.channel_id}_{listener}"
-
-                    # 获取更新
-                    subscribe_last_update_timestamp = session.subscribe_update_timestamps.get(
-                        cache_key, 0)
-
-                    if cache_key in session._channel_data:
-                        # 更新推送
-                        if channel_data.updated < session._channel_data[
-                                cache_key].updated:
-                            """发布时间小于上一次获取时间时拒绝使用此次更新信息"""
-                            # logger.debug(
-                            #     "{}-{} 发布时间小于上次更新 该数据已忽略 更新来源 - {}",
-                            #     channel.channel_id, listener,
-                            #     session._channel_data[cache_key].source_url)
-                            continue
-                        await channel.polling_update(
-                            listener_maps[listener],
-                            session._channel_data[cache_key], channel_data,
-                            subscribe_last_update_timestamp,
-                            session.subscribe_update_timestamps[cache_key])
-
-                    session.subscribe_update_timestamps[cache_key] = int(
-                        time() * 1000)
-
-                    # 缓存结果
-                    session._channel_data[cache_key] = channel_data
-
-                    # 缓存用于快速查询的内容
-                    info = SubscribeInfoData(title=channel_data.title_full,
-                                             des=channel_data.des_full)
-                    channel_session.set_subscribe_info(channel, listener, info)
-                except RssRequestIgnore as e:
-                    logger.info("{}-{} 轮询请求可忽略异常: {}", channel.channel_type,
-                                   channel.channel_subtype, type(e), str(e))
-                except BaseException as e:
-                    logger.warning("{}-{} 轮询请求失败:{} - {}", channel.channel_type,
-                                   channel.channel_subtype, type(e), str(e))
-                except Exception as e:
-                    logger.opt(exception=True).error("轮询中发生意外的报错")
-                await asyncio.sleep(
-                    max(random.randint(*channel.poll_interval) / len(urls) / 1000, 0.01))
+                if listener not in due_times:
+                    due_times[listener] = now
 
-            await channel_session.save()
-            end_time = time()
-            if len(listeners) > 10:
-                logger.info("Rsshub轮询完成 共 {} 订阅，耗时 {}", len(listeners),
-                            seconds_to_dhms(end_time - start_time))
-            elif len(listeners) > 5:
-                logger.debug("Rsshub轮询完成 共 {} 订阅，耗时 {}", len(listeners),
-                             seconds_to_dhms(end_time - start_time))
-            if len(listeners) <= 3:
+            waiting = [
+                listener for listener in due_times if listener not in running
+            ]
+            if not waiting:
                 await asyncio.sleep(5)
-            else:
-                await asyncio.sleep(max(random.randint(*channel.poll_interval) / len(urls) / 1000, 1))
+                continue
+            listener = min(waiting, key=lambda listener: due_times[listener])
+            delay = due_times[listener] - now
+            if delay > 0:
+                await asyncio.sleep(min(delay, 5))
+                continue
+            if not listener_maps.get(listener, None):
+                logger.warning("{} - {} 订阅 {} 未绑定推送，跳过更新", channel.name,
+                               channel.channel_id, listener)
+                due_times[listener] = now + feed_period(len(listeners))
+                continue
+
+            mirror = await pool.acquire(channel)
+            running.add(listener)
+            task = asyncio.create_task(
+                poll_listener(channel, channel_session, mirror, listener,
+                              listener_maps[listener]))
+            tasks.add(task)
+            task.add_done_callback(
+                partial(on_done, listener, len(listeners)))
+
     pools = []
 
     for subtype in channel_subtype_map:
@@ -2,7 +2,7 @@ import random
 import re
 from nonebot.adapters.onebot import v11
 from typing import Any, Dict, List, Optional, Tuple, Type, Union
-from ....utils.rss import Rss, RssChannelData, GeneralHTMLParser
+from ....utils.rss import Rss, RssChannelData, RssSeenIndex, GeneralHTMLParser
 from ....model import SubscribeModel
 from ....utils.options import Options
 from ....exception import BaseException
@@ -73,6 +73,15 @@ class RsshubChannel(BaseChannel):
     def rss_cls(self) -> Type[Rss]:
         return Rss
 
+    @property
+    def seen_dedupe(self) -> bool:
+        """
+            是否使用持久化的已推送条目索引去重
+
+            开启后重启后的首次轮询也会调用`polling_update`（`last_data`仅包含上次的发布时间）
+        """
+        return False
+
     def subscribe_to_rsshub_path(self, subscribe: str,
                                  session: RsshubChannelSession) -> str:
         """订阅ID转Rsshub路径"""
@@ -81,11 +90,14 @@ class RsshubChannel(BaseChannel):
     async def polling_update(self, subscribes: List[SubscribeModel],
                              last_data: RssChannelData,
                              now_data: RssChannelData, last_update_time: int,
-                             now_time: int):
+                             now_time: int,
+                             seen_index: Optional[RssSeenIndex] = None):
         """
             RSS轮询更新
 
             需要判断哪些
+
+            `seen_dedupe`开启时`seen_index`为该订阅的已推送条目索引（尚未加入本次数据）
         """
         raise NotImplementedError("need implemented function!")
 
@@ -11,10 +11,11 @@ import base64
 from typing import Any, Dict, List, Optional, Tuple
 from typing_extensions import Type
 from cacheout.memoization import lru_memoize
-from ....utils.rss import Rss, RssChannelData, RssItemData
+from ....utils.rss import Rss, RssChannelData, RssItemData, RssSeenIndex, get_parse_pool
 from ....model import SubscribeModel
 from ...factory import channel_factory
 from ....logger import logger
+from .....os_bot_base.util import http_request
 from ....exception import MatcherErrorFinsh, DownloadError, DownloadTooLargeError
 from . import RsshubChannelSession, RsshubChannel, Options, Option, v11, GeneralHTMLParser
 
@@ -54,10 +55,10 @@ async def download_with_resize_to_base64(url: str, width: int,
             'x-requested-with': 'XMLHttpRequest',
             'user-agent': randUserAgent()
         }
-        req = aiohttp.request("get",
-                              url,
-                              headers=headers,
-                              timeout=aiohttp.ClientTimeout(total=15))
+        req = http_request("get",
+                           url,
+                           headers=headers,
+                           timeout=aiohttp.ClientTimeout(total=15))
         async with req as resp:
             code = resp.status
             if code != 200:
@@ -158,16 +159,22 @@ class RsshubBilibiliDynamicChannel(RsshubChannel):
     def rss_cls(self) -> Type[Rss]:
         return Rss
 
+    @property
+    def seen_dedupe(self) -> bool:
+        return True
+
     async def polling_update(self, subscribes: List[SubscribeModel],
                              last_data: RssChannelData,
                              now_data: RssChannelData, last_update_time: int,
-                             now_time: int):
+                             now_time: int,
+                             seen_index: Optional[RssSeenIndex] = None):
         """
             RSS轮询更新
 
             需要判断哪些
         """
         update_data: List[RssItemData] = []
+        last_uuids = {item.uuid for item in last_data.entries}
         for data in now_data.entries:
             if data.published < last_data.updated:
                 """不推送已经更新过的数据"""
@@ -176,14 +183,10 @@ class RsshubBilibiliDynamicChannel(RsshubChannel):
                 """不推送延迟超过30分钟的数据"""
                 continue
 
-            skip = False
-            for last_data_unit in last_data.entries:
-                if data.uuid == last_data_unit.uuid:
-                    logger.debug("{}({}) 重复的元素 {}", self.channel_id,
-                                 now_data.source_url, data.uuid)
-                    skip = True
-                    break
-            if skip:
+            if data.uuid in last_uuids or (seen_index
+                                           and seen_index.seen(data.uuid)):
+                logger.debug("{}({}) 重复的元素 {}", self.channel_id,
+                             now_data.source_url, data.uuid)
                 continue
             update_data.append(data)
 
@@ -255,7 +258,7 @@ class RsshubBilibiliDynamicChannel(RsshubChannel):
 
         parser = GeneralHTMLParser(handle_image=handle_image, handle_rstrip=handle_rstrip, handle_text=handle_text)
 
-        parser.feed(text)
+        await get_parse_pool().submit(parser.feed, text)
         rtnmessage = v11.Message()
         message = v11.Message(parser.message)
         for msgseg in message:
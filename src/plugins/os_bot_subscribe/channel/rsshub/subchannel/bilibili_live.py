@@ -3,7 +3,7 @@
 """
 from typing import Any, Dict, List, Optional, Tuple
 from typing_extensions import Type
-from ....utils.rss import Rss, RssChannelData
+from ....utils.rss import Rss, RssChannelData, RssSeenIndex
 from ....model import SubscribeModel
 from ...factory import channel_factory
 from ....logger import logger
@@ -79,7 +79,8 @@ class RsshubBilibiliLiveChannel(RsshubChannel):
     async def polling_update(self, subscribes: List[SubscribeModel],
                              last_data: RssChannelData,
                              now_data: RssChannelData, last_update_time: int,
-                             now_time: int):
+                             now_time: int,
+                             seen_index: Optional[RssSeenIndex] = None):
         """
             RSS轮询更新
 
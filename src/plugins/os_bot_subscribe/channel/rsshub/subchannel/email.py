@@ -3,7 +3,7 @@
 """
 from typing import Any, Dict, List, Optional, Tuple
 from typing_extensions import Type
-from ....utils.rss import Rss, RssChannelData, RssItemData
+from ....utils.rss import Rss, RssChannelData, RssItemData, RssSeenIndex
 from ....model import SubscribeModel
 from ...factory import channel_factory
 from ....logger import logger
@@ -75,16 +75,22 @@ class RsshubEmailAliceChannel(RsshubChannel):
     def rss_cls(self) -> Type[Rss]:
         return Rss
 
+    @property
+    def seen_dedupe(self) -> bool:
+        return True
+
     async def polling_update(self, subscribes: List[SubscribeModel],
                              last_data: RssChannelData,
                              now_data: RssChannelData, last_update_time: int,
-                             now_time: int):
+                             now_time: int,
+                             seen_index: Optional[RssSeenIndex] = None):
         """
             RSS轮询更新
 
             需要判断哪些
         """
         update_data: List[RssItemData] = []
+        last_uuids = {item.uuid for item in last_data.entries}
         for data in now_data.entries:
             if data.published < last_data.updated:
                 """不推送已经更新过的数据"""
@@ -93,14 +99,10 @@ class RsshubEmailAliceChannel(RsshubChannel):
                 """不推送延迟超过30分钟的数据"""
                 continue
 
-            skip = False
-            for last_data_unit in last_data.entries:
-                if data.uuid == last_data_unit.uuid:
-                    logger.debug("{}({}) 重复的元素 {}", self.channel_id,
-                                 now_data.source_url, data.uuid)
-                    skip = True
-                    break
-            if skip:
+            if data.uuid in last_uuids or (seen_index
+                                           and seen_index.seen(data.uuid)):
+                logger.debug("{}({}) 重复的元素 {}", self.channel_id,
+                             now_data.source_url, data.uuid)
                 continue
             update_data.append(data)
 
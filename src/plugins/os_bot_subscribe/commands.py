@@ -361,3 +361,21 @@ async def _(matcher: Matcher,
             msg += f"\n{channel.name} | {model.subscribe} | -"
 
     await matcher.finish(msg)
+
+
+rsshub_status = on_command(
+    "Rsshub状态",
+    aliases={"rsshub状态", "订阅源状态"},
+    block=True,
+    rule=only_command(),
+    permission=SUPERUSER,
+)
+
+
+@rsshub_status.handle()
+@matcher_exception_try()
+async def _(matcher: Matcher):
+    from .channel.rsshub import polling
+    if not polling.mirror_pool:
+        await matcher.finish("Rsshub订阅未启用")
+    await matcher.finish(polling.mirror_pool.status())
@@ -1,4 +1,4 @@
-from pydantic import BaseSettings
+from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from nonebot.plugin import PluginMetadata
 
@@ -6,7 +6,8 @@ from ..os_bot_base.consts import META_AUTHOR_KEY, META_ADMIN_USAGE, META_SESSION
 
 
 class Config(BaseSettings):
-    # Your Config Here
+    os_subscribe_rss_parse_workers: int = Field(default=2)
+    """Rss解析（feedparser及html转换）使用的线程数"""
 
     class Config:
         extra = "ignore"
@@ -25,7 +26,7 @@ __plugin_meta__ = PluginMetadata(
         META_PLUGIN_ALIAS: ["rss", "订阅", "RSS订阅", "RSSHUB"],
         META_ADMIN_USAGE: """
             `订阅 [频道] 订阅标识`、`取消订阅 [频道] 订阅标识`、`订阅配置 [频道] 订阅标识 选项`、`订阅列表`
-            `全局订阅列表`
+            `全局订阅列表`、`Rsshub状态`(查看各订阅源地址的延迟及错误率)
             频道[选项] B站动态[投稿、仅日语、转发]、B站直播[标题、简介]、邮件
         """,  # 管理员可以获取的帮助
     },
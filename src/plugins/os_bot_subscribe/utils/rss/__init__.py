@@ -1,6 +1,7 @@
 """
     RSS订阅通用包
 """
-from .rss import Rss, RssParse, GeneralHTMLParser
+from .rss import Rss, RssParse, GeneralHTMLParser, get_parse_pool
 from .data import RssChannelData, RssItemData
-from .exception import RssParserError, RssRequestFailure, RssRequestStatusError
+from .seen import RssSeenIndex
+from .exception import RssParserError, RssRequestFailure, RssRequestStatusError, RssNotModified
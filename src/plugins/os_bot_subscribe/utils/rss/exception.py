@@ -14,6 +14,12 @@ class RssRequestIgnore(BaseException):
     """
 
 
+class RssNotModified(RssRequestIgnore):
+    """
+        Rss内容未变化（304或内容摘要与上次相同）
+    """
+
+
 class RssRequestFailure(BaseException):
     """
         Rss请求失败（超时、网络异常等）
@@ -1,8 +1,13 @@
 import asyncio
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 import time
 from typing import Any, Dict, Optional, Type
+from cacheout import LRUCache
 from ...logger import logger
+from ...config import config
 import aiohttp
 import feedparser
 from feedparser import FeedParserDict
@@ -10,7 +15,45 @@ from requests.exceptions import ConnectTimeout
 from aiohttp.client_exceptions import ClientConnectorError
 from .data import RssChannelData, RssItemData
 from .html_parser import GeneralHTMLParser
-from .exception import RssRequestStatusError, RssRequestFailure, RssParserError, RssRequestIgnore
+from ....os_bot_base.util import http_request, AsyncPool
+from .exception import RssRequestStatusError, RssRequestFailure, RssParserError, RssRequestIgnore, RssNotModified
+
+
+@dataclass
+class RssFetchState:
+    """
+        订阅地址的条件请求状态（校验器由各镜像独立生成）
+    """
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+fetch_states = LRUCache(maxsize=4096)
+"""
+    条件请求状态 url->RssFetchState
+"""
+
+content_digests = LRUCache(maxsize=4096)
+"""
+    响应内容摘要 path->digest
+
+    同一订阅可能轮换请求不同镜像，摘要按路径保存以便跨镜像比对
+"""
+
+_parse_pool: Optional[AsyncPool] = None
+
+
+def get_parse_pool() -> AsyncPool:
+    """
+        获取Rss解析线程池（feedparser及html转换不在事件循环中执行）
+    """
+    global _parse_pool
+    if not _parse_pool:
+        _parse_pool = AsyncPool(ThreadPoolExecutor(
+            max_workers=max(config.os_subscribe_rss_parse_workers, 1),
+            thread_name_prefix="os_rss_parse"),
+                                name="Rss解析")
+    return _parse_pool
 
 
 class RssParse:
@@ -169,6 +212,8 @@ class Rss:
         RssParseCls = RssParseCls or RssParse
         self.rss_parse = RssParseCls(source_type=source_type,
                                      source_subtype=source_subtype)
+        self.fetch_state: Optional[RssFetchState] = None
+        self.fetch_digest: Optional[str] = None
 
     def set_baseurl(self, baseurl: str):
         """
@@ -177,14 +222,35 @@ class Rss:
         self.baseurl = baseurl
         self.url = f"{self.baseurl}{self.path}"
 
-    async def async_http_request(self) -> str:
-        async with aiohttp.request(
+    async def async_http_request(self, conditional: bool = False) -> str:
+        """
+            请求页面数据
+
+            - `conditional` 携带此地址上次的`ETag`/`Last-Modified`进行条件请求，
+              内容未变化（304或与此路径上次的摘要相同）时抛出`RssNotModified`
+
+            响应的条件请求状态及摘要暂存于`self.fetch_state`、`self.fetch_digest`，解析成功后由`read`保存
+        """
+        headers = self.headers
+        state: Optional[RssFetchState] = fetch_states.get(
+            self.url) if conditional else None
+        last_digest: Optional[str] = content_digests.get(
+            self.path) if conditional else None
+        if state:
+            headers = dict(headers)
+            if state.etag:
+                headers["If-None-Match"] = state.etag
+            if state.last_modified:
+                headers["If-Modified-Since"] = state.last_modified
+        async with http_request(
                 "get",
                 self.url,
-                headers=self.headers,
+                headers=headers,
                 proxy=self.proxy,
                 timeout=aiohttp.ClientTimeout(total=self.timeout)) as resp:
             code = resp.status
+            if code == 304 and state:
+                raise RssNotModified(F'url {self.url} 内容未变化(304)')
             result = await resp.read()
             content = str(result, "utf-8")
             if code != 200:
@@ -194,18 +260,39 @@ class Rss:
                     )
                 raise RssRequestStatusError(F'url {self.url} 页面错误 {code}',
                                             cause=Exception(content))
+            digest = hashlib.sha1(result).hexdigest()
+            if last_digest == digest:
+                raise RssNotModified(F'url {self.url} 内容未变化')
+            self.fetch_state = RssFetchState(
+                etag=resp.headers.get("ETag"),
+                last_modified=resp.headers.get("Last-Modified"))
+            self.fetch_digest = digest
             return content
 
-    async def read(self) -> RssChannelData:
+    def _parse(self, request_content: str) -> RssChannelData:
+        data: FeedParserDict = feedparser.parse(request_content)
+        return self.rss_parse.conversion(data, source_url=self.url)
+
+    async def read(self, conditional: bool = False) -> RssChannelData:
+        """
+            读取并解析页面数据
+
+            - `conditional` 为真时，内容未变化将抛出`RssNotModified`（`RssRequestIgnore`的子类）
+        """
         # 读取页面数据
         try:
-            request_content = await self.async_http_request()
-            data: FeedParserDict = feedparser.parse(request_content)
-            return self.rss_parse.conversion(data, source_url=self.url)
+            request_content = await self.async_http_request(conditional)
+            channel_data = await get_parse_pool().submit(
+                self._parse, request_content)
         except (ConnectTimeout, TimeoutError, asyncio.TimeoutError) as e:
             raise RssRequestFailure(F"url {self.url} => 读取超时！", cause=e)
         except ClientConnectorError as e:
             raise RssRequestFailure(F"url {self.url} => 连接异常！", cause=e)
+        if self.fetch_state:
+            fetch_states.set(self.url, self.fetch_state)
+        if self.fetch_digest:
+            content_digests.set(self.path, self.fetch_digest)
+        return channel_data
 
     async def test(self, validate: bool = True) -> Optional[str]:
         """
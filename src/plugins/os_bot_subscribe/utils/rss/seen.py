@@ -0,0 +1,73 @@
+"""
+    # 已推送条目索引
+
+    按订阅持久化记录已见过的条目（`uuid`摘要）及最新发布时间，用于更新去重。
+
+    - 条目以`uuid`摘要的前16位十六进制存储，按先进先出保留最近`maxlen`条
+    - 查询为集合查找，与上次抓取的条目数无关
+    - 可被`Session`持久化，重启后仍可正确判断更新
+"""
+import hashlib
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, Set
+from typing_extensions import Self
+from ....os_bot_base.session import StoreSerializable
+from .data import RssChannelData
+
+
+class RssSeenIndex(StoreSerializable):
+    """
+        已推送条目索引
+
+        - `updated` 已处理数据的最新发布时间(ms)
+        - `digests` 已见过的条目摘要（按加入顺序）
+    """
+
+    def __init__(self, maxlen: int = 200) -> None:
+        self._maxlen = maxlen
+        self.updated: int = 0
+        self.digests: Deque[str] = deque()
+        self._digest_set: Set[str] = set()
+
+    @staticmethod
+    def digest(uuid: str) -> str:
+        return hashlib.sha1(uuid.encode("utf-8")).hexdigest()[:16]
+
+    def seen(self, uuid: str) -> bool:
+        return self.digest(uuid) in self._digest_set
+
+    def add(self, uuid: str) -> bool:
+        """
+            加入条目，已存在时返回`False`
+        """
+        digest = self.digest(uuid)
+        if digest in self._digest_set:
+            return False
+        self.digests.append(digest)
+        self._digest_set.add(digest)
+        while len(self.digests) > max(self._maxlen, 1):
+            self._digest_set.discard(self.digests.popleft())
+        return True
+
+    def add_all(self, uuids: Iterable[str]) -> bool:
+        changed = False
+        for uuid in uuids:
+            changed = self.add(uuid) or changed
+        return changed
+
+    def observe(self, data: RssChannelData) -> bool:
+        """
+            记录一次抓取的全部条目，返回索引是否发生变化
+        """
+        # 按发布时间从旧到新加入，淘汰时优先淘汰旧条目
+        changed = self.add_all(item.uuid for item in reversed(data.entries))
+        if data.updated > self.updated:
+            self.updated = data.updated
+            changed = True
+        return changed
+
+    def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
+        self.__dict__.update(self_dict)
+        self.digests = deque(list(self.digests)[-max(self._maxlen, 1):])
+        self._digest_set = set(self.digests)
+        return self
@@ -9,6 +9,8 @@ from nonebot import require
 
 require('os_bot_base')
 
+from . import model
+from . import cache
 from . import trans
 
 from .config import __plugin_meta__
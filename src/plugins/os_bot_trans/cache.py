@@ -0,0 +1,228 @@
+"""
+    # 机翻结果缓存
+
+    以引擎、源语言、目标语言及规范化后的文本作为缓存键，相同内容不再重复请求引擎。
+
+    - 内存层：`LRUCache`，容量由`trans_cache_memory_size`配置
+    - 持久层：数据库（`TransCacheModel`），容量由`trans_cache_db_size`配置，定时清理
+    - 两层共用过期时间`trans_cache_ttl`
+"""
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import TYPE_CHECKING, List, Optional, Tuple
+from typing_extensions import Self
+from cacheout import LRUCache
+from tortoise import timezone
+from tortoise.expressions import F
+from nonebot_plugin_apscheduler import scheduler
+from .config import config
+from .logger import logger
+from .model import TransCacheModel
+
+if TYPE_CHECKING:
+    from .engine import Engine
+
+_space_match = re.compile(r'[^\S\n]+')
+
+
+@dataclass
+class TransCacheStatistics:
+    """
+        缓存统计数据
+    """
+    memory_hit: int = 0
+    db_hit: int = 0
+    miss: int = 0
+    write: int = 0
+    evict: int = 0
+    """持久层清理的条目数"""
+    error: int = 0
+
+    def hit_rate(self) -> float:
+        total = self.memory_hit + self.db_hit + self.miss
+        return (self.memory_hit + self.db_hit) / (total or 1)
+
+
+class TransCache:
+    """
+        机翻结果缓存
+    """
+    instance: Optional[Self] = None
+
+    def __init__(self) -> None:
+        self.memory = LRUCache(maxsize=max(config.trans_cache_memory_size, 1),
+                               ttl=config.trans_cache_ttl)
+        self.statistics = TransCacheStatistics()
+
+    @staticmethod
+    def normalize(text: str) -> str:
+        """
+            规范化文本（统一Unicode形式、合并行内空白、去除首尾空白）
+        """
+        text = unicodedata.normalize("NFC", text)
+        lines = (_space_match.sub(" ", line).strip()
+                 for line in text.splitlines())
+        return "\n".join(line for line in lines if line)
+
+    @staticmethod
+    def make_key(engine: str, source: str, target: str, text: str) -> str:
+        raw = "\x00".join((engine, source, target, text))
+        return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+    def cacheable(self, text: str) -> bool:
+        return config.trans_cache_enable and 0 < len(
+            text) <= config.trans_cache_text_max
+
+    async def _lookup(self, keys: List[str]) -> Optional[Tuple[int, str]]:
+        """
+            按顺序查询多个缓存键，返回首个命中的下标及结果
+
+            内存层未命中的键通过一次数据库查询获取
+        """
+        for i, key in enumerate(keys):
+            result = self.memory.get(key)
+            if result is not None:
+                self.statistics.memory_hit += 1
+                return i, result
+        try:
+            now = timezone.now()
+            models = await TransCacheModel.filter(
+                id__in=keys,
+                create_time__gte=now -
+                timedelta(seconds=config.trans_cache_ttl))
+            model = None
+            if models:
+                found = {model.id: model for model in models}
+                model = next(found[key] for key in keys if key in found)
+                await TransCacheModel.filter(id=model.id).update(
+                    hit_count=F("hit_count") + 1, change_time=now)
+        except Exception:
+            self.statistics.error += 1
+            logger.opt(exception=True).warning("读取翻译缓存失败")
+            model = None
+        if not model:
+            return None
+        self.statistics.db_hit += 1
+        ttl = config.trans_cache_ttl - (now - model.create_time).total_seconds()
+        self.memory.set(model.id, model.result, ttl=max(ttl, 1))
+        return keys.index(model.id), model.result
+
+    async def get(self, engine: str, source: str, target: str,
+                  text: str) -> Optional[str]:
+        """
+            查询缓存，`text`需已规范化
+        """
+        hit = await self._lookup([self.make_key(engine, source, target, text)])
+        if hit is None:
+            self.statistics.miss += 1
+            return None
+        return hit[1]
+
+    async def get_any(self, engines: List[str], source: str, target: str,
+                      text: str) -> Optional[Tuple[str, str]]:
+        """
+            查询多个引擎的缓存，按顺序返回首个命中的引擎名及结果，`text`需已规范化
+        """
+        if not engines:
+            return None
+        hit = await self._lookup(
+            [self.make_key(engine, source, target, text) for engine in engines])
+        if hit is None:
+            self.statistics.miss += 1
+            return None
+        return engines[hit[0]], hit[1]
+
+    async def put(self, engine: str, source: str, target: str, text: str,
+                  result: str) -> None:
+        """
+            写入缓存，`text`需已规范化
+        """
+        if not result:
+            return
+        key = self.make_key(engine, source, target, text)
+        self.memory.set(key, result)
+        try:
+            await TransCacheModel.update_or_create(id=key,
+                                                   defaults={
+                                                       "engine": engine,
+                                                       "source": source,
+                                                       "target": target,
+                                                       "text": text,
+                                                       "result": result,
+                                                       "hit_count": 0,
+                                                       "create_time":
+                                                       timezone.now(),
+                                                   })
+            self.statistics.write += 1
+        except Exception:
+            self.statistics.error += 1
+            logger.opt(exception=True).warning("写入翻译缓存失败")
+
+    async def trans(self, engine: "Engine", source: str, target: str,
+                    text: str) -> str:
+        """
+            通过缓存翻译，未命中时调用引擎并写入缓存
+        """
+        key_text = self.normalize(text)
+        if not self.cacheable(key_text):
+            return await engine.submit(source, target, text)
+        result = await self.get(engine.name, source, target, key_text)
+        if result is not None:
+            return result
+        result = await engine.submit(source, target, text)
+        await self.put(engine.name, source, target, key_text, result)
+        return result
+
+    async def clean(self) -> int:
+        """
+            清理持久层中过期及超出容量的条目（按最近访问时间淘汰）
+        """
+        expire_time = timezone.now() - timedelta(
+            seconds=config.trans_cache_ttl)
+        count = await TransCacheModel.filter(
+            create_time__lt=expire_time).delete()
+        overflow = await TransCacheModel.all().count(
+        ) - config.trans_cache_db_size
+        if overflow > 0:
+            cutoff = await TransCacheModel.all().order_by(
+                "change_time").offset(overflow).first()
+            if cutoff:
+                count += await TransCacheModel.filter(
+                    change_time__lt=cutoff.change_time).delete()
+        self.statistics.evict += count
+        return count
+
+    def status(self) -> str:
+        statistics = self.statistics
+        return (
+            f"命中率：{statistics.hit_rate() * 100:.1f}%\n"
+            f"命中 内存/数据库：{statistics.memory_hit}/{statistics.db_hit}\n"
+            f"未命中：{statistics.miss}\n"
+            f"写入/清理/异常：{statistics.write}/{statistics.evict}/{statistics.error}\n"
+            f"内存条目：{self.memory.size()}/{self.memory.maxsize}")
+
+    @classmethod
+    def get_instance(cls) -> Self:
+        if not cls.instance:
+            cls.instance = cls()
+        return cls.instance
+
+
+async def cache_trans(engine: "Engine", source: str, target: str,
+                      text: str) -> str:
+    """
+        带缓存的翻译
+    """
+    return await TransCache.get_instance().trans(engine, source, target, text)
+
+
+@scheduler.scheduled_job("interval", minutes=30, name="翻译缓存清理")
+async def _():
+    if not config.trans_cache_enable:
+        return
+    count = await TransCache.get_instance().clean()
+    if count:
+        logger.debug("已清理{}条翻译缓存", count)
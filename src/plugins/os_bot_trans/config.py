@@ -17,11 +17,36 @@ class Config(BaseSettings):
         
         - trans_default_engine 配置默认引擎(默认google)
         - trans_lang_optimize 翻译优化
-        - 
+        - trans_cache_enable 启用机翻结果缓存(默认启用)
+        - trans_cache_memory_size 内存缓存条目数(默认1024)
+        - trans_cache_db_size 数据库缓存条目数(默认50000)
+        - trans_cache_ttl 缓存过期时间(秒，默认7天)
+        - trans_cache_text_max 可缓存的最大文本长度(默认2000)
+        - trans_batch_window 多段翻译的攒批窗口(秒，默认0.05)
+        - trans_batch_size 单次多段翻译的最大段数(默认16)
+        - trans_route_enable 启用引擎路由(按健康状况选择引擎并自动转移，默认启用)
+        - trans_route_attempts 单次翻译最多尝试的引擎数(默认3)
+        - trans_route_hedge_delay 对冲请求的最短等待时间(秒，默认2)
+        - trans_route_error_threshold 引擎暂停使用的连续失败次数(默认3)
+        - trans_route_cooldown 引擎暂停使用的时长(秒，默认60)
+        - trans_route_prefer_failover 用户指定的引擎失败或过慢时允许转移到其它引擎(默认关闭，不影响推文机翻等非严格首选)
     """
     trans_default_engine: str = Field(default="google")
     trans_lang_optimize: bool = Field(default=True)
     trans_emoji_filter_file: str = Field(default=os.path.join(".", "emoji-regex.txt"))
+    trans_cache_enable: bool = Field(default=True)
+    trans_cache_memory_size: int = Field(default=1024)
+    trans_cache_db_size: int = Field(default=50000)
+    trans_cache_ttl: int = Field(default=7 * 86400)
+    trans_cache_text_max: int = Field(default=2000)
+    trans_batch_window: float = Field(default=0.05)
+    trans_batch_size: int = Field(default=16)
+    trans_route_enable: bool = Field(default=True)
+    trans_route_attempts: int = Field(default=3)
+    trans_route_hedge_delay: float = Field(default=2)
+    trans_route_error_threshold: int = Field(default=3)
+    trans_route_cooldown: float = Field(default=60)
+    trans_route_prefer_failover: bool = Field(default=False)
 
     class Config:
         extra = "ignore"
@@ -61,6 +86,7 @@ __plugin_meta__ = PluginMetadata(
     description="OSBot多引擎翻译，支持多个翻译引擎翻译的插件",
     usage="""
         使用`翻译 引擎 源语言 目标语言 内容`来进行翻译，除了内容以外都是可选的~
+        不指定引擎时会自动选择当前最快的引擎，引擎出错时也会自动换用其它引擎。
         引擎支持谷歌、腾讯、百度、彩云，语言的话就看各个引擎本身是否支持了。
         通过`翻译引擎列表`查看当前支持的引擎！
         管理员可通过`流式翻译 目标 引擎 源语言 目标语言`来启用自动翻译，除了目标以外都可选(推荐使用默认配置)。
@@ -71,7 +97,8 @@ __plugin_meta__ = PluginMetadata(
     extra={
         META_AUTHOR_KEY: "ChenXuan",
         META_PLUGIN_ALIAS: ["机翻", "翻译翻译", "多引擎翻译", "多引擎机翻", "机器翻译", "流式翻译", "跟随翻译"],
-        META_ADMIN_USAGE: "什么都没有~",  # 管理员可以获取的帮助
+        META_ADMIN_USAGE:
+        "通过`翻译缓存状态`查看机翻缓存的命中情况，`翻译引擎状态`查看各引擎的延迟、错误率等数据(仅超级管理员)",  # 管理员可以获取的帮助
         META_SESSION_KEY: TransSession
     },
 )
@@ -4,6 +4,7 @@ from typing import Dict, List, Optional, Union
 from ..langs import langs
 from ..exception import EngineError
 from ..emoji_filter import EmojiFilter
+from .batch import TransBatcher
 from loguru import logger
 
 from ...os_bot_base.util import strip_control_characters
@@ -45,8 +46,15 @@ class Engine(abc.ABC):
             change_list={ "zh-cn":"cn" }
             用户参数：简体 繁体
             (简体 繁体)->text_check->BASE_LANGUAGE转换为(zh-cn zh-tw)->在allow列表中->change_list转换为(cn zh-TW)->调用trans函数
+
+        支持多段翻译的引擎可设置`support_batch`并实现`trans_batch`，
+        通过`submit`提交的请求会被合并攒批。
     """
     BASE_LANGUAGE = tool_reverse_dict(BASE_LANGUAGE_LIST)
+    support_batch: bool = False
+    """是否支持多段翻译"""
+    batch_max_length: int = 2000
+    """单次多段请求的最大文本总长度"""
 
     def __init__(self, name: str, enable: bool,
                  allow_dict: Dict[str, Union[List[str], str]],
@@ -67,6 +75,7 @@ class Engine(abc.ABC):
         self._alias = alias if alias else list()
         self._allow_dict = allow_dict
         self._change_dict = change_dict
+        self.batcher = TransBatcher(self)
 
     def check_source_lang(self, source) -> bool:
         """
@@ -95,6 +104,30 @@ class Engine(abc.ABC):
     async def trans(self, source: str, target: str, content: str) -> str:
         raise NotImplementedError
 
+    async def trans_batch(self, source: str, target: str,
+                          contents: List[str]) -> List[str]:
+        """
+            多段翻译，返回结果与`contents`一一对应
+        """
+        raise NotImplementedError
+
+    def allow_batch(self, source: str, target: str, content: str) -> bool:
+        """
+            请求是否可以参与攒批
+
+            自动识别的源语言可能各不相同，不参与攒批
+        """
+        return self.support_batch and source != "auto" and len(
+            content) <= self.batch_max_length
+
+    async def submit(self, source: str, target: str, content: str) -> str:
+        """
+            提交翻译请求
+
+            相同的进行中请求会被合并，支持多段翻译时同语言对的请求会攒批发送
+        """
+        return await self.batcher.trans(source, target, content)
+
     def text_check(self, content: str) -> Optional[str]:
         """
             待翻译文本检查
@@ -1,4 +1,3 @@
-import aiohttp
 import json
 import random
 from hashlib import md5
@@ -6,7 +5,7 @@ from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from . import Engine, EngineError
 from ..exception import RatelimitException
-from ...os_bot_base.util import AsyncTokenBucket
+from ...os_bot_base.util import AsyncTokenBucket, http_request
 from ..logger import logger
 
 
@@ -130,7 +129,7 @@ class BaiduAiEngine(Engine):
             'sign': sign
         }
 
-        req = aiohttp.request("post", url, params=payload, headers=headers)
+        req = http_request("post", url, params=payload, headers=headers)
         async with req as resp:
             code = resp.status
             if code != 200:
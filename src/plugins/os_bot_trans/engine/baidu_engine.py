@@ -1,12 +1,12 @@
-import aiohttp
 import json
 import random
 from hashlib import md5
+from typing import Any, Dict, List
 from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from . import Engine, EngineError
 from ..exception import RatelimitException
-from ...os_bot_base.util import AsyncTokenBucket
+from ...os_bot_base.util import AsyncTokenBucket, http_request
 
 
 class Config(BaseSettings):
@@ -32,6 +32,8 @@ class BaiduEngineError(EngineError):
 
 
 class BaiduEngine(Engine):
+    support_batch = True
+    batch_max_length = 1500
 
     def __init__(self) -> None:
         alllangs = [
@@ -118,7 +120,7 @@ class BaiduEngine(Engine):
             'sign': sign
         }
 
-        req = aiohttp.request("post", url, params=payload, headers=headers)
+        req = http_request("post", url, params=payload, headers=headers)
         async with req as resp:
             code = resp.status
             if code != 200:
@@ -128,26 +130,46 @@ class BaiduEngine(Engine):
             res = json.loads(await resp.read())
             return res
 
-    async def baidu_trans(self, source: str, target: str, text: str):
-        msg = ""
+    async def baidu_trans_result(self, source: str, target: str,
+                                 text: str) -> List[Dict[str, str]]:
         res = await self.baidu_trans_request(source, target, text)
         if "trans_result" in res:
-            res = res["trans_result"]
-        else:
-            if "error_code" in res:
-                errmsg = await self.baidu_errcode(res['error_code'])
-                raise BaiduEngineError(
-                    F"翻译异常 - 待翻内容 ({source}-{target}){text} => {res['error_code']}:{errmsg[0]} | {errmsg[1]}",
-                    replay=f"翻译失败{res['error_code']}:{errmsg[0]}")
-            else:
-                raise BaiduEngineError(
-                    F"翻译结果解析异常 - 待翻内容 ({source}-{target}){text} => {json.dumps(res)}",
-                    replay="翻译结果解析异常")
+            return res["trans_result"]
+        if "error_code" in res:
+            errmsg = await self.baidu_errcode(res['error_code'])
+            raise BaiduEngineError(
+                F"翻译异常 - 待翻内容 ({source}-{target}){text} => {res['error_code']}:{errmsg[0]} | {errmsg[1]}",
+                replay=f"翻译失败{res['error_code']}:{errmsg[0]}")
+        raise BaiduEngineError(
+            F"翻译结果解析异常 - 待翻内容 ({source}-{target}){text} => {json.dumps(res)}",
+            replay="翻译结果解析异常")
+
+    async def baidu_trans(self, source: str, target: str, text: str):
+        msg = ""
+        res = await self.baidu_trans_result(source, target, text)
         for item in res:
             msg += item["dst"] + "\n"
         return msg.strip()
 
-    async def trans(self, source: str, target: str, content: str) -> str:
+    async def baidu_trans_batch(self, source: str, target: str,
+                                texts: List[str]) -> List[str]:
+        """
+            多段翻译，每段占一行，按行拆分结果
+        """
+        res = await self.baidu_trans_result(source, target, "\n".join(texts))
+        if len(res) != len(texts):
+            raise BaiduEngineError(
+                F"批量翻译结果数量不匹配 ({source}-{target}){texts} => {json.dumps(res)}",
+                replay="翻译结果解析异常")
+        return [item["dst"] for item in res]
+
+    def allow_batch(self, source: str, target: str, content: str) -> bool:
+        # 多段请求以换行分隔，包含换行的内容无法拆分
+        return super().allow_batch(source, target,
+                                   content) and "\n" not in content
+
+    async def _request(self, source: str, target: str, content: Any,
+                       batch: bool) -> Any:
         if not self.enable:
             raise EngineError("引擎未启用", replay="引擎未启用")
         if not await self.bucket.wait_consume(1, 5):
@@ -155,12 +177,21 @@ class BaiduEngine(Engine):
         source = self.conversion_lang(source)
         target = self.conversion_lang(target)
         try:
+            if batch:
+                return await self.baidu_trans_batch(source, target, content)
             return await self.baidu_trans(source, target, content)
         except EngineError as e:
             raise e
         except Exception as e:
             raise BaiduEngineError(f"网络连接异常：{e}", replay="网络连接异常")
 
+    async def trans(self, source: str, target: str, content: str) -> str:
+        return await self._request(source, target, content, False)
+
+    async def trans_batch(self, source: str, target: str,
+                          contents: List[str]) -> List[str]:
+        return await self._request(source, target, contents, True)
+
 
 """
     支持列表
@@ -0,0 +1,129 @@
+"""
+    # 翻译请求合并
+
+    - 相同引擎、语言及内容的并发请求合并为一次调用
+    - 支持多段翻译的引擎，同一语言对的请求在短时间窗口内攒批，以一次多段请求发送
+    - 多段请求失败时逐段重试，仅真正失败的请求收到异常
+"""
+import asyncio
+from typing import TYPE_CHECKING, Coroutine, Dict, List, Optional, Set, Tuple
+from ..config import config
+from ..logger import logger
+from ..exception import EngineError
+
+if TYPE_CHECKING:
+    from . import Engine
+
+BatchItem = Tuple[str, "asyncio.Future[str]"]
+
+
+class TransBatcher:
+    """
+        引擎请求合并器
+    """
+
+    def __init__(self, engine: "Engine") -> None:
+        self.engine = engine
+        self._inflight: Dict[Tuple[str, str, str], "asyncio.Future[str]"] = {}
+        self._pending: Dict[Tuple[str, str], List[BatchItem]] = {}
+        self._pending_length: Dict[Tuple[str, str], int] = {}
+        self._flush_handles: Dict[Tuple[str, str], asyncio.TimerHandle] = {}
+        self._tasks: Set["asyncio.Task[None]"] = set()
+        self.request_count = 0
+        """实际发出的引擎调用次数"""
+        self.coalesce_count = 0
+        """合并到进行中请求的次数"""
+        self.batch_count = 0
+        """多段请求次数"""
+
+    async def trans(self, source: str, target: str, content: str) -> str:
+        key = (source, target, content)
+        future = self._inflight.get(key)
+        if future:
+            self.coalesce_count += 1
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        future.add_done_callback(lambda f: self._done(key, f))
+        if self.engine.allow_batch(source, target, content):
+            self._add_pending(source, target, content, future)
+        else:
+            self.request_count += 1
+            self._spawn(self._run_single(source, target, content, future))
+        return await asyncio.shield(future)
+
+    def _done(self, key: Tuple[str, str, str],
+              future: "asyncio.Future[str]") -> None:
+        self._inflight.pop(key, None)
+        if not future.cancelled():
+            # 等待方均已取消时避免未获取异常的警告
+            future.exception()
+
+    def _add_pending(self, source: str, target: str, content: str,
+                     future: "asyncio.Future[str]") -> None:
+        pair = (source, target)
+        if self._pending_length.get(
+                pair, 0) + len(content) > self.engine.batch_max_length:
+            self._flush(pair)
+        self._pending.setdefault(pair, []).append((content, future))
+        self._pending_length[pair] = self._pending_length.get(
+            pair, 0) + len(content)
+        if len(self._pending[pair]) >= max(config.trans_batch_size, 1):
+            self._flush(pair)
+        elif pair not in self._flush_handles:
+            self._flush_handles[pair] = asyncio.get_running_loop().call_later(
+                config.trans_batch_window, self._flush, pair)
+
+    def _flush(self, pair: Tuple[str, str]) -> None:
+        handle = self._flush_handles.pop(pair, None)
+        if handle:
+            handle.cancel()
+        items = self._pending.pop(pair, None)
+        self._pending_length.pop(pair, None)
+        if not items:
+            return
+        self.request_count += 1
+        if len(items) == 1:
+            content, future = items[0]
+            self._spawn(self._run_single(*pair, content, future))
+            return
+        self.batch_count += 1
+        self._spawn(self._run_batch(*pair, items))
+
+    def _spawn(self, coro: Coroutine) -> None:
+        task = asyncio.get_running_loop().create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run_single(self, source: str, target: str, content: str,
+                          future: "asyncio.Future[str]") -> None:
+        try:
+            result = await self.engine.trans(source, target, content)
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+        else:
+            if not future.done():
+                future.set_result(result)
+
+    async def _run_batch(self, source: str, target: str,
+                         items: List[BatchItem]) -> None:
+        try:
+            results = await self.engine.trans_batch(
+                source, target, [content for content, _ in items])
+            if len(results) != len(items):
+                raise EngineError("多段翻译结果数量不匹配", replay="翻译结果异常")
+        except Exception as e:
+            # 单段异常不应影响同批的其它请求，逐段重试
+            pending = [(content, future) for content, future in items
+                       if not future.done()]
+            logger.debug("{}多段翻译失败，逐段重试{}段：{}", self.engine.name,
+                         len(pending), repr(e))
+            self.request_count += len(pending)
+            await asyncio.gather(*(self._run_single(source, target, content,
+                                                    future)
+                                   for content, future in pending))
+            return
+        for i, (_, future) in enumerate(items):
+            if not future.done():
+                future.set_result(results[i])
@@ -1,8 +1,8 @@
-import aiohttp
 import json
 from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from . import Engine, EngineError
+from ...os_bot_base.util import http_request
 
 
 class Config(BaseSettings):
@@ -59,10 +59,10 @@ class CaiyunEngine(Engine):
             'x-authorization': "token " + token,
         }
         try:
-            async with aiohttp.request("post",
-                                       url,
-                                       data=json.dumps(payload),
-                                       headers=headers) as resp:
+            async with http_request("post",
+                                    url,
+                                    data=json.dumps(payload),
+                                    headers=headers) as resp:
                 code = resp.status
                 res = json.loads(await resp.read())
                 if code != 200:
@@ -1,11 +1,10 @@
-import aiohttp
 import json
 import random
 from . import Engine, EngineError
 from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from ..exception import RatelimitException
-from ...os_bot_base.util import AsyncTokenBucket
+from ...os_bot_base.util import AsyncTokenBucket, http_request
 
 
 class Config(BaseSettings):
@@ -86,8 +85,8 @@ class GoogleEngine(Engine):
                             Source=Source,
                             Target=Target)
         try:
-            async with aiohttp.request("get", url=requrl,
-                                       headers=headers) as resp:
+            async with http_request("get", url=requrl,
+                                    headers=headers) as resp:
                 code = resp.status
                 if code != 200:
                     raise GoogleEngineError(
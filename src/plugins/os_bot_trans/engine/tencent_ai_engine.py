@@ -3,7 +3,6 @@ import hmac
 import json
 import time
 import random
-import aiohttp
 from datetime import datetime
 import base64
 
@@ -11,7 +10,7 @@ from . import Engine, EngineError
 from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from ..exception import RatelimitException
-from ...os_bot_base.util import AsyncTokenBucket
+from ...os_bot_base.util import AsyncTokenBucket, http_request
 
 
 class Config(BaseSettings):
@@ -190,14 +189,14 @@ class TencentAiEngine(Engine):
         url = "https://" + args["host"]
         if useV3:
             v3headers = self.tencentApiSign_V3_PostHeaders(**args)
-            req = aiohttp.request("post",
-                                  url,
-                                  headers=v3headers,
-                                  data=json.dumps(args["params"]))
+            req = http_request("post",
+                               url,
+                               headers=v3headers,
+                               data=json.dumps(args["params"]))
 
         else:
             v1params = self.tencentApiSign_V1_GetParams(**args)
-            req = aiohttp.request("get", url, params=v1params)
+            req = http_request("get", url, params=v1params)
         async with req as resp:
             code = resp.status
             if code != 200:
@@ -3,15 +3,15 @@ import hmac
 import json
 import time
 import random
-import aiohttp
 from datetime import datetime
 import base64
+from typing import Any, List
 
 from . import Engine, EngineError
 from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from ..exception import RatelimitException
-from ...os_bot_base.util import AsyncTokenBucket
+from ...os_bot_base.util import AsyncTokenBucket, http_request
 
 
 class Config(BaseSettings):
@@ -38,6 +38,8 @@ class TencentEngineError(EngineError):
 
 
 class TencentEngine(Engine):
+    support_batch = True
+    batch_max_length = 2000
 
     def __init__(self) -> None:
         super().__init__(
@@ -173,46 +175,73 @@ class TencentEngine(Engine):
         data["Signature"] = sign_str(secret_key, s, hashlib.sha1)
         return data
 
-    async def tencent_TextTranslate(self,
-                                    source: str,
-                                    target: str,
-                                    text: str,
-                                    useV3: bool = False):
+    async def tencent_request(self,
+                              action: str,
+                              params: dict,
+                              desc: str,
+                              useV3: bool = False):
         args = {
             "secret_id": self._secret_id,
             "secret_key": self._secret_key,
             "host": "tmt.tencentcloudapi.com",
-            "action": "TextTranslate",
+            "action": action,
             "version": "2018-03-21",
             "region": self._region,
-            "params": {
-                "ProjectId": 0,
-                "Source": source,
-                "Target": target,
-                "SourceText": text,
-            }
+            "params": params
         }
         url = "https://" + args["host"]
         if useV3:
             v3headers = self.tencentApiSign_V3_PostHeaders(**args)
-            req = aiohttp.request("post",
-                                  url,
-                                  headers=v3headers,
-                                  data=json.dumps(args["params"]))
+            req = http_request("post",
+                               url,
+                               headers=v3headers,
+                               data=json.dumps(args["params"]))
 
         else:
             v1params = self.tencentApiSign_V1_GetParams(**args)
-            req = aiohttp.request("get", url, params=v1params)
+            req = http_request("get", url, params=v1params)
         async with req as resp:
             code = resp.status
             if code != 200:
-                raise TencentEngineError(
-                    F"网络异常 - {code} 待翻内容 ({source}-{target}){text}",
-                    replay=f"网络异常 {code}")
+                raise TencentEngineError(F"网络异常 - {code} 待翻内容 {desc}",
+                                         replay=f"网络异常 {code}")
             res = json.loads(await resp.read())
             return res
 
-    async def trans(self, source: str, target: str, content: str) -> str:
+    async def tencent_TextTranslate(self,
+                                    source: str,
+                                    target: str,
+                                    text: str,
+                                    useV3: bool = False):
+        params = {
+            "ProjectId": 0,
+            "Source": source,
+            "Target": target,
+            "SourceText": text,
+        }
+        return await self.tencent_request("TextTranslate",
+                                          params,
+                                          F"({source}-{target}){text}",
+                                          useV3=useV3)
+
+    async def tencent_TextTranslateBatch(self,
+                                         source: str,
+                                         target: str,
+                                         texts: List[str],
+                                         useV3: bool = False):
+        params = {
+            "ProjectId": 0,
+            "Source": source,
+            "Target": target,
+            "SourceTextList": texts,
+        }
+        return await self.tencent_request("TextTranslateBatch",
+                                          params,
+                                          F"({source}-{target}){texts}",
+                                          useV3=useV3)
+
+    async def _request(self, source: str, target: str, content: Any,
+                       batch: bool) -> dict:
         if not self.enable:
             raise EngineError("引擎未启用", replay="引擎未启用")
         if not await self.bucket.wait_consume(1, 5):
@@ -220,10 +249,16 @@ class TencentEngine(Engine):
         source = self.conversion_lang(source)
         target = self.conversion_lang(target)
         try:
-            res = await self.tencent_TextTranslate(source,
-                                                   target,
-                                                   content,
-                                                   useV3=True)
+            if batch:
+                res = await self.tencent_TextTranslateBatch(source,
+                                                            target,
+                                                            content,
+                                                            useV3=True)
+            else:
+                res = await self.tencent_TextTranslate(source,
+                                                       target,
+                                                       content,
+                                                       useV3=True)
         except EngineError as e:
             raise e
         except Exception as e:
@@ -236,7 +271,21 @@ class TencentEngine(Engine):
             raise TencentEngineError(
                 F" 参数 ({source}-{target}) {content} | 错误代码 {errmsg}({errcode})",
                 replay=f"API错误：{errmsg}({errcode})")
-        return res["Response"]["TargetText"]
+        return res["Response"]
+
+    async def trans(self, source: str, target: str, content: str) -> str:
+        res = await self._request(source, target, content, False)
+        return res["TargetText"]
+
+    async def trans_batch(self, source: str, target: str,
+                          contents: List[str]) -> List[str]:
+        res = await self._request(source, target, contents, True)
+        results = res["TargetTextList"]
+        if len(results) != len(contents):
+            raise TencentEngineError(
+                F"批量翻译结果数量不匹配 ({source}-{target}) {contents} => {results}",
+                replay="翻译结果解析异常")
+        return results
 
 
 """
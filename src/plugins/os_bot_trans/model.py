@@ -0,0 +1,28 @@
+from datetime import datetime
+from tortoise.models import Model
+from tortoise import fields
+from ..os_bot_base import DatabaseManage
+
+
+class TransCacheModel(Model):
+
+    class Meta:
+        table = "os_trans_cache"
+        table_description = "机翻结果缓存表"
+
+    id = fields.CharField(pk=True,
+                          max_length=64,
+                          description="缓存键(引擎、语言及规范化文本的摘要)")
+    engine: str = fields.CharField(max_length=255, description="翻译引擎")
+    source: str = fields.CharField(max_length=255, description="源语言")
+    target: str = fields.CharField(max_length=255, description="目标语言")
+    text: str = fields.TextField(description="规范化后的原文")
+    result: str = fields.TextField(description="翻译结果")
+    hit_count: int = fields.IntField(default=0, description="命中次数")
+    change_time: datetime = fields.DatetimeField(
+        auto_now=True, index=True, description="最近访问时间(用于淘汰)")
+    create_time: datetime = fields.DatetimeField(
+        auto_now_add=True, index=True, description="创建时间(用于过期)")
+
+
+DatabaseManage.get_instance().add_model(TransCacheModel)
@@ -0,0 +1,248 @@
+"""
+    # 引擎路由
+
+    记录各引擎的延迟分位数、错误率及速率限制余量，为每次请求选择最快的可用引擎。
+
+    - 仅选择启用且`check_lang`支持该语言对的引擎
+    - 连续失败达到阈值的引擎暂停使用一段时间
+    - 请求失败时转移到下一个引擎，响应过慢时同时向下一个引擎发起请求（对冲），先返回者胜出
+    - 严格指定引擎（用户指定）时仅使用该引擎（及其缓存）；开启`trans_route_prefer_failover`时，在其失败或过慢时转移，调用方需提示实际使用的引擎
+    - 非严格指定引擎（如配置的默认引擎）仅作为首选，未暂停时排在首位，缓存及转移覆盖全部候选引擎
+    - 关闭路由时仅使用指定引擎或默认引擎
+"""
+import asyncio
+import math
+from collections import deque
+from time import time
+from typing import Deque, Dict, List, Optional, Set, Tuple
+from .config import config
+from .logger import logger
+from .cache import TransCache
+from .engine import Engine, EngineError
+
+
+class EngineHealth:
+    """
+        引擎健康数据
+    """
+    WINDOW = 100
+
+    def __init__(self) -> None:
+        self.latencies: Deque[float] = deque(maxlen=self.WINDOW)
+        self.results: Deque[bool] = deque(maxlen=self.WINDOW)
+        self.success_count = 0
+        self.error_count = 0
+        self.consecutive_errors = 0
+        self.cooldown_until: float = 0
+
+    def record_success(self, latency: float) -> None:
+        self.latencies.append(latency)
+        self.results.append(True)
+        self.success_count += 1
+        self.consecutive_errors = 0
+
+    def record_error(self) -> None:
+        self.results.append(False)
+        self.error_count += 1
+        self.consecutive_errors += 1
+        if self.consecutive_errors >= config.trans_route_error_threshold:
+            self.cooldown_until = time() + config.trans_route_cooldown
+
+    def percentile(self, p: float) -> Optional[float]:
+        if not self.latencies:
+            return None
+        latencies = sorted(self.latencies)
+        index = min(math.ceil(p * len(latencies)) - 1, len(latencies) - 1)
+        return latencies[max(index, 0)]
+
+    def error_rate(self) -> float:
+        if not self.results:
+            return 0
+        return self.results.count(False) / len(self.results)
+
+    def healthy(self) -> bool:
+        return self.cooldown_until <= time()
+
+
+class EngineRouter:
+    """
+        引擎路由
+    """
+
+    def __init__(self, engines: List[Engine], default: Engine) -> None:
+        self.engines = engines
+        self.default = default
+        self.healths: Dict[str, EngineHealth] = {
+            engine.name: EngineHealth()
+            for engine in engines
+        }
+        self.hedge_count = 0
+        """对冲请求次数"""
+        self.failover_count = 0
+        """失败转移次数"""
+
+    def budget_wait(self, engine: Engine) -> float:
+        """
+            速率限制下获取令牌的预计等待时间
+        """
+        bucket = getattr(engine, "bucket", None)
+        return bucket.estimate_wait(1) if bucket else 0
+
+    def score(self, engine: Engine) -> float:
+        """
+            预计耗时评分，越小越好
+        """
+        health = self.healths[engine.name]
+        latency = health.percentile(0.5)
+        if latency is None:
+            latency = config.trans_route_hedge_delay / 2
+        return (latency + self.budget_wait(engine)) / max(
+            1 - health.error_rate(), 0.1)
+
+    def hedge_delay(self, engine: Engine) -> float:
+        """
+            发起对冲请求前的等待时间
+        """
+        p95 = self.healths[engine.name].percentile(0.95)
+        delay = config.trans_route_hedge_delay
+        if p95 is not None:
+            delay = max(delay, p95)
+        return delay + self.budget_wait(engine)
+
+    def candidates(self,
+                   source: str,
+                   target: str,
+                   text: str,
+                   prefer: Optional[Engine] = None,
+                   strict: bool = True) -> List[Engine]:
+        """
+            按优先级排列支持此次请求的引擎
+
+            - `prefer` 指定引擎
+            - `strict` 是否严格使用指定引擎，否则指定引擎仅作为首选
+        """
+        if not config.trans_route_enable:
+            return [prefer or self.default]
+        if prefer and strict and not config.trans_route_prefer_failover:
+            return [prefer]
+        engines = [
+            engine for engine in self.engines
+            if engine.enable and engine.check_lang(source, target)
+            and engine.text_check(text) is None
+        ]
+        engines.sort(key=lambda engine: (not self.healths[engine.name].
+                                         healthy(), self.score(engine)))
+        if prefer and (strict or prefer in engines
+                       and self.healths[prefer.name].healthy()):
+            if prefer in engines:
+                engines.remove(prefer)
+            engines.insert(0, prefer)
+        return engines[:max(config.trans_route_attempts, 1)]
+
+    async def _attempt(self, engine: Engine, source: str, target: str,
+                       text: str) -> Tuple[Engine, str]:
+        health = self.healths[engine.name]
+        start_time = time()
+        try:
+            result = await engine.submit(source, target, text)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            health.record_error()
+            raise
+        health.record_success(time() - start_time)
+        return engine, result
+
+    async def _hedged(self, candidates: List[Engine], source: str,
+                      target: str, text: str) -> Tuple[Engine, str]:
+        remaining = deque(candidates)
+        tasks: Set["asyncio.Task[Tuple[Engine, str]]"] = set()
+        last_engine = remaining[0]
+        last_error: Optional[BaseException] = None
+
+        def start_next() -> None:
+            nonlocal last_engine
+            last_engine = remaining.popleft()
+            tasks.add(
+                asyncio.create_task(
+                    self._attempt(last_engine, source, target, text)))
+
+        start_next()
+        try:
+            while tasks:
+                timeout = self.hedge_delay(last_engine) if remaining else None
+                done, _ = await asyncio.wait(
+                    tasks, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    self.hedge_count += 1
+                    start_next()
+                    continue
+                for task in done:
+                    tasks.discard(task)
+                    if task.exception() is None:
+                        return task.result()
+                    last_error = task.exception()
+                    logger.debug("翻译引擎请求失败，尝试转移：{}", repr(last_error))
+                if remaining:
+                    self.failover_count += 1
+                    start_next()
+        finally:
+            for task in tasks:
+                task.cancel()
+        raise last_error  # type: ignore
+
+    async def trans(self,
+                    source: str,
+                    target: str,
+                    text: str,
+                    prefer: Optional[Engine] = None,
+                    strict: bool = True) -> Tuple[Engine, str]:
+        """
+            通过路由翻译，优先使用缓存
+
+            - `prefer` 指定引擎
+            - `strict` 是否严格使用指定引擎（用户指定时），否则指定引擎仅作为首选
+
+            返回实际使用的引擎及翻译结果
+        """
+        candidates = self.candidates(source, target, text, prefer, strict)
+        if not candidates:
+            raise EngineError("没有可用的引擎", replay="没有支持此语言的可用引擎")
+        cache = TransCache.get_instance()
+        key_text = cache.normalize(text)
+        cacheable = cache.cacheable(key_text)
+        if cacheable and prefer and strict:
+            # 严格指定引擎时不使用其它引擎的缓存
+            result = await cache.get(prefer.name, source, target, key_text)
+            if result is not None:
+                return prefer, result
+        elif cacheable:
+            hit = await cache.get_any([engine.name for engine in candidates],
+                                      source, target, key_text)
+            if hit:
+                name, result = hit
+                return next(engine for engine in candidates
+                            if engine.name == name), result
+        engine, result = await self._hedged(candidates, source, target, text)
+        if cacheable:
+            await cache.put(engine.name, source, target, key_text, result)
+        return engine, result
+
+    def status(self) -> str:
+        lines = [f"对冲/转移：{self.hedge_count}/{self.failover_count}"]
+        for engine in self.engines:
+            if not engine.enable:
+                continue
+            health = self.healths[engine.name]
+            p50 = health.percentile(0.5)
+            p95 = health.percentile(0.95)
+            batcher = engine.batcher
+            lines.append(
+                f"{engine.name}{'' if health.healthy() else '(暂停)'}："
+                f"成功/失败 {health.success_count}/{health.error_count} "
+                f"错误率 {health.error_rate() * 100:.0f}% "
+                f"延迟P50/P95 {p50 or 0:.2f}s/{p95 or 0:.2f}s "
+                f"令牌等待 {self.budget_wait(engine):.1f}s "
+                f"请求/合并/多段 {batcher.request_count}/{batcher.coalesce_count}/{batcher.batch_count}"
+            )
+        return "\n".join(lines)
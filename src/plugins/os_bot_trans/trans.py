@@ -12,6 +12,8 @@ from nonebot.adapters.onebot.v11.permission import GROUP_ADMIN, GROUP_OWNER
 from nonebot.adapters.onebot import v11
 from .config import config, TransSession, StreamUnit
 from .logger import logger
+from .cache import TransCache
+from .router import EngineRouter
 from .engine import Engine, langs as base_langs, EngineError, deal_trans_text
 from .engine.caiyun_engine import CaiyunEngine
 from .engine.google_engine import GoogleEngine
@@ -61,6 +63,9 @@ except KeyError:
     default_engine_name: str = default_engine.name
 
 
+router = EngineRouter(_engines, default_engine)
+
+
 def getLangCN(lang: str):
     return base_langs[lang][0]
 
@@ -74,11 +79,12 @@ class TransArgs(ArgMatch):
         name = "机翻参数"
         des = "匹配机翻引擎参数"
 
-    engine: str = Field.Keys("引擎",
-                             keys=engines_limit,
-                             default=default_engine_name,
-                             help=engine_help,
-                             require=False)
+    engine: Optional[str] = Field.Keys("引擎",
+                                       keys=engines_limit,
+                                       default=None,
+                                       help=engine_help,
+                                       require=False)
+    """未指定时由路由选择引擎"""
 
     source: str = Field.Keys("源语言",
                              keys=base_langs,
@@ -174,7 +180,7 @@ trans_msg = on_startswith("机翻",
 
 async def trans_handle(matcher: Matcher, arg: TransArgs, session: TransSession,
                        bot: Bot, event: Event):
-    engine: Engine = engines[arg.engine]
+    engine: Optional[Engine] = engines[arg.engine] if arg.engine else None
     adapter = AdapterFactory.get_adapter(bot)
     source = arg.source
     target = arg.target
@@ -192,23 +198,32 @@ async def trans_handle(matcher: Matcher, arg: TransArgs, session: TransSession,
                                                      default_trans)
     if not text:
         await matcher.finish()
-    if not engine.check_source_lang(source):
-        await matcher.finish(F"{engine.name}不支持{getLangCN(source)}哦")
-    if not engine.check_lang(source, target):
+    check_engine = engine or (None if config.trans_route_enable else
+                              default_engine)
+    if check_engine and not check_engine.check_source_lang(source):
+        await matcher.finish(F"{check_engine.name}不支持{getLangCN(source)}哦")
+    if check_engine and not check_engine.check_lang(source, target):
+        await matcher.finish(
+            F"{check_engine.name}的{getLangCN(source)}语言，不支持翻译到{getLangCN(target)}哦"
+        )
+    if not check_engine and not router.candidates(source, target, text):
         await matcher.finish(
-            F"{engine.name}的{getLangCN(source)}语言，不支持翻译到{getLangCN(target)}哦")
+            F"没有可以将{getLangCN(source)}翻译到{getLangCN(target)}的引擎哦")
     try:
-        res = await engine.trans(source, target, text)
+        used_engine, res = await router.trans(source, target, text, engine)
         logger.debug(
-            F"{engine.name}引擎翻译({source}->{target})：{text} -> {res.strip()}")
+            F"{used_engine.name}引擎翻译({source}->{target})：{text} -> {res.strip()}"
+        )
     except EngineError as e:
         logger.opt(exception=True).warning(F"翻译引擎异常：{repr(e)}")
         await matcher.finish(F"引擎错误：{e.replay}")
     user_id = await adapter.get_unit_id_from_event(bot, event)
     group_id = await adapter.get_group_id_from_event(
         bot, event) if await adapter.msg_is_multi_group(bot, event) else None
+    # 指定的引擎失败转移时提示实际使用的引擎
+    fallback = f"({used_engine.name})" if engine and used_engine is not engine else ""
     await matcher.finish(
-        f"@{await adapter.get_unit_nick(user_id, group_id=group_id)} 翻：{res.strip().replace('{', '').replace('}', '')}"
+        f"@{await adapter.get_unit_nick(user_id, group_id=group_id)} 翻{fallback}：{res.strip().replace('{', '').replace('}', '')}"
     )
 
 
@@ -367,6 +382,32 @@ async def _(matcher: Matcher):
     await matcher.finish(f"当前启用：{'、'.join(engine_names)}")
 
 
+trans_cache_status = on_command("翻译缓存状态",
+                                aliases={"机翻缓存状态"},
+                                priority=2,
+                                rule=only_command(),
+                                permission=SUPERUSER)
+
+
+@trans_cache_status.handle()
+@matcher_exception_try()
+async def _(matcher: Matcher):
+    await matcher.finish(TransCache.get_instance().status())
+
+
+trans_engine_status = on_command("翻译引擎状态",
+                                 aliases={"机翻引擎状态"},
+                                 priority=2,
+                                 rule=only_command(),
+                                 permission=SUPERUSER)
+
+
+@trans_engine_status.handle()
+@matcher_exception_try()
+async def _(matcher: Matcher):
+    await matcher.finish(router.status())
+
+
 stream_list = on_command("查看流式翻译列表",
                          aliases={"打开流式翻译列表", "翻译列表", "流式翻译列表"},
                          priority=2,
@@ -472,9 +513,10 @@ async def _(matcher: Matcher,
         if not msg:
             await matcher.finish()
         try:
-            res = await engine.trans(source, target, msg)
+            used_engine, res = await router.trans(source, target, msg, engine)
             res = res.replace("{", "").replace("}", "")
         except EngineError as e:
             logger.opt(exception=True).warning(F"翻译引擎异常：{repr(e)}")
             await matcher.finish()
-        await matcher.finish(f"翻:{res}")
+        fallback = f"({used_engine.name})" if used_engine is not engine else ""
+        await matcher.finish(f"翻{fallback}:{res}")
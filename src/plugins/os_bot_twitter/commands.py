@@ -27,7 +27,7 @@ from .config import config
 from .tran import TwitterTransManage
 from .options import Options, Option
 
-from ..os_bot_base.util import matcher_exception_try, only_command, inhibiting_exception, RateLimitDepend, RateLimitUtil
+from ..os_bot_base.util import matcher_exception_try, only_command, inhibiting_exception, RateLimitDepend, RateLimitUtil, http_request
 from ..os_bot_base.depends import SessionPluginDepend, SessionDepend
 from ..os_bot_base.depends import Adapter, AdapterDepend, ArgMatchDepend
 from ..os_bot_base.argmatch import ArgMatch, Field, PageArgMatch
@@ -787,6 +787,22 @@ async def _(matcher: Matcher, bot: Bot, event: v11.PrivateMessageEvent):
     await matcher.finish(f"提交到后台任务啦！")
 
 
+push_status = on_command("推特推送状态",
+                         permission=SUPERUSER,
+                         rule=only_command(),
+                         block=True)
+
+
+@push_status.handle()
+@matcher_exception_try()
+async def _(matcher: Matcher):
+    pipeline = polling.tweet_push_pipeline
+    await matcher.finish(
+        f"推送 成功/失败：{pipeline.push_count}/{pipeline.failure_count}\n"
+        f"排队中：{pipeline.queue_size()}\n"
+        f"推送延迟 平均/最大：{pipeline.avg_latency():.2f}s/{pipeline.latency_max:.2f}s")
+
+
 ban_user = on_command("添加转推黑名单",
                       aliases={"加入推特黑名单", "加入转推黑名单", "添加推特黑名单"},
                       permission=SUPERUSER,
@@ -891,9 +907,9 @@ async def download_to_base64(url: str,
     maxsize = maxsize_kb * 1024
     timeout = 15
     try:
-        req = aiohttp.request("get",
-                              url,
-                              timeout=aiohttp.ClientTimeout(total=10))
+        req = http_request("get",
+                           url,
+                           timeout=aiohttp.ClientTimeout(total=10))
         async with req as resp:
             code = resp.status
             if code != 200:
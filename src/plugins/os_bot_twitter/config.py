@@ -32,6 +32,20 @@ class Config(BaseSettings):
     """是否启用轮询"""
     os_twitter_poll_interval: int = Field(default=15)
     """推特轮询间隔"""
+    os_twitter_timeline_concurrency: int = Field(default=4)
+    """时间线刷新的并发数"""
+    os_twitter_timeline_budget_ratio: float = Field(default=0.8)
+    """
+        时间线刷新可使用的速率配额比例
+
+        刷新按`get_timeline`配额的此比例均匀分布在配额周期内，剩余配额留给手动操作。
+    """
+    os_twitter_push_concurrency: int = Field(default=8)
+    """推文推送的并发数（不同组之间）"""
+    os_twitter_push_queue: int = Field(default=1000)
+    """推文推送的最大排队数，超出时等待"""
+    os_twitter_push_bot_rate: float = Field(default=2)
+    """单个Bot每秒最多推送的消息数"""
     os_twitter_proxy: str = Field(default="")
     """推特使用的代理"""
     os_twitter_key: str
@@ -106,12 +120,19 @@ class TwitterPlugSession(Session):
 
         即使在监听中也无视的列表，也会视为无效监听
     """
+    timeline_since_ids: Dict[str, str]
+    """
+        时间线进度
+
+        用户ID -> 已获取的最新推文ID，刷新时间线时仅获取此后的推文
+    """
 
     def __init__(self, *args, key: str = "default", **kws):
         super().__init__(*args, key=key, **kws)
         self.following_list = []
         self.mention_following_list = []
         self.blacklist_following_list = []
+        self.timeline_since_ids = {}
         self._enable = True
 
     def _init_from_dict(self, self_dict: Dict[str, Any]) -> Self:
@@ -172,7 +193,7 @@ __plugin_meta__ = PluginMetadata(
         META_ADMIN_USAGE: """
             通过`订阅推特 用户名 [选项]`、`取消推特订阅 用户名`、`推特订阅配置 用户名 [选项]`、`推特订阅列表`、`清空推特订阅`、`全局推特订阅列表`来管理订阅
             其它指令`看推 推文链接/序号`、`设置烤推模版 模版`、`设置用户烤推模版 用户 模版`
-            维护指令`移除/添加转推黑名单`、`转推黑名单列表`、`全局烤推历史`、`清空推特缓存`、`检查流式监听`、`重载烤推脚本`、`重启烤推引擎`、`烤推引擎状态`
+            维护指令`移除/添加转推黑名单`、`转推黑名单列表`、`推特推送状态`、`全局烤推历史`、`清空推特缓存`、`检查流式监听`、`重载烤推脚本`、`重启烤推引擎`、`烤推引擎状态`
             可以通过`转推配置帮助`命令查看配置详细介绍，也可以通过`更新并重载烤推脚本`自动从git上更新烤推脚本。
             隐藏的常规命令`烤架`用于获取烤推状态，烤推绑定了默认授权的权限`烤推`，可以通过`权限禁用 烤推`来禁用烤推。
         """,  # 管理员可以获取的帮助
@@ -4,8 +4,10 @@
 import asyncio
 import re
 import aiohttp
+from collections import deque
+from math import inf
 from time import time
-from typing import Any, Dict, List, Optional, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 from nonebot import get_driver
 from nonebot.adapters.onebot import v11
 from nonebot_plugin_apscheduler import scheduler
@@ -17,7 +19,8 @@ from .logger import logger
 from .config import config, TwitterPlugSession, TwitterSession
 from .exception import TwitterPollingSendError, TwitterException
 
-from ..os_bot_base.util import get_plugin_session, plug_is_disable, get_session, inhibiting_exception
+from ..os_bot_base import DatabaseManage, SessionManage
+from ..os_bot_base.util import get_plugin_session, plug_is_disable, get_session, inhibiting_exception, AsyncTokenBucket
 from ..os_bot_base.notice import UrgentNotice, BotSend
 from ..os_bot_base.adapter.onebot import V11Adapter
 from ..os_bot_base.exception import MatcherErrorFinsh
@@ -256,79 +259,76 @@ class PollTwitterUpdate(TwitterUpdate):
                 raise TwitterException("尝试展示推特数据时异常", cause=e)
             raise e
 
-    async def push_tweet_message(self,
-                                 subscribe: TwitterSubscribeModel,
-                                 tweet: TwitterTweetModel,
-                                 only_add_failure: bool = False):
+    async def tweet_trans(self, tweet: TwitterTweetModel,
+                          relate_tweet: Optional[TwitterTweetModel]):
+        """
+            机翻推文及相关推文（已有翻译时跳过）
+        """
+        if not config.os_twitter_trans_engine:
+            return
+        from ..os_bot_trans.trans import engines, base_langs, deal_trans_text, router
+        if config.os_twitter_trans_engine not in engines:
+            return
+        engine = engines[config.os_twitter_trans_engine]
+        if not tweet.trans_text:
+            source = "auto"
+            target = "zh-cn"
+            text = deal_trans_text(tweet.display_text)
+            try:
+
+                if tweet.lang and tweet.lang in base_langs and engine.check_lang(
+                        tweet.lang, target):
+                    source = tweet.lang
+                _, tweet.trans_text = await router.trans(
+                    source, target, text, engine, strict=False)
+                await tweet.save()
+            except Exception as e:
+                logger.opt(exception=True).warning(
+                    "机翻 {} 失败！使用引擎及参数 {} {} -> {} 内容 {}", tweet.id,
+                    config.os_twitter_trans_engine, source, target, text)
+        if relate_tweet and not relate_tweet.trans_text:
+            source = "auto"
+            target = "zh-cn"
+            text = deal_trans_text(relate_tweet.display_text)
+            try:
+
+                if relate_tweet.lang and relate_tweet.lang in base_langs and engine.check_lang(
+                        relate_tweet.lang, target):
+                    source = relate_tweet.lang
+
+                _, relate_tweet.trans_text = await router.trans(
+                    source, target, text, engine, strict=False)
+                await relate_tweet.save()
+            except Exception as e:
+                logger.opt(exception=True).warning(
+                    "机翻 {}(相关推文) 失败！使用引擎及参数 {} {} -> {} 内容 {}", tweet.id,
+                    config.os_twitter_trans_engine, source, target, text)
+
+    async def prepare_tweet_message(
+        self,
+        subscribe: TwitterSubscribeModel,
+        tweet: TwitterTweetModel,
+        base_msg: Union[str, v11.Message],
+    ) -> Optional[Tuple[Union[str, v11.Message], TwitterSession]]:
+        """
+            生成指定订阅的推送消息
+
+            在渲染好的推文消息后附加推文序号、链接等与组相关的内容，不需要推送时返回`None`。
+        """
         if await plug_is_disable("os_bot_twitter", subscribe.group_mark):
             logger.info("因组 {} 的推特插件被关闭，转推消息推送取消。(相关订阅 {})",
                         subscribe.group_mark, subscribe.id)
-            return
+            return None
         session: TwitterSession = await get_session(subscribe.group_mark,
                                                     TwitterSession,
                                                     "os_bot_twitter"
                                                     )  # type: ignore
-        if only_add_failure:
-            session.failure_list.append(tweet.id)
-            return
         if tweet.author_id in session.ban_users:
             logger.debug("{} 内推送 {} 被禁用 涉及推文 {} 订阅 {}", subscribe.group_mark,
                          tweet.author_id, tweet.id, subscribe.id)
-            return
-
-        relate_tweet = None
-        if tweet.referenced_tweet_id:
-            relate_tweet = await self.client.model_tweet_get_or_none(
-                tweet.referenced_tweet_id)
-
-        # 推文翻译
-        if subscribe.tweet_trans:
-            if config.os_twitter_trans_engine:
-                from ..os_bot_trans.trans import engines, base_langs, deal_trans_text
-                if config.os_twitter_trans_engine in engines:
-                    engine = engines[config.os_twitter_trans_engine]
-                    if not tweet.trans_text:
-                        source = "auto"
-                        target = "zh-cn"
-                        text = deal_trans_text(tweet.display_text)
-                        try:
-
-                            if tweet.lang and tweet.lang in base_langs and engine.check_lang(
-                                    tweet.lang, target):
-                                source = tweet.lang
-                            tweet.trans_text = await engine.trans(
-                                source, target, text)
-                            await tweet.save()
-                        except Exception as e:
-                            logger.opt(exception=True).warning(
-                                "机翻 {} 失败！使用引擎及参数 {} {} -> {} 内容 {}", tweet.id,
-                                config.os_twitter_trans_engine, source, target,
-                                text)
-                    if relate_tweet and not relate_tweet.trans_text:
-                        source = "auto"
-                        target = "zh-cn"
-                        text = deal_trans_text(relate_tweet.display_text)
-                        try:
-
-                            if relate_tweet.lang and relate_tweet.lang in base_langs and engine.check_lang(
-                                    relate_tweet.lang, target):
-                                source = relate_tweet.lang
-
-                            relate_tweet.trans_text = await engine.trans(
-                                source, target, text)
-                            await relate_tweet.save()
-                        except Exception as e:
-                            logger.opt(exception=True).warning(
-                                "机翻 {}(相关推文) 失败！使用引擎及参数 {} {} -> {} 内容 {}",
-                                tweet.id, config.os_twitter_trans_engine,
-                                source, target, text)
-
-            else:
-                logger.warning("推送{}启用了推文翻译，但未设置翻译引擎！", subscribe.id)
-        msg = await self.tweet_to_message(tweet, relate_tweet,
-                                          subscribe.bot_type,
-                                          subscribe.tweet_trans)
+            return None
 
+        msg = base_msg
         # 生成推文映射(没有烤推权限时不生成序)
         try:
             mark_splits = subscribe.group_mark.split("-")
@@ -342,21 +342,15 @@ class PollTwitterUpdate(TwitterUpdate):
                 tweet_num = f"{session.num}"
                 session.tweet_map[tweet_num] = tweet.id
                 session.num += 1
-                await session.save()
-                msg += f"\n序 {tweet_num}"
+                msg = msg + f"\n序 {tweet_num}"
             if await PermManage.check_permission_from_mark(
                     "推文链接", subscribe.bot_type, group_id, ""):
                 # 安全起见移除链接推送
-                msg += f"\nhttps://twitter.com/{tweet.author_username}/status/{tweet.id}"
+                msg = msg + f"\nhttps://twitter.com/{tweet.author_username}/status/{tweet.id}"
         except Exception as e:
             logger.opt(exception=True).warning("推文更新消息转换异常 订阅 {} 消息 {}",
                                                subscribe.id, msg)
-
-        try:
-            await self.push_message(subscribe, msg)
-        except TwitterPollingSendError as e:
-            logger.warning("推文更新消息推送失败 订阅 {} 消息 {}", subscribe.id, msg)
-            session.failure_list.append(tweet.id)
+        return msg, session
 
     async def push_user_message(self, subscribe: TwitterSubscribeModel,
                                 user: TwitterUserModel, update_type: str,
@@ -431,22 +425,17 @@ class PollTwitterUpdate(TwitterUpdate):
 
         listeners_map = await _model_get_listeners_map()
         main_listeners = listeners_map.get(tweet.author_id, [])
+        targets: List[TwitterSubscribeModel] = []
 
         for listener in main_listeners:
             if not isinstance(tweet.type, TweetTypeEnum):
                 logger.warning("意外的推文类型({})：{}", tweet.id, tweet.type)
             if tweet.type == TweetTypeEnum.tweet:
-                await self.push_tweet_message(listener,
-                                              tweet,
-                                              only_add_failure=is_timeout)
+                targets.append(listener)
             elif tweet.type == TweetTypeEnum.retweet and listener.update_retweet:
-                await self.push_tweet_message(listener,
-                                              tweet,
-                                              only_add_failure=is_timeout)
+                targets.append(listener)
             elif tweet.type == TweetTypeEnum.quote and listener.update_quote:
-                await self.push_tweet_message(listener,
-                                              tweet,
-                                              only_add_failure=is_timeout)
+                targets.append(listener)
             elif tweet.type == TweetTypeEnum.replay:
                 if not listener.update_replay:
                     if not tweet.referenced_tweet_author_id:
@@ -462,31 +451,41 @@ class PollTwitterUpdate(TwitterUpdate):
                             账户已验证 或 粉丝数大于设定的值 才被视为真相关
                         """
                         continue
-                await self.push_tweet_message(listener,
-                                              tweet,
-                                              only_add_failure=is_timeout)
+                targets.append(listener)
 
+        targets.extend(await self.mention_targets(tweet, listeners_map))
+        await tweet_push_pipeline.push(self, tweet, targets, now_time,
+                                       is_timeout)
+
+    async def mention_targets(
+        self, tweet: TwitterTweetModel,
+        listeners_map: Dict[str, List[TwitterSubscribeModel]]
+    ) -> List[TwitterSubscribeModel]:
+        """
+            获取推文的相关推送（提及）目标
+        """
         if tweet.possibly_sensitive:
             """
                 被标记为敏感的推文不参与相关推送
             """
-            return
+            return []
         
         if tweet.type == TweetTypeEnum.retweet:
             """
                 转推类型推文不参与相关推送
             """
-            return
+            return []
         user = await self.client.model_user_get_or_none(tweet.author_id)
         if not user:
-            return
+            return []
         if not ((self.update_mention_verified and user.verified)
                 or user.followers_count > self.update_mention_followers):
             """
                 账户已验证 或 粉丝数大于设定的值 才被视为真相关
             """
-            return
+            return []
 
+        targets = []
         for user_id in tweet.mentions:
             if user_id == tweet.author_id:
                 # 排除提及自己的情况
@@ -494,9 +493,8 @@ class PollTwitterUpdate(TwitterUpdate):
             listeners = listeners_map.get(user_id, [])
             for listener in listeners:
                 if listener.update_mention:
-                    await self.push_tweet_message(listener,
-                                                  tweet,
-                                                  only_add_failure=is_timeout)
+                    targets.append(listener)
+        return targets
 
     async def tweet_update(self, tweet: TwitterTweetModel,
                            old_tweet: Optional[TwitterTweetModel]):
@@ -589,6 +587,211 @@ class PollTwitterUpdate(TwitterUpdate):
                     logger.warning("未配置的更新组：{}", update_type_tuple)
 
 
+class TweetPushJob:
+    """
+        单个订阅的推送任务
+    """
+    __slots__ = ("subscribe", "tweet_id", "msg", "session", "start_time")
+
+    def __init__(self, subscribe: TwitterSubscribeModel, tweet_id: str,
+                 msg: Union[str, v11.Message], session: TwitterSession,
+                 start_time: float) -> None:
+        self.subscribe = subscribe
+        self.tweet_id = tweet_id
+        self.msg = msg
+        self.session = session
+        self.start_time = start_time
+
+
+class TweetPushPipeline:
+    """
+        推文推送管线
+
+        - 每条推文的消息按`(Bot类型, 是否附带机翻)`渲染一次，机翻也只进行一次
+        - 按`(Bot, 组)`划分发送通道，同一组的推送按顺序处理，不同组之间并发（`os_twitter_push_concurrency`）
+        - 每个Bot的发送速率受`os_twitter_push_bot_rate`限制，受限的Bot仅阻塞自己的通道
+        - 关闭时等待排队的推送发送完毕（有超时），未发送的推送记入失败列表
+        - 推文序号的分配在入队前完成，每个组的Session只保存一次
+    """
+
+    def __init__(self) -> None:
+        self.queues: Dict[Tuple[str, int], asyncio.Queue] = {}
+        """(Bot, 组分区)->发送通道"""
+        self.workers: Dict[Tuple[str, int], asyncio.Task] = {}
+        self.bot_buckets: Dict[str, AsyncTokenBucket] = {}
+        self.semaphore: Optional[asyncio.Semaphore] = None
+        """同时进行的发送数"""
+
+        self.push_count: int = 0
+        self.failure_count: int = 0
+        self.latency_total: float = 0
+        self.latency_max: float = 0
+
+    def queue_size(self) -> int:
+        return sum(queue.qsize() for queue in self.queues.values())
+
+    def avg_latency(self) -> float:
+        return self.latency_total / ((self.push_count + self.failure_count)
+                                     or 1)
+
+    def _get_queue(self, job: TweetPushJob) -> asyncio.Queue:
+        """
+            获取任务所属的发送通道，不存在时创建
+        """
+        concurrency = max(config.os_twitter_push_concurrency, 1)
+        key = (job.subscribe.bot_id,
+               hash(job.subscribe.group_mark) % concurrency)
+        queue = self.queues.get(key)
+        if not queue:
+            if not self.semaphore:
+                self.semaphore = asyncio.Semaphore(concurrency)
+            queue = self.queues[key] = asyncio.Queue(
+                maxsize=max(config.os_twitter_push_queue // concurrency, 1))
+            self.workers[key] = asyncio.create_task(self._worker(queue))
+        return queue
+
+    def _get_bot_bucket(self, bot_id: str) -> AsyncTokenBucket:
+        if bot_id not in self.bot_buckets:
+            rate = config.os_twitter_push_bot_rate
+            self.bot_buckets[bot_id] = AsyncTokenBucket(rate,
+                                                        1,
+                                                        initval=1,
+                                                        capacity=max(rate, 1))
+        return self.bot_buckets[bot_id]
+
+    async def _send(self, job: TweetPushJob) -> None:
+        subscribe = job.subscribe
+        await self._get_bot_bucket(subscribe.bot_id).wait_consume(1, 0)
+        assert self.semaphore
+        try:
+            async with self.semaphore:
+                success = await BotSend.send_msg(subscribe.bot_type,
+                                                 subscribe.send_param,
+                                                 job.msg, subscribe.bot_id)
+            if success:
+                self.push_count += 1
+                return
+            logger.warning("推文更新消息推送失败 订阅 {} 消息 {}", subscribe.id, job.msg)
+        except Exception as e:
+            logger.opt(exception=True).warning("推文更新消息推送异常 订阅 {} 消息 {}",
+                                               subscribe.id, job.msg)
+        self.failure_count += 1
+        job.session.failure_list.append(job.tweet_id)
+        await job.session.save()
+
+    async def _worker(self, queue: asyncio.Queue) -> None:
+        while True:
+            job: TweetPushJob = await queue.get()
+            try:
+                await self._send(job)
+                latency = time() - job.start_time
+                self.latency_total += latency
+                self.latency_max = max(self.latency_max, latency)
+                logger.debug("推文 {} 已推送至 {} 耗时 {:.2f}s 队列 {}", job.tweet_id,
+                             job.subscribe.group_mark, latency,
+                             self.queue_size())
+            except asyncio.CancelledError:
+                # 停止时发送中的推送同样记入失败列表
+                job.session.failure_list.append(job.tweet_id)
+                await job.session.save()
+                raise
+            except Exception as e:
+                logger.opt(exception=True).error("推文推送任务异常 订阅 {}",
+                                                 job.subscribe.id)
+            finally:
+                queue.task_done()
+
+    async def push(self,
+                   update: "PollTwitterUpdate",
+                   tweet: TwitterTweetModel,
+                   targets: List[TwitterSubscribeModel],
+                   start_time: float,
+                   only_add_failure: bool = False) -> None:
+        """
+            推送推文至目标订阅
+
+            消息生成完毕并进入发送队列后返回，不等待发送完成。
+        """
+        if not targets:
+            return
+        if only_add_failure:
+            for subscribe in targets:
+                if await plug_is_disable("os_bot_twitter", subscribe.group_mark):
+                    continue
+                session: TwitterSession = await get_session(
+                    subscribe.group_mark, TwitterSession,
+                    "os_bot_twitter")  # type: ignore
+                session.failure_list.append(tweet.id)
+            return
+
+        relate_tweet = None
+        if tweet.referenced_tweet_id:
+            relate_tweet = await update.client.model_tweet_get_or_none(
+                tweet.referenced_tweet_id)
+        if any(subscribe.tweet_trans for subscribe in targets):
+            if config.os_twitter_trans_engine:
+                await update.tweet_trans(tweet, relate_tweet)
+            else:
+                logger.warning("推文{}的推送中启用了推文翻译，但未设置翻译引擎！", tweet.id)
+
+        base_msgs: Dict[Tuple[str, bool], Union[str, v11.Message]] = {}
+        jobs: List[TweetPushJob] = []
+        sessions: Dict[int, TwitterSession] = {}
+        for subscribe in targets:
+            variant = (subscribe.bot_type, subscribe.tweet_trans)
+            if variant not in base_msgs:
+                base_msgs[variant] = await update.tweet_to_message(
+                    tweet, relate_tweet, subscribe.bot_type,
+                    subscribe.tweet_trans)
+            result = await update.prepare_tweet_message(
+                subscribe, tweet, base_msgs[variant])
+            if not result:
+                continue
+            msg, session = result
+            sessions[id(session)] = session
+            jobs.append(
+                TweetPushJob(subscribe, tweet.id, msg, session, start_time))
+
+        for session in sessions.values():
+            await session.save()
+
+        for job in jobs:
+            await self._get_queue(job).put(job)
+
+    async def stop(self, timeout: float = 5) -> None:
+        """
+            等待排队的推送发送完毕后停止，超时未发送的推送记入失败列表
+        """
+        if not self.workers:
+            return
+        try:
+            await asyncio.wait_for(
+                asyncio.gather(*(queue.join()
+                                 for queue in self.queues.values())),
+                timeout=timeout)
+        except asyncio.TimeoutError:
+            logger.warning("推文推送队列未能在{}s内发送完毕，剩余{}条", timeout,
+                           self.queue_size())
+        workers = list(self.workers.values())
+        for worker in workers:
+            worker.cancel()
+        await asyncio.gather(*workers, return_exceptions=True)
+        self.workers.clear()
+        for queue in self.queues.values():
+            while not queue.empty():
+                job: TweetPushJob = queue.get_nowait()
+                job.session.failure_list.append(job.tweet_id)
+                await job.session.save()
+        self.queues.clear()
+        await SessionManage.get_instance().flush()
+
+
+tweet_push_pipeline = TweetPushPipeline()
+
+# 推送失败记录需在数据库关闭前写入
+DatabaseManage.get_instance().add_close_hook(tweet_push_pipeline.stop)
+
+
 # 进行初始化
 session: TwitterPlugSession = None  # type: ignore
 client: AsyncTwitterClient = None  # type: ignore
@@ -643,43 +846,104 @@ async def update_all_listen_user():
     logger.debug("已成功更新所有用户信息 共 {} 位", len(ids))
 
 
-_update_all_listener_lock_task: Optional[asyncio.Future] = None
+class TimelineActivity:
+    """
+        用户发推活跃度
+    """
+    __slots__ = ("last_tweet_time", "tweet_rate", "last_refresh_time")
 
+    def __init__(self) -> None:
+        self.last_tweet_time: float = 0
+        """最近一条推文的发布时间"""
+        self.tweet_rate: float = 0
+        """近期每小时发推数（滑动平均）"""
+        self.last_refresh_time: float = 0
 
-@inhibiting_exception()
-def update_all_listener():
-    """
-        更新所有用户的时间线（自动异步，可等待）
 
-        包含多次运行锁，多次运行时若已有实例在运行则返回该实例
+class TimelineRefreshScheduler:
     """
-    global _update_all_listener_lock_task
+        时间线刷新调度
 
-    if _update_all_listener_lock_task and not _update_all_listener_lock_task.done(
-    ):
-        return _update_all_listener_lock_task
+        - 以`get_timeline`速率配额的`os_twitter_timeline_budget_ratio`为节奏，请求均匀分布在配额周期内
+        - 同时进行的请求数由`os_twitter_timeline_concurrency`限制
+        - 未刷新过的用户最先刷新，其后按发推频率及最近发推时间排序
+        - 按用户记录`since_id`，仅获取上次刷新之后的推文
+    """
 
-    @inhibiting_exception()
-    async def in_func():
-        global _update_all_listener_lock_task
+    def __init__(self) -> None:
+        self.activities: Dict[str, TimelineActivity] = {}
+        self._pacer: Optional[AsyncTokenBucket] = None
+
+    def get_pacer(self) -> AsyncTokenBucket:
+        if not self._pacer:
+            bucket = client.token_buckets.get_timeline
+            ratio = min(max(config.os_twitter_timeline_budget_ratio, 0.05), 1)
+            self._pacer = AsyncTokenBucket(bucket.num * ratio,
+                                           bucket.issuetime,
+                                           initval=1,
+                                           capacity=1)
+        return self._pacer
+
+    def priority(self, user_id: str) -> float:
+        activity = self.activities.get(user_id)
+        if not activity:
+            return inf
+        idle_hours = max(time() - activity.last_tweet_time, 60) / 3600
+        return activity.tweet_rate + 1 / idle_hours
+
+    def record(self, user_id: str, tweets: List[TwitterTweetModel]) -> None:
+        now_time = time()
+        activity = self.activities.get(user_id)
+        if not activity:
+            activity = TimelineActivity()
+            activity.last_refresh_time = now_time - 86400
+            self.activities[user_id] = activity
+        hours = max(now_time - activity.last_refresh_time, 60) / 3600
+        new_count = 0
+        for tweet in tweets:
+            tweet_time = tweet.created_at.timestamp()
+            if tweet_time > activity.last_refresh_time:
+                new_count += 1
+            activity.last_tweet_time = max(activity.last_tweet_time,
+                                           tweet_time)
+        activity.tweet_rate = activity.tweet_rate * 0.7 + new_count / hours * 0.3
+        activity.last_refresh_time = now_time
+
+        if tweets:
+            since_id = max(tweets, key=lambda t: int(t.id)).id
+            old_since_id = session.timeline_since_ids.get(user_id)
+            if not old_since_id or int(since_id) > int(old_since_id):
+                session.timeline_since_ids[user_id] = since_id
+
+    async def refresh(self, listener: str) -> None:
+        user = await client.model_user_get_or_none(listener)
+        if not user:
+            logger.error(" {} 用户信息不存在，已跳过时间线更新", listener)
+            return
+        if user.protected:
+            logger.error(" {} 的时间线，受保护，已跳过时间线更新", listener)
+            return
+        since_id = session.timeline_since_ids.get(listener)
         try:
-            listeners = await _model_get_listeners()
-            for listener in listeners:
+            tweets = await client.get_timeline(id=listener, since_id=since_id)
+        except (asyncio.exceptions.TimeoutError, aiohttp.ClientError) as e:
+            await asyncio.sleep(10)
+            await self.get_pacer().wait_consume(1, 0)
+            tweets = await client.get_timeline(id=listener, since_id=since_id)
+        self.record(listener, tweets)
+        logger.debug("已更新 {}@{} 的时间线 新推文 {} 条", user.name, user.username,
+                     len(tweets))
+
+    async def refresh_all(self, listeners: List[str]) -> None:
+        queue = deque(sorted(listeners, key=self.priority, reverse=True))
+        pacer = self.get_pacer()
+
+        async def worker():
+            while queue:
+                listener = queue.popleft()
+                await pacer.wait_consume(1, 0)
                 try:
-                    user = await client.model_user_get_or_none(listener)
-                    if not user:
-                        logger.error(" {} 用户信息不存在，已跳过时间线更新", id)
-                        continue
-                    if user.protected:
-                        logger.error(" {} 的时间线，受保护，已跳过时间线更新", listener)
-                        continue
-                    try:
-                        await client.get_timeline(id=listener)
-                    except (asyncio.exceptions.TimeoutError,
-                            aiohttp.ClientError) as e:
-                        await asyncio.sleep(10)
-                        await client.get_timeline(id=listener)
-                    logger.debug("已更新 {}@{} 的时间线", user.name, user.username)
+                    await self.refresh(listener)
                 except Exception as e:
                     user = None
                     try:
@@ -693,8 +957,37 @@ def update_all_listener():
                         logger.opt(exception=True).error(
                             "更新 {}@{} 时间线时错误", user.name, user.username)
 
-                # 时间线更新间隔 3s
-                await asyncio.sleep(3)
+        await asyncio.gather(*[
+            worker()
+            for _ in range(max(config.os_twitter_timeline_concurrency, 1))
+        ])
+        await session.save()
+
+
+timeline_scheduler = TimelineRefreshScheduler()
+
+_update_all_listener_lock_task: Optional[asyncio.Future] = None
+
+
+@inhibiting_exception()
+def update_all_listener():
+    """
+        更新所有用户的时间线（自动异步，可等待）
+
+        包含多次运行锁，多次运行时若已有实例在运行则返回该实例
+    """
+    global _update_all_listener_lock_task
+
+    if _update_all_listener_lock_task and not _update_all_listener_lock_task.done(
+    ):
+        return _update_all_listener_lock_task
+
+    @inhibiting_exception()
+    async def in_func():
+        global _update_all_listener_lock_task
+        try:
+            listeners = await _model_get_listeners()
+            await timeline_scheduler.refresh_all(listeners)
         finally:
             _update_all_listener_lock_task = None
 
@@ -725,7 +1018,8 @@ async def user_follow_and_update(id: str) -> bool:
                     session.following_list.append(id)
                     await session.save()
                     # 同时更新时间线
-                    await client.get_timeline(id=id)
+                    timeline_scheduler.record(id, await
+                                              client.get_timeline(id=id))
                     logger.info("已关注并初始化 {}@{} 的时间线", user.name, user.username)
                 return True
             except MatcherErrorFinsh as e:
@@ -735,7 +1029,7 @@ async def user_follow_and_update(id: str) -> bool:
                 return False
         elif config.os_twitter_stream_enable:
             # 流式推送的情况下将更新时间线并更新规则
-            await client.get_timeline(id=id)
+            timeline_scheduler.record(id, await client.get_timeline(id=id))
             listeners.append(id)
             await stream.reload_listeners(listeners)
     return True
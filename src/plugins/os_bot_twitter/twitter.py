@@ -5,6 +5,7 @@ from typing import Any, Dict, List, Optional, Tuple, Type
 import aiohttp
 from yarl import URL
 from tortoise.exceptions import BaseORMException
+from tortoise.transactions import in_transaction
 from tweepy.asynchronous import AsyncClient, AsyncStreamingClient as BaseAsyncStreamingClient
 from tweepy import User, Tweet, Poll, Media, OAuth1UserHandler, TweepyException, StreamRule
 from requests_oauthlib import OAuth1Session
@@ -19,7 +20,12 @@ from .exception import TwitterException, RatelimitException, TwitterDatabaseExce
 from .config import config
 
 from ..os_bot_base.notice import UrgentNotice
-from ..os_bot_base.util import AsyncTokenBucket, inhibiting_exception
+from ..os_bot_base.util import AsyncTokenBucket, inhibiting_exception, http_session, HttpSessionManage
+
+TWITTER_HTTP_PROFILE = "twitter"
+HttpSessionManage.get_instance().register_profile(TWITTER_HTTP_PROFILE,
+                                                  proxy=config.os_twitter_proxy,
+                                                  timeout=10)
 
 
 class ProxyClientRequest(aiohttp.ClientRequest):
@@ -132,6 +138,10 @@ def model_user_get_or_none_update(user_id: str, model: TwitterUserModel):
     # logger.debug("model_user_get_or_none_update 更新缓存 {}", user_id)
 
 
+BATCH_SIZE = 200
+"""批量写入时单条语句的最大行数"""
+
+
 class AsyncTwitterClient:
     """
         异步推特Api客户端封装
@@ -148,9 +158,7 @@ class AsyncTwitterClient:
             access_token_secret=config.os_twitter_access_token_secret,
         )
         self.token_buckets: TwitterBuckets = TwitterBuckets()
-        self.client.session = aiohttp.ClientSession(  # type: ignore
-            request_class=ProxyClientRequest,
-            timeout=aiohttp.ClientTimeout(total=10))
+        self.client.session = http_session(TWITTER_HTTP_PROFILE)  # type: ignore
 
         self.tweet_expansions = "author_id,referenced_tweets.id,in_reply_to_user_id,attachments.media_keys,attachments.poll_ids,referenced_tweets.id.author_id"
         self.tweet_fields = (
@@ -261,21 +269,34 @@ class AsyncTwitterClient:
             auto 来自自动更新的数据？(自动更新的数据被认为时效性更佳)
             注意，即使`is_minor`被设置为`False`，当检测到数据完整性缺失时仍然会视为次生数据。
         """
+        tweet_model = await self.model_tweet_get_or_none(f"{tweet.id}")
+        tweet_model, old_model = await self._fill_tweet_model(
+            tweet, tweet_model, includes, is_minor, auto)
+        # 更新缓存
+        self.model_tweet_get_or_none_update(tweet_model.id, tweet_model)
+        await tweet_model.save()
+
+        asyncio.gather(self.update.tweet_update(tweet_model, old_model))
+        return tweet_model
+
+    async def _fill_tweet_model(
+        self, tweet: Tweet, tweet_model: Optional[TwitterTweetModel],
+        includes: Dict[str, List[Any]], is_minor: bool, auto: bool
+    ) -> Tuple[TwitterTweetModel, Optional[TwitterTweetModel]]:
+        """
+            将推文数据填充至模型（不保存）
+
+            返回`(模型, 旧模型)`，推文新建或完整性转换时旧模型为`None`。
+        """
         polls: List[Poll] = includes.get("polls", [])
         medias: List[Media] = includes.get("media", [])
         users: List[User] = includes.get("users", [])
         tweets: List[Tweet] = includes.get("tweets", [])
         old_model = None
-        tweet_model = await self.model_tweet_get_or_none(f"{tweet.id}")
         if not tweet_model or (tweet_model.minor_data and not is_minor):
             # 初始化 - 当完整性从非完整变更为完整时再度触发
             if not tweet_model:
-                tweet_model = await self.model_tweet_get_or_none(f"{tweet.id}")
-                if not tweet_model:
-                    tweet_model = TwitterTweetModel(id=f"{tweet.id}")
-                    # 更新缓存
-                    self.model_tweet_get_or_none_update(
-                        f"{tweet.id}", tweet_model)
+                tweet_model = TwitterTweetModel(id=f"{tweet.id}")
             tweet_model.minor_data = is_minor
             tweet_model.author_id = f"{tweet.author_id}"
             tweet_model.type = await self.tweet_get_type(tweet)
@@ -382,21 +403,28 @@ class AsyncTwitterClient:
                 "quote_count", tweet_model.quote_count)
         tweet_model.reply_settings = tweet.reply_settings
         tweet_model.source = tweet.data
-        await tweet_model.save()
-
-        asyncio.gather(self.update.tweet_update(tweet_model, old_model))
-        self.model_tweet_get_or_none_update(tweet_model.id, tweet_model)
-        return tweet_model
+        return tweet_model, old_model
 
     async def conversion_user(self, user: User) -> TwitterUserModel:
-        old_model = None
         user_model = await self.model_user_get_or_none(f"{user.id}")
+        user_model, old_model = await self._fill_user_model(user, user_model)
+        # 更新缓存
+        self.model_user_get_or_none_update(user_model.id, user_model)
+        await user_model.save()
+        asyncio.gather(self.update.user_update(user_model, old_model))
+        return user_model
+
+    async def _fill_user_model(
+        self, user: User, user_model: Optional[TwitterUserModel]
+    ) -> Tuple[TwitterUserModel, Optional[TwitterUserModel]]:
+        """
+            将用户数据填充至模型（不保存）
+
+            返回`(模型, 旧模型)`，用户新建时旧模型为`None`。
+        """
+        old_model = None
         if not user_model:
-            user_model = await self.model_user_get_or_none(f"{user.id}")
-            if not user_model:
-                user_model = TwitterUserModel(id=f"{user.id}")
-                # 更新缓存
-                self.model_user_get_or_none_update(f"{user.id}", user_model)
+            user_model = TwitterUserModel(id=f"{user.id}")
         else:
             old_model = user_model.clone(user_model.pk)
         user_model.name = user.name
@@ -422,11 +450,7 @@ class AsyncTwitterClient:
                 "tweet_count", user_model.tweet_count)
             user_model.listed_count = public_metrics.get(
                 "listed_count", user_model.listed_count)
-
-        await user_model.save()
-        self.model_user_get_or_none_update(user_model.id, user_model)
-        asyncio.gather(self.update.user_update(user_model, old_model))
-        return user_model
+        return user_model, old_model
 
     async def get_user(
             self,
@@ -530,73 +554,155 @@ class AsyncTwitterClient:
 
         return main_tweet
 
-    async def _handle_timeline(self,
-                               tweetsResponse,
-                               ignore_exception: bool = False,
-                               auto: bool = False) -> List[TwitterTweetModel]:
-        includes: Dict[str,
-                       List[Any]] = tweetsResponse.includes  # type: ignore
-        users: List[User] = includes.get("users", [])
-        tweets: Optional[List[Tweet]] = includes.get("tweets", [])
-        includes["tweets"] = []
-        includes["tweets"].extend(tweets)
-        includes["tweets"].extend(tweetsResponse.data)  # type: ignore
+    async def conversion_batch(
+            self,
+            users: List[User],
+            tweets: List[Tuple[Tweet, bool]],
+            includes: Dict[str, List[Any]],
+            ignore_exception: bool = False,
+            auto: bool = False,
+            position: str = "批量处理") -> List[Optional[TwitterTweetModel]]:
+        """
+            批量转换用户及推文数据
 
-        return_tweets = []
-        res_tweets: List[Tweet] = tweetsResponse.data  # type: ignore
+            涉及的用户与推文通过一次`id__in`查询预取，在内存中完成转换后于同一事务内批量写入。
+
+            写入完成后按处理顺序（先用户后推文）触发更新hook。
+
+            tweets 推文及其是否为次生数据的列表，同一推文可以出现多次（依次处理）
+            返回与`tweets`对应的模型列表，转换失败（且忽略异常）时对应位置为`None`
+        """
+        user_ids = list({f"{user.id}" for user in users})
+        tweet_ids = list({f"{tweet.id}" for tweet, _ in tweets})
+        try:
+            user_models: Dict[str, TwitterUserModel] = {
+                model.id: model
+                for model in await TwitterUserModel.filter(id__in=user_ids)
+            } if user_ids else {}
+            tweet_models: Dict[str, TwitterTweetModel] = {
+                model.id: model
+                for model in await TwitterTweetModel.filter(id__in=tweet_ids)
+            } if tweet_ids else {}
+        except BaseORMException as e:
+            raise TwitterDatabaseException(f"数据库异常！位于：{position}-预取",
+                                           cause=e)
+        # 优先使用缓存中的实例，保持与其它引用一致
+        for user_id in user_ids:
+            cache_model = model_user_get_or_none.cache.get(
+                model_user_get_or_none.cache_key(user_id))
+            if cache_model:
+                user_models[user_id] = cache_model
+        for tweet_id in tweet_ids:
+            cache_model = model_tweet_get_or_none.cache.get(
+                model_tweet_get_or_none.cache_key(tweet_id))
+            if cache_model:
+                tweet_models[tweet_id] = cache_model
+
+        user_events: List[Tuple[TwitterUserModel,
+                                Optional[TwitterUserModel]]] = []
+        tweet_events: List[Tuple[TwitterTweetModel,
+                                 Optional[TwitterTweetModel]]] = []
+        return_tweets: List[Optional[TwitterTweetModel]] = []
 
-        # 优先处理依赖
         for user in users:
             try:
-                await self.conversion_user(user)
-            except BaseORMException as e:
-                raise TwitterDatabaseException(
-                    f"数据库异常！位于：timeline处理-用户 {user.id}", cause=e)
+                user_model, old_model = await self._fill_user_model(
+                    user, user_models.get(f"{user.id}"))
             except Exception as e:
                 if not ignore_exception:
                     raise TwitterException(
-                        f"意外的错误，可能是转换失败导致。 timeline处理-用户 {user.id}", cause=e)
+                        f"意外的错误，可能是转换失败导致。 {position}-用户 {user.id}", cause=e)
+                continue
+            user_models[user_model.id] = user_model
+            user_events.append((user_model, old_model))
 
-        for tweet in tweets:
+        for tweet, is_minor in tweets:
             try:
-                await self.conversion_tweet(tweet, includes, auto=auto)
-            except BaseORMException as e:
-                raise TwitterDatabaseException(
-                    f"数据库异常！位于：timeline处理-次要推文 {tweet.id}", cause=e)
+                tweet_model, old_model = await self._fill_tweet_model(
+                    tweet, tweet_models.get(f"{tweet.id}"), includes,
+                    is_minor, auto)
             except Exception as e:
                 if not ignore_exception:
                     raise TwitterException(
-                        f"意外的错误，可能是转换失败导致。位于：timeline处理-次要推文 {tweet.id}",
+                        f"意外的错误，可能是转换失败导致。 {position}-{'次要推文' if is_minor else '主数据'} {tweet.id}",
                         cause=e)
+                return_tweets.append(None)
+                continue
+            tweet_models[tweet_model.id] = tweet_model
+            tweet_events.append((tweet_model, old_model))
+            return_tweets.append(tweet_model)
+
+        save_users = list({id(e[0]): e[0] for e in user_events}.values())
+        save_tweets = list({id(e[0]): e[0] for e in tweet_events}.values())
+        try:
+            # 以“删除后插入”的方式批量写入：当前版本的tortoise在字符主键表上生成的冲突更新语句无效，
+            # 而bulk_update不会转换JSON及枚举字段。
+            async with in_transaction() as connection:
+                for model_cls, save_models in ((TwitterUserModel, save_users),
+                                               (TwitterTweetModel,
+                                                save_tweets)):
+                    if not save_models:
+                        continue
+                    await model_cls.filter(
+                        id__in=[model.id for model in save_models]
+                    ).using_db(connection).delete()
+                    await model_cls.bulk_create(save_models,
+                                                batch_size=BATCH_SIZE,
+                                                using_db=connection)
+        except BaseORMException as e:
+            raise TwitterDatabaseException(f"数据库异常！位于：{position}-批量写入",
+                                           cause=e)
+        for model in save_users:
+            model._saved_in_db = True
+            self.model_user_get_or_none_update(model.id, model)
+        for model in save_tweets:
+            model._saved_in_db = True
+            self.model_tweet_get_or_none_update(model.id, model)
+
+        for user_model, old_model in user_events:
+            asyncio.gather(self.update.user_update(user_model, old_model))
+        for tweet_model, old_model in tweet_events:
+            asyncio.gather(self.update.tweet_update(tweet_model, old_model))
+        return return_tweets
 
-        # 处理主体
-        for res_tweet in res_tweets:
-            try:
-                return_tweets.append(await
-                                     self.conversion_tweet(res_tweet,
-                                                           includes,
-                                                           is_minor=False,
-                                                           auto=auto))
-            except BaseORMException as e:
-                raise TwitterDatabaseException(
-                    f"数据库异常！位于：timeline处理-主数据 {res_tweet.id}", cause=e)
-            except Exception as e:
-                if not ignore_exception:
-                    raise TwitterException(
-                        f"意外的错误，可能是转换失败导致。 位于：timeline处理-主数据 {res_tweet.id}",
-                        cause=e)
+    async def _handle_timeline(self,
+                               tweetsResponse,
+                               ignore_exception: bool = False,
+                               auto: bool = False) -> List[TwitterTweetModel]:
+        if not tweetsResponse.data:  # type: ignore
+            return []
+        includes: Dict[str,
+                       List[Any]] = tweetsResponse.includes  # type: ignore
+        users: List[User] = includes.get("users", [])
+        tweets: List[Tweet] = includes.get("tweets", [])
+        includes["tweets"] = []
+        includes["tweets"].extend(tweets)
+        includes["tweets"].extend(tweetsResponse.data)  # type: ignore
 
-        return return_tweets
+        res_tweets: List[Tweet] = tweetsResponse.data  # type: ignore
+
+        # 依赖（用户、次要推文）先于主体处理
+        models = await self.conversion_batch(
+            users, [(tweet, True) for tweet in tweets] +
+            [(tweet, False) for tweet in res_tweets],
+            includes,
+            ignore_exception=ignore_exception,
+            auto=auto,
+            position="timeline处理")
+        return [model for model in models[len(tweets):] if model]
 
     async def get_timeline(self,
                            id: Optional[str] = None,
                            username: Optional[str] = None,
                            ignore_exception: bool = False,
-                           auto: bool = False) -> List[TwitterTweetModel]:
+                           auto: bool = False,
+                           since_id: Optional[str] = None
+                           ) -> List[TwitterTweetModel]:
         """
             获取时间线
 
             ignore_exception 是否忽视异常
+            since_id 仅获取此推文之后的推文
         """
         if not await self.token_buckets.get_timeline.consume(1):
             raise RatelimitException("速率限制")
@@ -608,6 +714,7 @@ class AsyncTwitterClient:
         tweetsResponse = await self.client.get_users_tweets(
             id=id,
             max_results=100,
+            since_id=since_id,
             expansions=self.tweet_expansions,
             tweet_fields=self.tweet_fields,
             user_fields=self.user_fields,
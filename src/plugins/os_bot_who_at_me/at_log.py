@@ -0,0 +1,157 @@
+"""
+    # AT记录
+
+    - 收集到的AT先写入内存缓冲，定时批量追加至数据库（`AtLogModel`），不再每条消息保存一次`Session`
+    - 查看时按群分页查询，无需加载整个列表
+    - 每个群仅保留最近`who_at_me_group_size`条
+"""
+from time import time
+from typing import List, Optional, Set, Tuple
+from typing_extensions import Self
+from nonebot_plugin_apscheduler import scheduler
+from ..os_bot_base import DatabaseManage
+from .config import WhoAtMeSession, config
+from .model import AtLogModel
+from .logger import logger
+
+ORDERING = ("-create_time", "-id")
+"""由新到旧（迁移的旧记录`id`可能较大，优先按创建时间排序）"""
+
+
+class AtLogManage:
+    """
+        AT记录管理器
+    """
+    instance: Optional[Self] = None
+
+    PENDING_MAX = 10000
+    """缓冲上限，写入持续失败时丢弃最旧的记录"""
+
+    def __init__(self) -> None:
+        self._pending: List[AtLogModel] = []
+        self._dirty_groups: Set[int] = set()
+
+    def append(self, group_id: int, origin_id: int, target_id: int,
+               origin_msg: str, deal_msg: str) -> None:
+        self._pending.append(
+            AtLogModel(group_id=group_id,
+                       origin_id=origin_id,
+                       target_id=target_id,
+                       origin_msg=origin_msg,
+                       deal_msg=deal_msg,
+                       create_time=int(time())))
+        if len(self._pending) > self.PENDING_MAX:
+            del self._pending[:len(self._pending) - self.PENDING_MAX]
+
+    async def flush(self) -> int:
+        """
+            将缓冲中的记录写入数据库
+        """
+        if not self._pending:
+            return 0
+        pending, self._pending = self._pending, []
+        try:
+            await AtLogModel.bulk_create(pending)
+        except Exception:
+            self._pending = pending + self._pending
+            raise
+        self._dirty_groups.update(unit.group_id for unit in pending)
+        return len(pending)
+
+    async def clean(self) -> int:
+        """
+            清理有新增记录的群中超出保留数量的记录
+        """
+        count = 0
+        groups, self._dirty_groups = self._dirty_groups, set()
+        for group_id in groups:
+            keep_ids = await AtLogModel.filter(group_id=group_id).order_by(
+                *ORDERING).limit(max(config.who_at_me_group_size,
+                                     1)).values_list("id", flat=True)
+            count += await AtLogModel.filter(
+                group_id=group_id, id__not_in=list(keep_ids)).delete()
+        return count
+
+    async def migrate(self, group_id: int, session: WhoAtMeSession) -> None:
+        """
+            迁移`Session`中的旧记录
+        """
+        if not session.ob11_ats:
+            return
+        await AtLogModel.bulk_create([
+            AtLogModel(group_id=group_id,
+                       origin_id=at.origin_id,
+                       target_id=at.target_id,
+                       origin_msg=at.origin_msg,
+                       deal_msg=at.deal_msg,
+                       view=at.view,
+                       create_time=at.create_time) for at in session.ob11_ats
+        ])
+        async with session:
+            session.ob11_ats.clear()
+        self._dirty_groups.add(group_id)
+
+    async def prepare(self, group_id: int, session: WhoAtMeSession) -> None:
+        """
+            查询前写入缓冲及迁移旧记录
+        """
+        await self.flush()
+        await self.migrate(group_id, session)
+
+    async def latest(self, group_id: int,
+                     user_id: int) -> Optional[AtLogModel]:
+        """
+            最近一条AT了指定成员（或全体）的记录
+        """
+        return await AtLogModel.filter(
+            group_id=group_id,
+            target_id__in=[0, user_id]).order_by(*ORDERING).first()
+
+    async def page(self,
+                   group_id: int,
+                   page: int,
+                   size: int,
+                   user_id: Optional[int] = None,
+                   newest_first: bool = True) -> Tuple[int, List[AtLogModel]]:
+        """
+            分页查询，返回总数及当页记录
+        """
+        query = AtLogModel.filter(group_id=group_id)
+        if user_id is not None:
+            query = query.filter(target_id__in=[0, user_id])
+        count = await query.count()
+        ordering = ORDERING if newest_first else tuple(
+            field[1:] for field in ORDERING)
+        units = await query.order_by(*ordering).offset(
+            (page - 1) * size).limit(size)
+        return count, units
+
+    async def set_view(self, unit: AtLogModel) -> None:
+        unit.view = True
+        await AtLogModel.filter(id=unit.id).update(view=True)
+
+    @classmethod
+    def get_instance(cls) -> Self:
+        if not cls.instance:
+            cls.instance = cls()
+        return cls.instance
+
+
+DatabaseManage.get_instance().add_close_hook(AtLogManage.get_instance().flush)
+
+
+@scheduler.scheduled_job("interval",
+                         seconds=max(config.who_at_me_flush_interval, 1),
+                         name="AT记录写入")
+async def _():
+    try:
+        await AtLogManage.get_instance().flush()
+    except Exception:
+        logger.opt(exception=True).warning("AT记录写入失败")
+
+
+@scheduler.scheduled_job("interval", minutes=10, name="AT记录清理")
+async def _():
+    count = await AtLogManage.get_instance().clean()
+    if count:
+        logger.debug("已清理{}条AT记录", count)
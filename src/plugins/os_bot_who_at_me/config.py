@@ -2,7 +2,7 @@ from collections import deque
 from time import time
 from typing import Any, Deque, Dict
 from typing_extensions import Self
-from pydantic import BaseSettings
+from pydantic import BaseSettings, Field
 from nonebot import get_driver
 from nonebot.plugin import PluginMetadata
 from dataclasses import dataclass, field
@@ -15,6 +15,10 @@ class Config(BaseSettings):
     """
         工具插件
     """
+    who_at_me_flush_interval: int = Field(default=5)
+    """AT记录批量写入间隔(秒)"""
+    who_at_me_group_size: int = Field(default=100)
+    """每个群保留的AT记录数"""
 
     class Config:
 
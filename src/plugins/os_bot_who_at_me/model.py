@@ -0,0 +1,28 @@
+from time import time
+from tortoise.models import Model
+from tortoise import fields
+from ..os_bot_base import DatabaseManage
+
+
+class AtLogModel(Model):
+
+    class Meta:
+        table = "os_who_at_me_log"
+        table_description = "AT记录表"
+        indexes = (("group_id", "target_id"), )
+
+    id: int = fields.IntField(pk=True)
+    group_id: int = fields.BigIntField(index=True, description="群号")
+    origin_id: int = fields.BigIntField(description="谁at的")
+    target_id: int = fields.BigIntField(description="at谁去了(0表示at全体)")
+    origin_msg: str = fields.TextField(description="原始消息")
+    deal_msg: str = fields.TextField(description="处理后的消息（用于发送")
+    view: bool = fields.BooleanField(default=False,
+                                     description="该AT是否已被查看（at全体永远未被查看")
+    create_time: int = fields.BigIntField(description="创建时间(s)")
+
+    def is_expire(self):
+        return time() - self.create_time > 43200
+
+
+DatabaseManage.get_instance().add_model(AtLogModel)
@@ -1,5 +1,7 @@
+import asyncio
 import math
 import random
+from typing import Dict, Iterable
 from nonebot import on_keyword, on_command, on_message
 from nonebot.matcher import Matcher
 from nonebot.params import EventMessage
@@ -7,7 +9,8 @@ from nonebot.permission import SUPERUSER
 from nonebot.adapters.onebot import v11
 from nonebot.adapters.onebot.v11.permission import GROUP_ADMIN, GROUP_OWNER, GROUP_MEMBER
 
-from .config import AtUnit, WhoAtMeSession
+from .config import WhoAtMeSession
+from .at_log import AtLogManage
 from .logger import logger
 
 from ..os_bot_base.depends import SessionDepend, ArgMatchDepend, AdapterDepend, Adapter
@@ -15,6 +18,20 @@ from ..os_bot_base.util import matcher_exception_try
 from ..os_bot_base.argmatch import ArgMatch, Field, PageArgMatch
 from ..os_bot_base.util import RateLimitDepend, RateLimitUtil
 
+
+async def get_nicks(adapter: Adapter, user_ids: Iterable[int],
+                    group_id: int) -> Dict[int, str]:
+    """
+        批量获取昵称（去重后并发查询本地缓存）
+    """
+    unique_ids = list(dict.fromkeys(user_ids))
+    nicks = await asyncio.gather(*[
+        adapter.get_unit_nick(user_id, group_id=group_id)
+        for user_id in unique_ids
+    ])
+    return dict(zip(unique_ids, nicks))
+
+
 who_at_me = on_keyword(keywords={
     "谁at我", "谁AT我", "谁艾特我", "有人艾特我吗", "谁在AT我", "谁在at我", "谁在艾特我", "谁再AT我",
     "谁再at我", "谁再艾特我", "谁艾特我", "有人at我", "有人艾特我"
@@ -34,18 +51,16 @@ async def _(matcher: Matcher,
     if len(str(message)) > 10:
         return
 
-    at_list = [
-        at for at in session.ob11_ats if at.target_id in [0, event.user_id]
-    ]
+    at_log = AtLogManage.get_instance()
+    await at_log.prepare(event.group_id, session)
+    at_unit = await at_log.latest(event.group_id, event.user_id)
 
-    if not at_list:
+    if not at_unit:
         return
 
-    if at_list[-1].is_expire():
+    if at_unit.is_expire():
         return
 
-    at_unit = at_list[-1]
-
     if at_unit.view:
         return
 
@@ -75,23 +90,20 @@ async def _(matcher: Matcher,
     if len(str(message)) > 10:
         return
 
-    at_list = [
-        at for at in session.ob11_ats if at.target_id in [0, event.user_id]
-    ]
+    at_log = AtLogManage.get_instance()
+    await at_log.prepare(event.group_id, session)
+    at_unit = await at_log.latest(event.group_id, event.user_id)
 
-    if not at_list:
+    if not at_unit:
         return
 
-    if at_list[-1].is_expire():
+    if at_unit.is_expire():
         return
 
-    at_unit = at_list[-1]
-
     if at_unit.view:
         return
 
-    async with session:
-        at_unit.view = True
+    await at_log.set_view(at_unit)
 
     nick = await adapter.get_unit_nick(at_unit.origin_id,
                                        group_id=event.group_id)
@@ -134,9 +146,12 @@ async def _(matcher: Matcher,
     if arg.unit_id:
         user_id = arg.unit_id
     size = 5
-    at_list = [at for at in session.ob11_ats if at.target_id in [0, user_id]]
-    at_list.reverse()
-    count = len(at_list)
+    at_log = AtLogManage.get_instance()
+    await at_log.prepare(event.group_id, session)
+    count, at_list_part = await at_log.page(event.group_id,
+                                            arg.page,
+                                            size,
+                                            user_id=user_id)
     maxpage = math.ceil(count / size)
 
     if count == 0:
@@ -144,12 +159,13 @@ async def _(matcher: Matcher,
     if arg.page > maxpage:
         await matcher.finish(f"超过最大页数({maxpage})了哦")
 
-    at_list_part = at_list[(arg.page - 1) * size:arg.page * size]
+    nicks = await get_nicks(adapter,
+                            (at_unit.origin_id for at_unit in at_list_part),
+                            event.group_id)
     msg = v11.Message() + v11.MessageSegment.text(f"{arg.page}/{maxpage}")
     for at_unit in at_list_part:
         msg += v11.MessageSegment.text(
-            f"\n{await adapter.get_unit_nick(at_unit.origin_id, group_id=event.group_id)}({at_unit.origin_id}) > "
-        )
+            f"\n{nicks[at_unit.origin_id]}({at_unit.origin_id}) > ")
         msg += v11.Message(at_unit.deal_msg)
     await matcher.finish(msg)
 
@@ -169,8 +185,12 @@ async def _(matcher: Matcher,
             session: WhoAtMeSession = SessionDepend(),
             adapter: Adapter = AdapterDepend()):
     size = 5
-    at_list = list(session.ob11_ats)
-    count = len(at_list)
+    at_log = AtLogManage.get_instance()
+    await at_log.prepare(event.group_id, session)
+    count, at_list_part = await at_log.page(event.group_id,
+                                            arg.page,
+                                            size,
+                                            newest_first=False)
     maxpage = math.ceil(count / size)
 
     if count == 0:
@@ -178,23 +198,31 @@ async def _(matcher: Matcher,
     if arg.page > maxpage:
         await matcher.finish(f"超过最大页数({maxpage})了哦")
 
-    at_list_part = at_list[(arg.page - 1) * size:arg.page * size]
+    nicks = await get_nicks(
+        adapter, (user_id for at_unit in at_list_part
+                  for user_id in (at_unit.origin_id, at_unit.target_id)),
+        event.group_id)
     msg = v11.Message() + v11.MessageSegment.text(f"{arg.page}/{maxpage}")
     for at_unit in at_list_part:
         msg += v11.MessageSegment.text(
-            f"\n{await adapter.get_unit_nick(at_unit.origin_id, group_id=event.group_id)}({at_unit.origin_id})"
-        )
+            f"\n{nicks[at_unit.origin_id]}({at_unit.origin_id})")
         if at_unit.target_id == 0:
             msg += v11.MessageSegment.text(f"艾特了全体成员 > ")
         else:
             msg += v11.MessageSegment.text(
-                f"艾特了{await adapter.get_unit_nick(at_unit.target_id, group_id=event.group_id)}({at_unit.target_id}) > "
-            )
+                f"艾特了{nicks[at_unit.target_id]}({at_unit.target_id}) > ")
         msg += v11.Message(at_unit.deal_msg)
     await matcher.finish(msg)
 
 
-at_collect = on_message(priority=1, block=False)
+def _has_at(event: v11.GroupMessageEvent) -> bool:
+    """
+        仅处理包含at的群消息
+    """
+    return any(msgseg.type == "at" for msgseg in event.message)
+
+
+at_collect = on_message(priority=1, block=False, rule=_has_at)
 
 
 @at_collect.handle()
@@ -202,12 +230,16 @@ async def _(matcher: Matcher,
             bot: v11.Bot,
             event: v11.GroupMessageEvent,
             message: v11.Message = EventMessage(),
-            session: WhoAtMeSession = SessionDepend(),
             adapter: Adapter = AdapterDepend()):
     msg_ats = message["at"]
     if not msg_ats:
         return
 
+    nicks = await get_nicks(adapter, (int(msgseg.data["qq"])
+                                      for msgseg in msg_ats
+                                      if f"{msgseg.data.get('qq', '')}".isdigit()),
+                            event.group_id)
+
     deal_msg = v11.Message()
     for msgseg in message:
         if msgseg.is_text():
@@ -218,9 +250,8 @@ async def _(matcher: Matcher,
             if qq == 'all':
                 deal_msg += v11.MessageSegment.text("@全体成员 ")
             else:
-                deal_msg += v11.MessageSegment.text(
-                    f"@{await adapter.get_unit_nick(msgseg.data.get('qq', ''), group_id=event.group_id)} "
-                )
+                nick = nicks.get(int(qq)) if f"{qq}".isdigit() else qq
+                deal_msg += v11.MessageSegment.text(f"@{nick} ")
         elif msgseg.type == "image":
             url = msgseg.data.get("url", "")
             deal_msg += v11.MessageSegment.image(url)
@@ -230,19 +261,17 @@ async def _(matcher: Matcher,
     if len(deal_msg.extract_plain_text()) > 100:
         return
 
-    async with session:
-        for at_seg in msg_ats:
-            if "qq" not in at_seg.data and at_seg.data.get("qq", None):
-                continue
-            qq = at_seg.data.get("qq", "")
-            if f"{qq}" == f"{event.user_id}":
-                # 排除自我感动
-                continue
-            if qq == 'all':
-                qq = 0
-            qq = int(qq)
-            session.ob11_ats.append(
-                AtUnit(origin_id=event.user_id,
-                       target_id=qq,
-                       origin_msg=str(message),
-                       deal_msg=str(deal_msg)))
+    at_log = AtLogManage.get_instance()
+    origin_msg = str(message)
+    for at_seg in msg_ats:
+        if "qq" not in at_seg.data and at_seg.data.get("qq", None):
+            continue
+        qq = at_seg.data.get("qq", "")
+        if f"{qq}" == f"{event.user_id}":
+            # 排除自我感动
+            continue
+        if qq == 'all':
+            qq = 0
+        qq = int(qq)
+        at_log.append(event.group_id, event.user_id, qq, origin_msg,
+                      str(deal_msg))